@@ -2,10 +2,13 @@
 
 from flask import Flask
 from flask_cors import CORS
+import logging
 import os
+import pymongo
 
 # Importa tu base de datos Mongo (ya inicializada)
 from config import database
+from config.indexes import asegurar_indices
 
 # Importación de rutas organizadas (Blueprints)
 from routes.authRoutes import auth_bp
@@ -14,12 +17,42 @@ from routes.barberRoutes import barber_bp
 from routes.bookingRoutes import booking_bp
 from routes.reviewRoutes import review_bp
 from routes.penaltyRoutes import penalty_bp
+from routes.googlePlacesRoutes import google_places_bp
+from routes.dashboardRoutes import dashboard_bp
+from routes.streamRoutes import stream_bp
+from routes.uploadRoutes import upload_bp
 
 # Middleware para manejo de errores globales
 from middleware.errorHandler import register_error_handlers
 
+# Latencia por endpoint, tiempo en MongoDB y /metrics (Prometheus)
+from middleware.metrics import register_metrics
+
+# Serialización JSON de tipos BSON (ObjectId, datetime, Decimal128)
+from utils.json_provider import MongoJSONProvider
+
+# Comandos de mantenimiento (flask <comando>)
+from utils.commands import register_commands
+
+# Trabajos en segundo plano (cascadas de borrado, reconstrucciones, avisos)
+from utils.trabajos import register_trabajos
+
+# Tamaño máximo de subida (imagen + encabezados multipart)
+from utils.imagenes import UPLOAD_MAX_BYTES
+from middleware.uploadMiddleware import MARGEN_MULTIPART
+
+logger = logging.getLogger("cortate.app")
+
+# Segundos máximos que /healthz espera a MongoDB
+HEALTHZ_TIMEOUT = float(os.getenv("HEALTHZ_TIMEOUT", 2))
+
 # Configuración del entorno
 app = Flask(__name__, static_folder="../frontend/static", template_folder="../frontend/templates")
+app.json = MongoJSONProvider(app)
+# Tope de cualquier body: Werkzeug corta con 413 al leerlo, aunque venga
+# chunked o sin Content-Length (si no, el multipart se vuelca entero a
+# temporales antes de que la subida compare su tamaño)
+app.config["MAX_CONTENT_LENGTH"] = UPLOAD_MAX_BYTES + MARGEN_MULTIPART
 CORS(app)
 
 # Registrar rutas
@@ -29,20 +62,44 @@ app.register_blueprint(barber_bp, url_prefix="/api/barbers")
 app.register_blueprint(booking_bp, url_prefix="/api/bookings")
 app.register_blueprint(review_bp, url_prefix="/api/reviews")
 app.register_blueprint(penalty_bp, url_prefix="/api/penalties")
+app.register_blueprint(google_places_bp, url_prefix="/api/places")
+app.register_blueprint(dashboard_bp, url_prefix="/api")
+app.register_blueprint(stream_bp, url_prefix="/api/stream")
+app.register_blueprint(upload_bp, url_prefix="/uploads")
 
 # Middleware de errores
 register_error_handlers(app)
+register_metrics(app)
+register_commands(app)
+register_trabajos(app)
+
+# Índices de MongoDB (si la base no está disponible la app igual levanta)
+try:
+    asegurar_indices(database.db)
+except Exception as e:
+    logger.warning("No se pudieron crear los índices: %s", e)
 
 # Ruta raíz
 @app.route('/')
 def index():
     return {"mensaje": "¡Bienvenido a la API de Córtate.cl con MongoDB!"}
 
+# Readiness: la instancia sólo recibe tráfico si la base responde
+@app.route('/healthz')
+def healthz():
+    try:
+        with pymongo.timeout(HEALTHZ_TIMEOUT):
+            database.ping()
+    except Exception as e:
+        return {"estado": "error", "db": str(e)}, 503
+    return {"estado": "ok", "db": "ok", "pid": os.getpid(), "pool": database.estadisticas_pool()}
+
 # Ruta para servir la app
 @app.route('/<path:path>')
 def static_proxy(path):
     return app.send_static_file(path)
 
+# Servidor de desarrollo; en producción: gunicorn -c gunicorn.conf.py app:app
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(debug=True, host="0.0.0.0", port=port)
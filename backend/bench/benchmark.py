@@ -0,0 +1,265 @@
+# cortate/backend/bench/benchmark.py
+#
+# Benchmark de carga de la API: siembra datos, ejecuta cada escenario con
+# clientes concurrentes y reporta p50/p95/p99 y throughput. Falla (código 1)
+# si hay errores, rutas sin escenario o regresiones contra la línea base.
+#
+#   cd backend
+#   pip install -r bench/requirements.txt                # para --memoria
+#   python bench/benchmark.py --memoria                  # mongomock en proceso
+#   python bench/benchmark.py --mongo-uri mongodb://localhost:27017/
+#   python bench/benchmark.py --url http://localhost:8000 # servidor levantado
+#   python bench/benchmark.py --memoria --guardar-baseline
+#
+# bench/baseline.json es la línea base de `--memoria` con los volúmenes por
+# defecto: el peor valor de cada escenario en dos corridas, para que el ruido
+# de la máquina no cuente como regresión. Se regenera con --guardar-baseline
+# cuando cambia el hardware de CI o un cambio mejora los números a propósito.
+#
+# En modo --mongo-uri la base --db (por defecto cortate_bench) se borra al
+# empezar. En modo --url el servidor debe apuntar GOOGLE_PLACES_URL al stub
+# que levanta el benchmark (http://127.0.0.1:<--places-puerto>/).
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench import stubs
+from bench.escenarios import catalogo
+from bench.semilla import sembrar
+
+BASELINE_DEFAULT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Rutas que no son de la API, el stream SSE (una conexión larga, sin
+# latencia por request que medir) y las subidas de imágenes (multipart)
+ENDPOINTS_EXCLUIDOS = {"static", "static_proxy", "stream_bp.stream_controller.stream_barbero",
+                       "barber_bp.barber_controller.subir_imagen_barbero",
+                       "upload_bp.upload_controller.servir_archivo"}
+
+
+class ClienteLocal:
+    """
+    Requests WSGI en proceso con el test client de Flask (uno por hilo).
+    """
+
+    def __init__(self, app):
+        self._cliente = app.test_client()
+
+    def pedir(self, metodo, ruta, cuerpo=None, headers=None):
+        respuesta = self._cliente.open(ruta, method=metodo, json=cuerpo, headers=headers)
+        return respuesta.status_code, respuesta.get_data()
+
+    def json(self, metodo, ruta, cuerpo=None, headers=None):
+        status, datos = self.pedir(metodo, ruta, cuerpo, headers)
+        return status, json.loads(datos or b"null")
+
+
+class ClienteHttp(ClienteLocal):
+    """
+    Requests HTTP contra un servidor levantado (gunicorn), con keep-alive.
+    """
+
+    def __init__(self, url):
+        import requests
+
+        self._url = url.rstrip("/")
+        self._sesion = requests.Session()
+
+    def pedir(self, metodo, ruta, cuerpo=None, headers=None):
+        respuesta = self._sesion.request(metodo, self._url + ruta, json=cuerpo, headers=headers, timeout=30)
+        return respuesta.status_code, respuesta.content
+
+
+def _percentil(ordenadas, p):
+    # Nearest-rank sobre las latencias ordenadas
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, max(0, int(round(p / 100 * len(ordenadas))) - 1))]
+
+
+def ejecutar(escenario, fabrica_cliente, ctx, requests, calentamiento, concurrencia, semilla):
+    """
+    Corre `calentamiento` requests sin medir y luego las medidas repartidas
+    entre `concurrencia` hilos. Devuelve el resumen del escenario.
+    """
+    local = threading.local()
+    semillas = random.Random(f"{semilla}:{escenario.nombre}")
+    lock = threading.Lock()
+    errores = []
+
+    def una():
+        if not hasattr(local, "cliente"):
+            local.cliente = fabrica_cliente()
+            with lock:
+                local.rnd = random.Random(semillas.random())
+        metodo, ruta, cuerpo, headers = escenario.armar(ctx, local.rnd)
+        inicio = time.perf_counter()
+        status, _ = local.cliente.pedir(metodo, ruta, cuerpo, headers)
+        duracion = time.perf_counter() - inicio
+        if status not in escenario.esperado:
+            with lock:
+                errores.append(f"{metodo} {ruta} -> {status}")
+        return duracion
+
+    total = escenario.repeticiones(requests)
+    with ThreadPoolExecutor(max_workers=concurrencia) as ejecutor:
+        list(ejecutor.map(lambda _: una(), range(min(calentamiento, total))))
+        errores.clear()
+        inicio = time.perf_counter()
+        latencias = sorted(ejecutor.map(lambda _: una(), range(total)))
+        segundos = time.perf_counter() - inicio
+
+    return {
+        "requests": total,
+        "errores": len(errores),
+        "ejemplo_error": errores[0] if errores else None,
+        "p50_ms": round(_percentil(latencias, 50) * 1000, 3),
+        "p95_ms": round(_percentil(latencias, 95) * 1000, 3),
+        "p99_ms": round(_percentil(latencias, 99) * 1000, 3),
+        "rps": round(total / segundos, 1) if segundos else 0.0,
+    }
+
+
+def comparar(resultados, baseline, tolerancia, umbral_ms):
+    """
+    Regresiones contra la línea base: p95 más de `tolerancia` sobre el
+    guardado (y más de `umbral_ms` en absoluto, para ignorar ruido en rutas
+    de microsegundos) o throughput más de `tolerancia` bajo el guardado.
+    """
+    regresiones = []
+    for nombre, actual in resultados.items():
+        base = baseline.get(nombre)
+        if not base:
+            continue
+        p95_limite = base["p95_ms"] * (1 + tolerancia)
+        if actual["p95_ms"] > p95_limite and actual["p95_ms"] - base["p95_ms"] > umbral_ms:
+            regresiones.append(f"{nombre}: p95 {actual['p95_ms']} ms > {p95_limite:.3f} ms (base {base['p95_ms']})")
+        rps_limite = base["rps"] * (1 - tolerancia)
+        if actual["rps"] < rps_limite:
+            regresiones.append(f"{nombre}: {actual['rps']} req/s < {rps_limite:.1f} req/s (base {base['rps']})")
+    return regresiones
+
+
+def _imprimir(resultados):
+    print(f"\n{'escenario':<26}{'n':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<26}{r['requests']:>6}{r['errores']:>5}{r['p50_ms']:>10.2f}"
+              f"{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['rps']:>10.1f}")
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description="Benchmark de carga de la API de Córtate.cl")
+    modo = parser.add_mutually_exclusive_group(required=True)
+    modo.add_argument("--memoria", action="store_true", help="MongoDB en memoria (mongomock), app en proceso")
+    modo.add_argument("--mongo-uri", help="MongoDB local, app en proceso")
+    modo.add_argument("--url", help="Servidor HTTP ya levantado")
+    parser.add_argument("--db", default="cortate_bench", help="Base a usar con --mongo-uri (se borra)")
+    parser.add_argument("--barberos", type=int, default=200)
+    parser.add_argument("--usuarios", type=int, default=100)
+    parser.add_argument("--reservas", type=int, default=2000)
+    parser.add_argument("--resenas", type=int, default=2000)
+    parser.add_argument("--penalizaciones", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200, help="Requests medidas por escenario")
+    parser.add_argument("--calentamiento", type=int, default=10, help="Requests sin medir por escenario")
+    parser.add_argument("--concurrencia", type=int, default=8, help="Clientes concurrentes")
+    parser.add_argument("--requests-auth", type=int, default=10,
+                        help="Tope de requests de register/login/logout (hashean la contraseña)")
+    parser.add_argument("--solo", help="Prefijos de escenarios a correr, separados por coma (p. ej. barbers,bookings)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--places-puerto", type=int, default=8765)
+    parser.add_argument("--baseline", default=BASELINE_DEFAULT)
+    parser.add_argument("--guardar-baseline", action="store_true", help="Guarda los resultados como línea base")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Regresión permitida (0.25 = 25%%)")
+    parser.add_argument("--umbral-ms", type=float, default=2.0, help="Diferencia mínima de p95 para contar regresión")
+    return parser.parse_args()
+
+
+def _preparar_app(args):
+    # Las variables se leen al importar los módulos: van antes de importar la app
+    os.environ["GOOGLE_PLACES_URL"] = stubs.iniciar_stub_places()
+    os.environ.setdefault("GOOGLE_PLACES_API_KEY", "bench")
+    if args.memoria:
+        stubs.usar_mongo_en_memoria()
+    else:
+        if "bench" not in args.db:
+            raise SystemExit("Por seguridad la base de --db debe contener 'bench' (se borra)")
+        import pymongo
+
+        os.environ["MONGODB_URI"] = args.mongo_uri
+        os.environ["DB_NAME"] = args.db
+        pymongo.MongoClient(args.mongo_uri).drop_database(args.db)
+    from app import app
+
+    return app
+
+
+def main():
+    args = _argumentos()
+    if args.url:
+        print(f"Stub de Places en {stubs.iniciar_stub_places(args.places_puerto)}")
+        fabrica_cliente = lambda: ClienteHttp(args.url)
+        endpoints = None
+    else:
+        app = _preparar_app(args)
+        fabrica_cliente = lambda: ClienteLocal(app)
+        endpoints = {regla.endpoint for regla in app.url_map.iter_rules()} - ENDPOINTS_EXCLUIDOS
+
+    password = "bench-password"
+    escenarios = catalogo(password, args.requests_auth)
+    if args.solo:
+        prefijos = tuple(p.strip() for p in args.solo.split(","))
+        escenarios = [e for e in escenarios if e.nombre.startswith(prefijos)]
+
+    desechables = {}
+    for escenario in escenarios:
+        if escenario.pool:
+            total = escenario.repeticiones(args.requests) + min(args.calentamiento, escenario.repeticiones(args.requests))
+            desechables[escenario.pool] = desechables.get(escenario.pool, 0) + total
+    volumenes = {"barberos": args.barberos, "usuarios": args.usuarios, "reservas": args.reservas,
+                 "resenas": args.resenas, "penalizaciones": args.penalizaciones}
+
+    inicio = time.perf_counter()
+    ctx = sembrar(fabrica_cliente(), volumenes, desechables, random.Random(args.semilla), password)
+    print(f"Semilla: {volumenes} en {time.perf_counter() - inicio:.1f} s")
+
+    resultados = {}
+    for escenario in escenarios:
+        resultados[escenario.nombre] = ejecutar(escenario, fabrica_cliente, ctx, args.requests,
+                                                args.calentamiento, args.concurrencia, args.semilla)
+    _imprimir(resultados)
+
+    fallas = [f"{n}: {r['errores']} errores (p. ej. {r['ejemplo_error']})" for n, r in resultados.items() if r["errores"]]
+    if endpoints is not None and not args.solo:
+        sin_escenario = sorted(endpoints - {e.endpoint for e in escenarios})
+        if sin_escenario:
+            fallas.append(f"Rutas sin escenario: {', '.join(sin_escenario)}")
+
+    configuracion = {"modo": "url" if args.url else "memoria" if args.memoria else "mongo",
+                     "volumenes": volumenes, "concurrencia": args.concurrencia, "requests": args.requests}
+    if args.guardar_baseline:
+        with open(args.baseline, "w") as archivo:
+            json.dump({"configuracion": configuracion, "resultados": resultados}, archivo, indent=2, ensure_ascii=False)
+        print(f"\nLínea base guardada en {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as archivo:
+            baseline = json.load(archivo)
+        if baseline.get("configuracion") != configuracion:
+            print(f"\nAviso: la línea base se tomó con otra configuración: {baseline.get('configuracion')}")
+        fallas += comparar(resultados, baseline["resultados"], args.tolerancia, args.umbral_ms)
+
+    if fallas:
+        print("\nFALLÓ:")
+        for falla in fallas:
+            print(f"  - {falla}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
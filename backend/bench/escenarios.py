@@ -0,0 +1,226 @@
+# cortate/backend/bench/escenarios.py
+
+from bench import semilla
+
+
+class Escenario:
+    """
+    Una request repetible contra un endpoint. `ruta(ctx, rnd, dato)` y
+    `cuerpo(ctx, rnd, dato)` arman la request; `dato` viene del pool
+    desechable `pool` cuando el escenario consume ids (eliminar, logout).
+    `limite` acota las repeticiones de escenarios caros (hash de contraseñas).
+    """
+
+    def __init__(self, nombre, endpoint, metodo, ruta, cuerpo=None, esperado=(200,),
+                 autenticado=False, pool=None, limite=None):
+        self.nombre = nombre
+        self.endpoint = endpoint
+        self.metodo = metodo
+        self.ruta = ruta
+        self.cuerpo = cuerpo
+        self.esperado = esperado
+        self.autenticado = autenticado
+        self.pool = pool
+        self.limite = limite
+
+    def repeticiones(self, requests):
+        return min(requests, self.limite) if self.limite else requests
+
+    def armar(self, ctx, rnd):
+        dato = ctx.tomar(self.pool) if self.pool else None
+        headers = {}
+        if self.pool == "tokens":
+            headers["Authorization"] = f"Bearer {dato}"
+        elif self.autenticado:
+            headers["Authorization"] = f"Bearer {ctx.token}"
+        cuerpo = self.cuerpo(ctx, rnd, dato) if self.cuerpo else None
+        return self.metodo, self.ruta(ctx, rnd, dato), cuerpo, headers
+
+
+def _fijo(ruta):
+    return lambda ctx, rnd, dato: ruta
+
+
+def _ids(lista, rnd, n=20):
+    return ",".join(rnd.sample(lista, min(n, len(lista))))
+
+
+def _ubicacion(rnd):
+    return f"lat={-33.45 + rnd.uniform(-0.1, 0.1):.5f}&lng={-70.65 + rnd.uniform(-0.1, 0.1):.5f}"
+
+
+def _rango(ctx, rnd):
+    inicio = rnd.randrange(semilla.DIAS_AGENDA - 7)
+    return f"desde={ctx.fecha(inicio)}&hasta={ctx.fecha(inicio + 7)}"
+
+
+def _bp(blueprint, controlador, vista):
+    return f"{blueprint}.{controlador}.{vista}"
+
+
+def _usuarios(vista):
+    return _bp("user_bp", "user_controller", vista)
+
+
+def _barberos(vista):
+    return _bp("barber_bp", "barber_controller", vista)
+
+
+def _reservas(vista):
+    return _bp("booking_bp", "booking_controller", vista)
+
+
+def _resenas(vista):
+    return _bp("review_bp", "review_controller", vista)
+
+
+def _penalizaciones(vista):
+    return _bp("penalty_bp", "penalty_controller", vista)
+
+
+def _auth(vista):
+    return _bp("auth_bp", "auth_controller", vista)
+
+
+def _dashboard(vista):
+    return f"dashboard_bp.dashboard.{vista}"
+
+
+def _places(vista):
+    return f"google_places_bp.google_places_controller.{vista}"
+
+
+def _usuario_nuevo(ctx, rnd, dato, password=None):
+    n = ctx.siguiente()
+    datos = {"nombre": f"Nuevo {n}", "email": f"nuevo{n}-{rnd.getrandbits(32):x}@cortate.cl", "tipo": "cliente"}
+    if password:
+        datos["password"] = password
+    return datos
+
+
+def _reserva_nueva(ctx, rnd, dato):
+    # Fechas fuera de la agenda sembrada para que casi nunca choquen
+    reserva = semilla.reserva(rnd, ctx, rnd.choice(ctx.barberos), rnd.choice(ctx.clientes))
+    reserva["fecha"] = ctx.fecha(semilla.DIAS_AGENDA + rnd.randrange(365))
+    return reserva
+
+
+def catalogo(password, limite_auth):
+    """
+    Escenarios por blueprint; cubren todas las rutas de app.py salvo los
+    archivos estáticos.
+    """
+    return [
+        # General
+        Escenario("raiz", "index", "GET", _fijo("/")),
+        Escenario("healthz", "healthz", "GET", _fijo("/healthz")),
+        Escenario("metrics", "metrics", "GET", _fijo("/metrics")),
+
+        # Auth (register y login hashean: pocas repeticiones)
+        Escenario("auth.register", _auth("register"), "POST", _fijo("/api/auth/register"),
+                  lambda ctx, rnd, dato: _usuario_nuevo(ctx, rnd, dato, password), esperado=(201,), limite=limite_auth),
+        Escenario("auth.login", _auth("login"), "POST", _fijo("/api/auth/login"),
+                  lambda ctx, rnd, dato: {"email": ctx.email, "password": password}, limite=limite_auth),
+        Escenario("auth.me", _auth("me"), "GET", _fijo("/api/auth/me"), autenticado=True),
+        Escenario("auth.logout", _auth("logout"), "POST", _fijo("/api/auth/logout"),
+                  esperado=(204,), pool="tokens", limite=limite_auth),
+
+        # Usuarios
+        Escenario("users.all", _usuarios("listar_usuarios"), "GET", _fijo("/api/users/all")),
+        Escenario("users.get", _usuarios("obtener_usuario"), "GET",
+                  lambda ctx, rnd, dato: f"/api/users/{rnd.choice(ctx.usuarios)}"),
+        Escenario("users.batch", _usuarios("obtener_usuarios_lote"), "GET",
+                  lambda ctx, rnd, dato: f"/api/users/batch?ids={_ids(ctx.usuarios, rnd)}"),
+        Escenario("users.cache_stats", _usuarios("estadisticas_cache_usuarios"), "GET", _fijo("/api/users/cache/stats")),
+        Escenario("users.create", _usuarios("crear_usuario"), "POST", _fijo("/api/users/create"),
+                  _usuario_nuevo, esperado=(201,)),
+        Escenario("users.delete", _usuarios("eliminar_usuario"), "DELETE",
+                  lambda ctx, rnd, dato: f"/api/users/delete/{dato}", pool="usuarios", esperado=(204,)),
+
+        # Barberos
+        Escenario("barbers.all", _barberos("listar_barberos"), "GET", _fijo("/api/barbers/all")),
+        Escenario("barbers.all_rating", _barberos("listar_barberos"), "GET",
+                  _fijo("/api/barbers/all?sort=rating&fields=card")),
+        Escenario("barbers.get", _barberos("obtener_barbero"), "GET",
+                  lambda ctx, rnd, dato: f"/api/barbers/{rnd.choice(ctx.barberos)}"),
+        Escenario("barbers.batch", _barberos("obtener_barberos_lote"), "GET",
+                  lambda ctx, rnd, dato: f"/api/barbers/batch?ids={_ids(ctx.barberos, rnd)}"),
+        Escenario("barbers.nearby", _barberos("barberos_cercanos"), "GET",
+                  lambda ctx, rnd, dato: f"/api/barbers/nearby?{_ubicacion(rnd)}&radius_km=5"),
+        Escenario("barbers.clusters", _barberos("clusters_barberos"), "GET",
+                  lambda ctx, rnd, dato: f"/api/barbers/clusters?bbox=-70.8,-33.6,-70.5,-33.3&zoom={rnd.randint(9, 15)}"),
+        Escenario("barbers.search", _barberos("buscar_barberos"), "GET",
+                  lambda ctx, rnd, dato: f"/api/barbers/search?q={rnd.choice(semilla.SERVICIOS)}"),
+        Escenario("barbers.search_facetas", _barberos("buscar_barberos"), "GET",
+                  lambda ctx, rnd, dato: f"/api/barbers/search?tipo_atencion={rnd.choice(semilla.TIPOS_ATENCION)}"
+                                         f"&precio_corte_max=15000"),
+        Escenario("barbers.cache_stats", _barberos("estadisticas_cache_barberos"), "GET", _fijo("/api/barbers/cache/stats")),
+        Escenario("barbers.create", _barberos("crear_barbero"), "POST", _fijo("/api/barbers/create"),
+                  lambda ctx, rnd, dato: semilla.barbero(rnd, ctx.siguiente()), esperado=(201,)),
+        Escenario("barbers.bulk", _barberos("crear_barberos_lote"), "POST", _fijo("/api/barbers/bulk"),
+                  lambda ctx, rnd, dato: [semilla.barbero(rnd, ctx.siguiente()) for _ in range(10)], esperado=(201,)),
+        Escenario("barbers.update", _barberos("actualizar_barbero"), "PUT",
+                  lambda ctx, rnd, dato: f"/api/barbers/update/{rnd.choice(ctx.barberos)}",
+                  lambda ctx, rnd, dato: {"precio_corte": rnd.randrange(5000, 25000, 500)}),
+        Escenario("barbers.delete", _barberos("eliminar_barbero"), "DELETE",
+                  lambda ctx, rnd, dato: f"/api/barbers/delete/{dato}", pool="barberos", esperado=(204,)),
+
+        # Reservas
+        Escenario("bookings.all", _reservas("listar_reservas"), "GET", _fijo("/api/bookings/all")),
+        Escenario("bookings.availability", _reservas("disponibilidad_barbero"), "GET",
+                  lambda ctx, rnd, dato: f"/api/bookings/availability?barbero_id={rnd.choice(ctx.barberos)}&{_rango(ctx, rnd)}"),
+        Escenario("bookings.cliente", _reservas("reservas_cliente"), "GET",
+                  lambda ctx, rnd, dato: f"/api/bookings/cliente/{rnd.choice(ctx.clientes)}"),
+        Escenario("bookings.barbero", _reservas("reservas_barbero"), "GET",
+                  lambda ctx, rnd, dato: f"/api/bookings/barbero/{rnd.choice(ctx.barberos)}?{_rango(ctx, rnd)}"),
+        # Un choque de horario (409) es una respuesta válida de la API
+        Escenario("bookings.create", _reservas("crear_reserva"), "POST", _fijo("/api/bookings/create"),
+                  _reserva_nueva, esperado=(201, 409)),
+        Escenario("bookings.bulk", _reservas("crear_reservas_lote"), "POST", _fijo("/api/bookings/bulk"),
+                  lambda ctx, rnd, dato: [_reserva_nueva(ctx, rnd, dato) for _ in range(10)], esperado=(201, 207)),
+        Escenario("bookings.delete", _reservas("cancelar_reserva"), "DELETE",
+                  lambda ctx, rnd, dato: f"/api/bookings/delete/{dato}", pool="reservas", esperado=(204,)),
+
+        # Reseñas
+        Escenario("reviews.all", _resenas("listar_resenas"), "GET", _fijo("/api/reviews/all")),
+        Escenario("reviews.barbero", _resenas("resenas_barbero"), "GET",
+                  lambda ctx, rnd, dato: f"/api/reviews/barbero/{rnd.choice(ctx.barberos)}"),
+        Escenario("reviews.create", _resenas("crear_resena"), "POST", _fijo("/api/reviews/create"),
+                  lambda ctx, rnd, dato: semilla.resena(rnd, rnd.choice(ctx.barberos), rnd.choice(ctx.usuarios)),
+                  esperado=(201,)),
+        Escenario("reviews.bulk", _resenas("crear_resenas_lote"), "POST", _fijo("/api/reviews/bulk"),
+                  lambda ctx, rnd, dato: [semilla.resena(rnd, rnd.choice(ctx.barberos), rnd.choice(ctx.usuarios))
+                                          for _ in range(10)], esperado=(201,)),
+        Escenario("reviews.delete", _resenas("eliminar_resena"), "DELETE",
+                  lambda ctx, rnd, dato: f"/api/reviews/delete/{dato}", pool="resenas", esperado=(204,)),
+
+        # Penalizaciones
+        Escenario("penalties.all", _penalizaciones("listar_penalizaciones"), "GET", _fijo("/api/penalties/all")),
+        Escenario("penalties.user", _penalizaciones("obtener_penalizaciones_usuario"), "GET",
+                  lambda ctx, rnd, dato: f"/api/penalties/user/{rnd.choice(ctx.penalizados)}"),
+        Escenario("penalties.score", _penalizaciones("puntaje_usuario"), "GET",
+                  lambda ctx, rnd, dato: f"/api/penalties/score/{rnd.choice(ctx.penalizados)}"),
+        Escenario("penalties.create", _penalizaciones("crear_penalizacion"), "POST", _fijo("/api/penalties/create"),
+                  lambda ctx, rnd, dato: semilla.penalizacion(rnd, rnd.choice(ctx.penalizados)), esperado=(201,)),
+        Escenario("penalties.bulk", _penalizaciones("crear_penalizaciones_lote"), "POST", _fijo("/api/penalties/bulk"),
+                  lambda ctx, rnd, dato: [semilla.penalizacion(rnd, rnd.choice(ctx.penalizados)) for _ in range(10)],
+                  esperado=(201,)),
+        Escenario("penalties.delete", _penalizaciones("eliminar_penalizacion"), "DELETE",
+                  lambda ctx, rnd, dato: f"/api/penalties/delete/{dato}", pool="penalizaciones", esperado=(204,)),
+
+        # Dashboard
+        Escenario("dashboard.totales", _dashboard("ver_dashboard"), "GET",
+                  lambda ctx, rnd, dato: f"/api/dashboard/{rnd.choice(ctx.barberos)}"),
+        Escenario("dashboard.rango", _dashboard("ver_dashboard_rango"), "GET",
+                  lambda ctx, rnd, dato: f"/api/dashboard/{rnd.choice(ctx.barberos)}/rango?{_rango(ctx, rnd)}"
+                                         f"&granularidad=dia"),
+        Escenario("dashboard.ingreso", _dashboard("registrar_ingreso"), "POST", _fijo("/api/ingresos"),
+                  lambda ctx, rnd, dato: {"barbero_id": rnd.choice(ctx.barberos), "monto": rnd.randrange(5000, 30000, 500),
+                                          "fecha": ctx.fecha(rnd.randrange(semilla.DIAS_AGENDA))}, esperado=(201,)),
+
+        # Google Places (contra el stub)
+        Escenario("places.barberias", _places("buscar_barberias"), "GET",
+                  lambda ctx, rnd, dato: f"/api/places/barberias?location={-33.45 + rnd.uniform(-0.1, 0.1):.5f},"
+                                         f"{-70.65 + rnd.uniform(-0.1, 0.1):.5f}&radius=1500"),
+        Escenario("places.stats", _places("estadisticas_cache"), "GET", _fijo("/api/places/barberias/stats")),
+    ]
@@ -0,0 +1,133 @@
+# cortate/backend/bench/places.py
+#
+# Verifica el proxy de Google Places (/api/places/barberias) contra el stub
+# de bench/stubs.py: códigos ante fallas del upstream, qué se cachea, la
+# agrupación de llamadas concurrentes y el contador de llamadas upstream.
+# Falla (código 1) si algún caso no da lo esperado.
+#
+#   cd backend
+#   pip install -r bench/requirements.txt
+#   python bench/places.py
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench import stubs
+
+CONCURRENCIA = 20
+
+# (nombre, ruta del stub, status esperado, llamadas upstream por dos requests
+# iguales: 1 si la respuesta se cachea, 2 si no)
+CASOS = [
+    ("ok", "/", 200, 1),
+    ("sin_json", "/no-json", 502, 2),
+    ("json_no_objeto", "/lista", 502, 2),
+    ("error_upstream", "/error", 500, 2),
+    ("denegado", "/denegado", 200, 2),
+]
+
+
+def _preparar_app():
+    # Las variables se leen al importar los módulos: van antes de importar la app
+    os.environ.setdefault("GOOGLE_PLACES_API_KEY", "bench")
+    base = stubs.iniciar_stub_places().rstrip("/")
+    os.environ["GOOGLE_PLACES_URL"] = base + "/"
+    stubs.usar_mongo_en_memoria()
+    from app import app
+    from controllers import googlePlacesController
+
+    return app, googlePlacesController, base
+
+
+def _ubicacion(i):
+    # Una celda geohash distinta por caso, para no compartir caché
+    return f"{-33.0 - i * 0.05:.5f},-70.65000"
+
+
+def _estadisticas(cliente):
+    return cliente.get("/api/places/barberias/stats").get_json()
+
+
+def main():
+    app, places, base = _preparar_app()
+    cliente = app.test_client()
+    fallas = []
+
+    def verificar(nombre, condicion, detalle):
+        print(f"{'ok   ' if condicion else 'FALLA'} {nombre}: {detalle}")
+        if not condicion:
+            fallas.append(f"{nombre}: {detalle}")
+
+    for i, (nombre, ruta, esperado, llamadas) in enumerate(CASOS):
+        places.GOOGLE_PLACES_URL = base + ruta
+        antes = stubs.recibidas[ruta]
+        statuses = [cliente.get(f"/api/places/barberias?location={_ubicacion(i)}").status_code for _ in range(2)]
+        recibidas = stubs.recibidas[ruta] - antes
+        verificar(nombre, statuses == [esperado] * 2 and recibidas == llamadas,
+                  f"status {statuses} (esperado {esperado}), {recibidas} llamadas upstream (esperadas {llamadas})")
+
+    # Parámetros inválidos: 400 sin llamar al upstream
+    places.GOOGLE_PLACES_URL = base + "/"
+    antes = sum(stubs.recibidas.values())
+    for consulta in ("location=nan,-70.65", "location=-33.4,inf", "location=91,0",
+                     "location=-33.4,-70.65&radius=inf", "location=-33.4,-70.65&radius=0",
+                     "location=-33.4,-70.65&radius=-5", "location=-33.4,-70.65&radius=1e400"):
+        status = cliente.get(f"/api/places/barberias?{consulta}").status_code
+        verificar(f"invalido {consulta}", status == 400, f"status {status} (esperado 400)")
+    recibidas = sum(stubs.recibidas.values()) - antes
+    verificar("invalidos sin upstream", recibidas == 0, f"{recibidas} llamadas upstream (esperadas 0)")
+
+    # Timeout del upstream
+    places.GOOGLE_PLACES_URL = base + "/lento"
+    timeout, places.PLACES_TIMEOUT = places.PLACES_TIMEOUT, stubs.STUB_DEMORA_S / 3
+    try:
+        status = cliente.get(f"/api/places/barberias?location={_ubicacion(len(CASOS))}").status_code
+    finally:
+        places.PLACES_TIMEOUT = timeout
+    verificar("timeout", status == 504, f"status {status} (esperado 504)")
+
+    # Misma clave en paralelo: una sola llamada y el resto agrupadas
+    barrera = threading.Barrier(CONCURRENCIA)
+    ubicacion = _ubicacion(len(CASOS) + 1)
+
+    def pedir(_):
+        barrera.wait()
+        return app.test_client().get(f"/api/places/barberias?location={ubicacion}").status_code
+
+    antes, estadisticas = stubs.recibidas["/lento"], _estadisticas(cliente)
+    with ThreadPoolExecutor(CONCURRENCIA) as pool:
+        statuses = list(pool.map(pedir, range(CONCURRENCIA)))
+    recibidas = stubs.recibidas["/lento"] - antes
+    agrupadas = _estadisticas(cliente)["llamadas_agrupadas"] - estadisticas["llamadas_agrupadas"]
+    verificar("agrupadas", set(statuses) == {200} and recibidas == 1 and agrupadas == CONCURRENCIA - 1,
+              f"status {sorted(set(statuses))}, {recibidas} llamadas upstream, {agrupadas} agrupadas")
+
+    # Claves distintas en paralelo: el contador de la app coincide con el stub
+    places.GOOGLE_PLACES_URL = base + "/"
+    total_stub = lambda: sum(stubs.recibidas.values())
+    antes_stub, antes_app = total_stub(), _estadisticas(cliente)["llamadas_upstream"]
+
+    def pedir_distinta(i):
+        return app.test_client().get(f"/api/places/barberias?location={_ubicacion(100 + i)}").status_code
+
+    with ThreadPoolExecutor(CONCURRENCIA) as pool:
+        statuses = list(pool.map(pedir_distinta, range(CONCURRENCIA * 5)))
+    recibidas = total_stub() - antes_stub
+    contadas = _estadisticas(cliente)["llamadas_upstream"] - antes_app
+    verificar("contador", set(statuses) == {200} and recibidas == contadas == CONCURRENCIA * 5,
+              f"{contadas} contadas por la app, {recibidas} recibidas por el stub")
+
+    if fallas:
+        print("\nFALLÓ:")
+        for falla in fallas:
+            print(f"  - {falla}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
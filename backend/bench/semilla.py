@@ -0,0 +1,152 @@
+# cortate/backend/bench/semilla.py
+
+import collections
+import itertools
+from datetime import date, timedelta
+
+# Tamaño de cada POST /bulk (BULK_MAX de utils/bulk.py)
+LOTE = 1000
+SERVICIOS = ["corte", "barba", "fade", "degradado", "afeitado", "perfilado", "tinte", "corte infantil"]
+ADJETIVOS = ["Clásica", "Moderna", "Express", "Premium", "del Barrio", "Urbana", "Vintage"]
+TIPOS_ATENCION = ["local", "domicilio", "mixto"]
+HORAS = [f"{h:02d}:{m:02d}" for h in range(9, 20) for m in (0, 30)]
+# Rango de fechas de las reservas sembradas, desde hoy
+DIAS_AGENDA = 30
+
+
+class Contexto:
+    """
+    Ids y datos sembrados que usan los escenarios. Los pools 'desechables'
+    se consumen (eliminar, logout) y traen uno por request planificada.
+    """
+
+    def __init__(self):
+        self.usuarios = []
+        self.barberos = []
+        self.reservas = []
+        self.resenas = []
+        self.penalizaciones = []
+        self.penalizados = []
+        self.clientes = []
+        self.email = None
+        self.token = None
+        self.desechables = collections.defaultdict(collections.deque)
+        self.hoy = date.today()
+        self._secuencia = itertools.count(1)
+
+    def fecha(self, dias):
+        return (self.hoy + timedelta(days=dias)).isoformat()
+
+    def siguiente(self):
+        # Sufijo único para emails y horarios de escenarios que crean datos
+        return next(self._secuencia)
+
+    def tomar(self, pool):
+        try:
+            return self.desechables[pool].popleft()
+        except IndexError:
+            raise RuntimeError(f"Se agotó el pool '{pool}'; sube el tamaño de la semilla")
+
+
+def _exigir(status, cuerpo, ruta, esperados=(200, 201)):
+    if status not in esperados:
+        raise RuntimeError(f"La semilla falló en {ruta}: {status} {cuerpo[:200]!r}")
+
+
+def _bulk(cliente, ruta, documentos):
+    ids = []
+    for i in range(0, len(documentos), LOTE):
+        status, cuerpo = cliente.json("POST", ruta, documentos[i:i + LOTE])
+        _exigir(status, cuerpo.get("error", "") if isinstance(cuerpo, dict) else "", ruta, (201, 207))
+        ids += cuerpo["ids"]
+    return ids
+
+
+def _usuario(cliente, rnd, n, password=None):
+    datos = {"nombre": f"Cliente {n}", "email": f"bench{n}-{rnd.getrandbits(32):x}@cortate.cl",
+             "telefono": f"+569{rnd.randint(10000000, 99999999)}", "tipo": "cliente"}
+    if password:
+        status, cuerpo = cliente.json("POST", "/api/auth/register", {**datos, "password": password})
+        _exigir(status, str(cuerpo), "/api/auth/register")
+        return cuerpo["usuario"]["_id"], datos["email"]
+    status, cuerpo = cliente.json("POST", "/api/users/create", datos)
+    _exigir(status, str(cuerpo), "/api/users/create")
+    return cuerpo["_id"], datos["email"]
+
+
+def barbero(rnd, n):
+    return {
+        "nombre": f"Barbería {rnd.choice(ADJETIVOS)} {n}",
+        "servicios": rnd.sample(SERVICIOS, rnd.randint(1, 4)),
+        "descripcion": f"Cortes y {rnd.choice(SERVICIOS)} en {rnd.choice(['Providencia', 'Ñuñoa', 'Santiago', 'Las Condes'])}",
+        "tipo_atencion": rnd.choice(TIPOS_ATENCION),
+        "precio_corte": rnd.randrange(5000, 25000, 500),
+        "precio_barba": rnd.randrange(3000, 15000, 500),
+        # Alrededor de Santiago
+        "lat": -33.45 + rnd.uniform(-0.15, 0.15),
+        "lng": -70.65 + rnd.uniform(-0.15, 0.15),
+    }
+
+
+def reserva(rnd, ctx, barbero_id, cliente_id):
+    return {"barbero_id": barbero_id, "cliente_id": cliente_id,
+            "fecha": ctx.fecha(rnd.randrange(DIAS_AGENDA)), "hora": rnd.choice(HORAS), "estado": "confirmada"}
+
+
+def resena(rnd, barbero_id, cliente_id):
+    return {"barbero_id": barbero_id, "cliente_id": cliente_id,
+            "puntuacion": rnd.randint(1, 5), "comentario": rnd.choice(["Excelente", "Bien", "Puntual", "Regular"])}
+
+
+def penalizacion(rnd, usuario_id):
+    return {"usuario_id": usuario_id, "tipo": rnd.choice(["atraso", "ausencia", "rechazo_reserva"]),
+            "puntos": rnd.randint(1, 3)}
+
+
+def sembrar(cliente, volumenes, desechables, rnd, password):
+    """
+    Siembra los datos a través de la API (los /bulk mantienen ratings,
+    buckets, disponibilidad y puntajes) y devuelve el Contexto.
+    `desechables` es {pool: cantidad} para los escenarios que consumen ids.
+    """
+    ctx = Contexto()
+    total_usuarios = volumenes["usuarios"] + desechables.get("usuarios", 0)
+    for n in range(total_usuarios):
+        ctx.usuarios.append(_usuario(cliente, rnd, n)[0])
+    ctx.desechables["usuarios"].extend(ctx.usuarios[volumenes["usuarios"]:])
+    del ctx.usuarios[volumenes["usuarios"]:]
+
+    barberos = [barbero(rnd, n) for n in range(volumenes["barberos"] + desechables.get("barberos", 0))]
+    ids = _bulk(cliente, "/api/barbers/bulk", barberos)
+    ctx.barberos = ids[:volumenes["barberos"]]
+    ctx.desechables["barberos"].extend(ids[volumenes["barberos"]:])
+
+    # Las penalizaciones caen sobre la primera mitad de los usuarios; las
+    # reservas nuevas usan la segunda para no chocar con el bloqueo
+    mitad = max(1, len(ctx.usuarios) // 2)
+    ctx.penalizados, ctx.clientes = ctx.usuarios[:mitad], ctx.usuarios[mitad:] or ctx.usuarios
+
+    for nombre, ruta, fabricar in (
+        ("reservas", "/api/bookings/bulk", lambda: reserva(rnd, ctx, rnd.choice(ctx.barberos), rnd.choice(ctx.clientes))),
+        ("resenas", "/api/reviews/bulk", lambda: resena(rnd, rnd.choice(ctx.barberos), rnd.choice(ctx.usuarios))),
+        ("penalizaciones", "/api/penalties/bulk", lambda: penalizacion(rnd, rnd.choice(ctx.penalizados))),
+    ):
+        cantidad = desechables.get(nombre, 0)
+        ids = _bulk(cliente, ruta, [fabricar() for _ in range(volumenes[nombre] + cantidad)])
+        ctx.desechables[nombre].extend(ids[:cantidad])
+        setattr(ctx, nombre, ids[cantidad:])
+
+    # Usuario con contraseña para los escenarios autenticados y uno por logout
+    _, email = _usuario(cliente, rnd, "auth", password)
+    ctx.email = email
+    for n in range(desechables.get("tokens", 0)):
+        _, email_desechable = _usuario(cliente, rnd, f"logout{n}", password)
+        ctx.desechables["tokens"].append(login(cliente, email_desechable, password))
+    ctx.token = login(cliente, email, password)
+    return ctx
+
+
+def login(cliente, email, password):
+    status, cuerpo = cliente.json("POST", "/api/auth/login", {"email": email, "password": password})
+    _exigir(status, str(cuerpo), "/api/auth/login")
+    return cuerpo["token"]
@@ -0,0 +1,125 @@
+# cortate/backend/bench/stubs.py
+
+import collections
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Respuesta fija de la API de Google Places para el stub
+RESPUESTA_PLACES = {
+    "status": "OK",
+    "results": [
+        {"place_id": f"stub-{i}", "name": f"Barbería {i}", "vicinity": "Santiago",
+         "geometry": {"location": {"lat": -33.44 + i / 1000, "lng": -70.65 + i / 1000}}}
+        for i in range(10)
+    ],
+}
+
+
+# Fallas del upstream por ruta (GOOGLE_PLACES_URL=<stub>/<ruta>); cualquier
+# otra ruta responde RESPUESTA_PLACES
+FALLAS_PLACES = {
+    "/no-json": (200, "text/html", b"<html><body>502 Bad Gateway</body></html>"),
+    "/lista": (200, "application/json", b"[]"),
+    "/error": (500, "application/json", b'{"error": "interno"}'),
+    "/denegado": (200, "application/json", b'{"status": "REQUEST_DENIED", "results": []}'),
+}
+# '/lento' responde RESPUESTA_PLACES tras esta demora
+STUB_DEMORA_S = 0.3
+
+# Requests recibidas por ruta, para comparar con las llamadas que cuenta la app
+recibidas = collections.Counter()
+_recibidas_lock = threading.Lock()
+
+
+class _ManejadorPlaces(BaseHTTPRequestHandler):
+    def do_GET(self):
+        ruta = urlsplit(self.path).path
+        with _recibidas_lock:
+            recibidas[ruta] += 1
+        if ruta == "/lento":
+            time.sleep(STUB_DEMORA_S)
+        status, tipo, cuerpo = FALLAS_PLACES.get(ruta, (200, "application/json", None))
+        if cuerpo is None:
+            cuerpo = json.dumps(RESPUESTA_PLACES).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente cortó por timeout
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def iniciar_stub_places(puerto=0):
+    """
+    Levanta un servidor HTTP local que imita Places en un hilo daemon y
+    devuelve su URL. La app lo usa vía GOOGLE_PLACES_URL.
+    """
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), _ManejadorPlaces)
+    threading.Thread(target=servidor.serve_forever, daemon=True, name="stub-places").start()
+    return f"http://127.0.0.1:{servidor.server_address[1]}/"
+
+
+def usar_mongo_en_memoria():
+    """
+    Reemplaza MongoClient por mongomock antes de importar la app. mongomock
+    no implementa $bit (disponibilidad), $text ni $geoNear: $bit se emula
+    con lectura + $set y búsqueda y cercanía usan los índices en memoria.
+    Los upserts se serializan y no se compara la deriva de índices.
+    """
+    try:
+        import mongomock
+        import mongomock.collection
+    except ImportError:
+        raise SystemExit("El modo en memoria requiere mongomock (pip install mongomock)")
+    import pymongo
+
+    pymongo.MongoClient = mongomock.MongoClient
+    # mongomock no se conecta, pero valida la URI
+    os.environ["MONGODB_URI"] = "mongodb://localhost:27017/"
+    os.environ.setdefault("GEO_BACKEND", "memoria")
+    os.environ.setdefault("BUSQUEDA_BACKEND", "memoria")
+    # Sin secundarios ni explain en memoria
+    os.environ.setdefault("DB_LECTURA_SECUNDARIA", "0")
+    os.environ.setdefault("SLOW_QUERY_EXPLAIN", "0")
+    # mongomock no tiene change streams
+    os.environ.setdefault("EVENTOS_FUENTE", "local")
+
+    # Su check de índices ignora partialFilterExpression y los de texto:
+    # reportaría deriva que no existe
+    os.environ.setdefault("INDICES_DERIVA", "0")
+
+    actualizar = mongomock.collection.Collection._update
+    lock = threading.RLock()
+
+    def _update(self, spec, document, *args, **kwargs):
+        if not isinstance(document, dict) or "$bit" not in document:
+            if not kwargs.get("upsert", args[0] if args else False):
+                return actualizar(self, spec, document, *args, **kwargs)
+            # mongomock busca e inserta sin atomicidad: dos upserts
+            # concurrentes del mismo _id chocan aunque MongoDB no lo haría
+            with lock:
+                return actualizar(self, spec, document, *args, **kwargs)
+        document = dict(document)
+        operaciones = document.pop("$bit")
+        with lock:
+            actual = self.find_one(spec) or {}
+            valores = {}
+            for campo, ops in operaciones.items():
+                valor = int(actual.get(campo, 0))
+                for op, mascara in ops.items():
+                    valor = valor | int(mascara) if op == "or" else valor & int(mascara) if op == "and" else valor ^ int(mascara)
+                valores[campo] = valor
+            document.setdefault("$set", {}).update(valores)
+            return actualizar(self, spec, document, *args, **kwargs)
+
+    mongomock.collection.Collection._update = _update
@@ -1,6 +1,10 @@
 import os
+import threading
+from flask import g, has_request_context
 from pymongo import MongoClient
+from pymongo.read_preferences import SecondaryPreferred
 from dotenv import load_dotenv
+from config.monitoring import ListenerComandos, ListenerConsultasLentas, ListenerPool
 
 # Carga variables de entorno desde .env si estás en local
 load_dotenv()
@@ -9,9 +13,182 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
 DB_NAME = os.getenv("DB_NAME", "cortate_cl")
 
-# Inicializa el cliente de MongoDB
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
+# Comandos más lentos que SLOW_QUERY_MS se registran en el log con su plan
+listener_consultas_lentas = ListenerConsultasLentas(
+    umbral_ms=float(os.getenv("SLOW_QUERY_MS", 100)),
+    explain=os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1",
+)
+
+
+# Pool de conexiones y timeouts (milisegundos). Con gunicorn el máximo es
+# por worker: workers x DB_MAX_POOL_SIZE no debe superar el límite del cluster
+OPCIONES_CLIENTE = {
+    "maxPoolSize": int(os.getenv("DB_MAX_POOL_SIZE", 50)),
+    "minPoolSize": int(os.getenv("DB_MIN_POOL_SIZE", 0)),
+    "maxIdleTimeMS": int(os.getenv("DB_MAX_IDLE_TIME", 30000)),
+    # Cuánto espera un hilo por una conexión libre antes de fallar
+    "waitQueueTimeoutMS": int(os.getenv("DB_WAIT_QUEUE_TIMEOUT", 2000)),
+    "serverSelectionTimeoutMS": int(os.getenv("DB_SERVER_SELECTION_TIMEOUT", 5000)),
+    "socketTimeoutMS": int(os.getenv("DB_SOCKET_TIMEOUT", 45000)),
+    "connectTimeoutMS": int(os.getenv("DB_CONNECT_TIMEOUT", 10000)),
+}
+
+# Lecturas que toleran datos algo atrasados (listados, búsqueda, dashboard)
+# van a secundarios con a lo más DB_MAX_STALENESS_S segundos de retraso
+# (MongoDB exige >= 90). Las escrituras y lecturas por id siguen en el primario
+LECTURA_SECUNDARIA = os.getenv("DB_LECTURA_SECUNDARIA", "1") == "1"
+MAX_STALENESS_S = int(os.getenv("DB_MAX_STALENESS_S", 90))
+PREFERENCIA_SECUNDARIA = SecondaryPreferred(max_staleness=MAX_STALENESS_S)
+
+listener_pool = ListenerPool()
+# Tiempo y cantidad de comandos por request y por colección (/metrics)
+listener_comandos = ListenerComandos()
+
+
+class _ClientePorProceso:
+    """
+    Crea el MongoClient la primera vez que se usa en cada proceso. MongoClient
+    no es seguro tras un fork: con gunicorn --preload el proceso maestro importa
+    la app y cada worker debe abrir su propio cliente (hilos de monitoreo y
+    sockets incluidos) después del fork.
+    """
+
+    def __init__(self):
+        self._pid = None
+        self._cliente = None
+        self._colecciones = {}
+        self._lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reiniciar)
+
+    def _reiniciar(self):
+        # En el hijo el cliente heredado no se usa ni se cierra (sus hilos no existen)
+        self._pid = None
+        self._cliente = None
+        self._colecciones = {}
+        self._lock = threading.Lock()
+
+    def cliente(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._cliente = MongoClient(
+                        MONGO_URI,
+                        event_listeners=[listener_consultas_lentas, listener_pool, listener_comandos],
+                        **OPCIONES_CLIENTE,
+                    )
+                    self._colecciones = {}
+                    listener_consultas_lentas.cliente = self._cliente
+                    self._pid = os.getpid()
+        return self._cliente
+
+    def coleccion(self, nombre, secundaria=False):
+        cliente = self.cliente()
+        coleccion = self._colecciones.get((nombre, secundaria))
+        if coleccion is None:
+            coleccion = cliente[DB_NAME][nombre]
+            if secundaria:
+                coleccion = coleccion.with_options(read_preference=PREFERENCIA_SECUNDARIA)
+            self._colecciones[(nombre, secundaria)] = coleccion
+        return coleccion
+
+    def cerrar(self):
+        """
+        Cierra el cliente del proceso actual (p. ej. en el maestro de gunicorn
+        antes de crear los workers).
+        """
+        with self._lock:
+            if self._cliente is not None and self._pid == os.getpid():
+                self._cliente.close()
+            self._pid = None
+            self._cliente = None
+            self._colecciones = {}
+
+
+def _lectura_primaria_requerida():
+    # get_condicional marca la request cuando los datos cambiaron hace menos
+    # de MAX_STALENESS_S: un secundario atrasado daría un cuerpo viejo con un
+    # ETag nuevo, que el cliente conservaría hasta el próximo cambio
+    return has_request_context() and g.get("lectura_primaria", False)
+
+
+class _ColeccionPerezosa:
+    """
+    Se comporta como una Collection de pymongo, pero la resuelve en cada uso
+    contra el cliente del proceso actual. Con secundaria=True las lecturas
+    usan secondaryPreferred.
+    """
+
+    def __init__(self, nombre, secundaria=False):
+        self.name = nombre
+        self.secundaria = secundaria
+
+    def _resolver(self):
+        secundaria = self.secundaria and LECTURA_SECUNDARIA and not _lectura_primaria_requerida()
+        return _clientes.coleccion(self.name, secundaria)
+
+    def __getattr__(self, atributo):
+        return getattr(self._resolver(), atributo)
+
+    def __getitem__(self, subcoleccion):
+        return self._resolver()[subcoleccion]
+
+    def __repr__(self):
+        return f"<ColeccionPerezosa {DB_NAME}.{self.name}{' (secundaria)' if self.secundaria else ''}>"
+
+
+class _BaseDatosPerezosa:
+    """
+    Equivalente perezoso de client[DB_NAME]: db["coleccion"] y db.command(...).
+    """
+
+    name = DB_NAME
+
+    def __getitem__(self, nombre):
+        return _ColeccionPerezosa(nombre)
+
+    def __getattr__(self, atributo):
+        return getattr(_clientes.cliente()[DB_NAME], atributo)
+
+
+_clientes = _ClientePorProceso()
+db = _BaseDatosPerezosa()
+
+
+def obtener_cliente():
+    """
+    MongoClient del proceso actual (se crea al primer uso).
+    """
+    return _clientes.cliente()
+
+
+def cerrar_cliente():
+    _clientes.cerrar()
+
+
+def lectura(coleccion):
+    """
+    Versión de la colección para lecturas que toleran retraso acotado
+    (secondaryPreferred): lectura(barbers_collection).find(...).
+    """
+    return _ColeccionPerezosa(coleccion.name, secundaria=True)
+
+
+def estadisticas_pool():
+    return {
+        **listener_pool.estadisticas(),
+        "max_pool": OPCIONES_CLIENTE["maxPoolSize"],
+        "lectura_secundaria": LECTURA_SECUNDARIA,
+        "max_staleness_s": MAX_STALENESS_S,
+    }
+
+
+def ping():
+    """
+    Verifica que la base responda; lanza la excepción de pymongo si no.
+    """
+    return _clientes.cliente().admin.command("ping")
+
 
 # Colecciones principales
 usuarios_collection = db["usuarios"]
@@ -19,9 +196,22 @@ barberos_collection = db["barberos"]
 reservas_collection = db["reservas"]
 reseñas_collection = db["reseñas"]
 penalizaciones_collection = db["penalizaciones"]
+ingresos_collection = db["ingresos"]
+dashboard_collection = db["dashboard_buckets"]
+disponibilidad_collection = db["disponibilidad"]
+versiones_collection = db["versiones"]
+tokens_revocados_collection = db["tokens_revocados"]
+puntajes_collection = db["puntajes_penalizacion"]
+trabajos_collection = db["trabajos"]
+imagenes_collection = db["imagenes"]
 
 # Alias en inglés (si los controladores usan este nombre)
 users_collection = usuarios_collection
+barbers_collection = barberos_collection
+bookings_collection = reservas_collection
+reviews_collection = reseñas_collection
+penalties_collection = penalizaciones_collection
+revenues_collection = ingresos_collection
 
 # Secreto JWT (opcionalmente usado en autenticación)
 JWT_SECRET = os.getenv("JWT_SECRET", "default_secret")
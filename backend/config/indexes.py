@@ -0,0 +1,155 @@
+# cortate/backend/config/indexes.py
+
+import logging
+import os
+from pymongo import IndexModel, ASCENDING, DESCENDING, GEOSPHERE, TEXT
+
+logger = logging.getLogger(__name__)
+
+# Registro declarativo de índices por colección. Cada consulta de los
+# controladores debería estar cubierta por alguno de estos índices.
+INDICES = {
+    "usuarios": [
+        # Login por email; sólo aplica a documentos con email
+        IndexModel([("email", ASCENDING)], name="email_unico", unique=True,
+                   partialFilterExpression={"email": {"$type": "string"}}),
+    ],
+    "reservas": [
+        # Agenda por barbero / cliente: igualdad + orden (fecha, hora, _id) sin sort en memoria
+        IndexModel([("barbero_id", ASCENDING), ("fecha", ASCENDING), ("hora", ASCENDING), ("_id", ASCENDING)],
+                   name="agenda_barbero"),
+        IndexModel([("cliente_id", ASCENDING), ("fecha", ASCENDING), ("hora", ASCENDING), ("_id", ASCENDING)],
+                   name="agenda_cliente"),
+        # Un solo cliente por bloque: sólo cuentan las reservas vivas (slot_activo)
+        IndexModel([("barbero_id", ASCENDING), ("fecha", ASCENDING), ("hora", ASCENDING)],
+                   name="slot_unico", unique=True, partialFilterExpression={"slot_activo": True}),
+    ],
+    "barberos": [
+        # Búsqueda de barberos cercanos ($geoNear)
+        IndexModel([("ubicacion", GEOSPHERE)], name="ubicacion_2dsphere"),
+        # Listado de barberos ordenado por rating
+        IndexModel([("rating_avg", DESCENDING), ("rating_count", DESCENDING), ("_id", ASCENDING)],
+                   name="ranking_rating"),
+        # Búsqueda de texto (/search); en español y sin distinguir tildes
+        IndexModel([("nombre", TEXT), ("servicios", TEXT), ("descripcion", TEXT)],
+                   name="busqueda_texto", default_language="spanish",
+                   weights={"nombre": 10, "servicios": 5, "descripcion": 1}),
+        # Barberos que usan una imagen, para completar sus variantes al generarlas
+        IndexModel([("fotos.id", ASCENDING)], name="fotos_imagen"),
+    ],
+    "reseñas": [
+        IndexModel([("barbero_id", ASCENDING), ("_id", ASCENDING)], name="resenas_barbero"),
+    ],
+    "penalizaciones": [
+        IndexModel([("usuario_id", ASCENDING), ("generado_en", ASCENDING)], name="penalizaciones_usuario"),
+    ],
+    "ingresos": [
+        IndexModel([("barbero_id", ASCENDING), ("fecha", ASCENDING)], name="ingresos_barbero"),
+    ],
+    "tokens_revocados": [
+        # MongoDB borra cada revocación cuando el token ya venció por sí solo
+        IndexModel([("expira_en", ASCENDING)], name="tokens_revocados_ttl", expireAfterSeconds=0),
+        # Sincronización de revocaciones entre workers (middleware/auth.py)
+        IndexModel([("revocado_en", ASCENDING)], name="tokens_revocados_recientes", sparse=True),
+    ],
+    "dashboard_buckets": [
+        # Serie por barbero y granularidad
+        IndexModel([("barbero_id", ASCENDING), ("granularidad", ASCENDING), ("periodo", ASCENDING)],
+                   name="buckets_barbero"),
+    ],
+    "trabajos": [
+        # Trabajos pendientes ya disponibles, en orden (recolector de utils/trabajos.py)
+        IndexModel([("estado", ASCENDING), ("disponible_en", ASCENDING)], name="trabajos_pendientes"),
+        # Los trabajos terminados se borran solos tras TRABAJOS_RETENCION_DIAS
+        IndexModel([("finalizado_en", ASCENDING)], name="trabajos_ttl",
+                   expireAfterSeconds=int(os.getenv("TRABAJOS_RETENCION_DIAS", 7)) * 86400),
+    ],
+}
+
+def _normalizar_reservas():
+    # Importación diferida: utils.disponibilidad usa config.database
+    from utils.disponibilidad import normalizar_reservas
+    normalizadas, conflictos = normalizar_reservas()
+    if normalizadas:
+        logger.warning("Reservas normalizadas antes de crear slot_unico: %s (%s en conflicto)",
+                       normalizadas, conflictos)
+
+
+# Pasos previos a crear un índice que los datos existentes podrían violar;
+# sólo corren mientras el índice todavía no existe
+PREPARACIONES = {
+    "reservas": [("slot_unico", _normalizar_reservas)],
+}
+
+# 0 omite la comparación de índices al arrancar (p. ej. con mongomock)
+INDICES_DERIVA = os.getenv("INDICES_DERIVA", "1") == "1"
+
+# Opciones que se comparan para detectar diferencias entre lo declarado y lo existente
+OPCIONES_COMPARADAS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds",
+                       "weights", "default_language")
+
+
+def _firma(especificacion):
+    claves = especificacion["key"]
+    if hasattr(claves, "items"):
+        claves = claves.items()
+    # El servidor puede devolver 1.0 donde se declaró 1
+    claves = [(campo, orden if isinstance(orden, str) else int(orden)) for campo, orden in claves]
+    # Los índices de texto existen como {_fts, _ftsx}: se comparan por sus campos
+    if especificacion.get("weights"):
+        claves = [(c, o) for c, o in claves if o != "text" and c not in ("_fts", "_ftsx")]
+        claves += [(campo, "text") for campo in sorted(especificacion["weights"])]
+    opciones = {k: especificacion[k] for k in OPCIONES_COMPARADAS if especificacion.get(k) is not None}
+    if "weights" in opciones:
+        opciones["weights"] = {campo: int(peso) for campo, peso in opciones["weights"].items()}
+    # unique=False equivale a no declararlo
+    if opciones.get("unique") is False:
+        del opciones["unique"]
+    return claves, opciones
+
+
+def detectar_deriva(db):
+    """
+    Compara los índices declarados con los existentes. Devuelve, por colección,
+    los índices faltantes, los que difieren en claves u opciones y los que
+    existen en la base pero no están declarados.
+    """
+    reporte = {}
+    for coleccion, modelos in INDICES.items():
+        existentes = db[coleccion].index_information()
+        declarados = {m.document["name"]: m.document for m in modelos}
+        faltantes, distintos = [], []
+        for nombre, especificacion in declarados.items():
+            if nombre not in existentes:
+                faltantes.append(nombre)
+            elif _firma(especificacion) != _firma(existentes[nombre]):
+                distintos.append(nombre)
+        sobrantes = [n for n in existentes if n != "_id_" and n not in declarados]
+        if faltantes or distintos or sobrantes:
+            reporte[coleccion] = {"faltantes": faltantes, "distintos": distintos, "sobrantes": sobrantes}
+    return reporte
+
+
+def asegurar_indices(db):
+    """
+    Crea los índices declarados (create_indexes es idempotente) y registra en
+    el log cualquier deriva que quede, p. ej. un índice con el mismo nombre
+    pero distintas opciones, que MongoDB no reemplaza solo.
+    """
+    for coleccion, modelos in INDICES.items():
+        try:
+            preparaciones = PREPARACIONES.get(coleccion, ())
+            if preparaciones:
+                existentes = db[coleccion].index_information()
+                for indice, preparar in preparaciones:
+                    if indice not in existentes:
+                        preparar()
+            db[coleccion].create_indexes(modelos)
+        except Exception as e:
+            logger.error("No se pudieron crear los índices de '%s': %s", coleccion, e)
+    if not INDICES_DERIVA:
+        return {}
+    reporte = detectar_deriva(db)
+    for coleccion, diferencias in reporte.items():
+        logger.warning("Deriva de índices en '%s': %s", coleccion, diferencias)
+    return reporte
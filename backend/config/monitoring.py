@@ -0,0 +1,240 @@
+# cortate/backend/config/monitoring.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import g, has_request_context
+from pymongo import monitoring
+from utils.cache import CacheTTL
+from utils.metricas import registro, BUCKETS_LATENCIA_DB
+
+logger = logging.getLogger("cortate.mongo")
+
+# Comandos de lectura que aceptan explain
+COMANDOS_EXPLICABLES = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+# Campos de sesión/transporte que no forman parte de la consulta
+CAMPOS_INTERNOS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "readConcern",
+                   "writeConcern", "$audit", "$client", "apiVersion", "apiStrict", "apiDeprecationErrors"}
+
+
+def _resumir_plan(plan):
+    """
+    Recorre un resultado de explain y devuelve las etapas y los índices usados,
+    p. ej. {"etapas": ["FETCH", "IXSCAN"], "indices": ["agenda_barbero"], "collscan": False}.
+    """
+    etapas, indices = [], []
+
+    def recorrer(nodo):
+        if isinstance(nodo, dict):
+            if "stage" in nodo:
+                etapas.append(nodo["stage"])
+            if "indexName" in nodo:
+                indices.append(nodo["indexName"])
+            for clave, valor in nodo.items():
+                if clave != "rejectedPlans":
+                    recorrer(valor)
+        elif isinstance(nodo, list):
+            for valor in nodo:
+                recorrer(valor)
+
+    recorrer(plan.get("queryPlanner", {}).get("winningPlan") or plan.get("stages") or plan)
+    return {"etapas": etapas, "indices": indices, "collscan": "COLLSCAN" in etapas}
+
+
+def _forma(comando):
+    # Identifica la "forma" de la consulta (colección + campos del filtro) para
+    # no repetir explain de la misma consulta con distintos valores
+    nombre = next(iter(comando))
+    filtro = comando.get("filter") or comando.get("query") or {}
+    pipeline = comando.get("pipeline") or []
+    campos = tuple(sorted(filtro)) if isinstance(filtro, dict) else ()
+    etapas = tuple(next(iter(e)) for e in pipeline if isinstance(e, dict) and e)
+    return nombre, comando.get(nombre), campos, etapas
+
+
+class ListenerConsultasLentas(monitoring.CommandListener):
+    """
+    Registra en el log los comandos que superan `umbral_ms` y, para lecturas,
+    su plan de ejecución (COLLSCAN vs IXSCAN). El explain corre en un hilo
+    aparte y una sola vez por forma de consulta cada `ttl_explain` segundos.
+    """
+
+    def __init__(self, umbral_ms=100, explain=True, ttl_explain=300):
+        self.umbral_ms = umbral_ms
+        self.explain = explain
+        self._pendientes = {}
+        self._lock = threading.Lock()
+        self._explicadas = CacheTTL(max_entradas=500, ttl=ttl_explain)
+        self._ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        self.cliente = None
+
+    def _clave(self, event):
+        return event.connection_id, event.request_id
+
+    def started(self, event):
+        if not self.explain or event.command_name not in COMANDOS_EXPLICABLES:
+            return
+        comando = {k: v for k, v in event.command.items() if k not in CAMPOS_INTERNOS}
+        with self._lock:
+            self._pendientes[self._clave(event)] = (event.database_name, comando)
+
+    def succeeded(self, event):
+        with self._lock:
+            pendiente = self._pendientes.pop(self._clave(event), None)
+        duracion_ms = event.duration_micros / 1000
+        if duracion_ms < self.umbral_ms:
+            return
+        logger.warning("Comando lento: %s %.1f ms (db=%s)", event.command_name, duracion_ms, event.database_name)
+        if pendiente and self.cliente is not None:
+            forma = _forma(pendiente[1])
+            if self._explicadas.obtener(forma) is None:
+                self._explicadas.guardar(forma, True)
+                self._ejecutor.submit(self._explicar, pendiente, duracion_ms)
+
+    def failed(self, event):
+        with self._lock:
+            self._pendientes.pop(self._clave(event), None)
+
+    def _explicar(self, pendiente, duracion_ms):
+        base, comando = pendiente
+        try:
+            plan = self.cliente[base].command("explain", comando, verbosity="queryPlanner")
+        except Exception as e:
+            logger.debug("No se pudo ejecutar explain: %s", e)
+            return
+        resumen = _resumir_plan(plan)
+        nivel = logging.WARNING if resumen["collscan"] else logging.INFO
+        logger.log(nivel, "Plan de %s.%s (%.1f ms): etapas=%s indices=%s",
+                   base, comando.get(next(iter(comando))), duracion_ms,
+                   resumen["etapas"], resumen["indices"])
+
+
+class ListenerPool(monitoring.ConnectionPoolListener):
+    """
+    Métricas del pool de conexiones: conexiones abiertas y en uso, hilos
+    esperando una conexión, tiempo de espera y timeouts de la cola. Si
+    'esperando' crece o hay timeouts, el pool está saturado (subir
+    DB_MAX_POOL_SIZE o bajar hilos por worker).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inicio_espera = {}
+        self.abiertas = 0
+        self.en_uso = 0
+        self.esperando = 0
+        self.esperas = 0
+        self.espera_total_ms = 0.0
+        self.espera_max_ms = 0.0
+        self.timeouts = 0
+
+    def _terminar_espera(self):
+        # Los eventos de checkout se emiten en el mismo hilo que pide la conexión
+        inicio = self._inicio_espera.pop(threading.get_ident(), None)
+        self.esperando = max(0, self.esperando - 1)
+        if inicio is not None:
+            espera_ms = (time.perf_counter() - inicio) * 1000
+            self.esperas += 1
+            self.espera_total_ms += espera_ms
+            self.espera_max_ms = max(self.espera_max_ms, espera_ms)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._inicio_espera[threading.get_ident()] = time.perf_counter()
+            self.esperando += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self._terminar_espera()
+            self.en_uso += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._terminar_espera()
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self.timeouts += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.en_uso = max(0, self.en_uso - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.abiertas += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.abiertas = max(0, self.abiertas - 1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "abiertas": self.abiertas,
+                "en_uso": self.en_uso,
+                "esperando": self.esperando,
+                "esperas": self.esperas,
+                "espera_promedio_ms": round(self.espera_total_ms / self.esperas, 3) if self.esperas else 0.0,
+                "espera_max_ms": round(self.espera_max_ms, 3),
+                "timeouts": self.timeouts,
+            }
+
+
+class ListenerComandos(monitoring.CommandListener):
+    """
+    Duración de cada comando de MongoDB por tipo y colección. Dentro de una
+    request muestreada además acumula en g.metricas_db el tiempo y la
+    cantidad de consultas, que middleware/metrics publica en Server-Timing.
+    Los eventos se emiten en el hilo que ejecuta el comando.
+    """
+
+    def __init__(self):
+        self._colecciones = {}
+        self._lock = threading.Lock()
+        self.duracion = registro.histograma(
+            "cortate_mongo_comando_segundos", "Duración de los comandos de MongoDB",
+            ("comando", "coleccion"), BUCKETS_LATENCIA_DB)
+        self.fallidos = registro.contador(
+            "cortate_mongo_comandos_fallidos_total", "Comandos de MongoDB con error", ("comando",))
+
+    def started(self, event):
+        # getMore lleva el id del cursor; la colección viene aparte
+        coleccion = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        with self._lock:
+            self._colecciones[(event.connection_id, event.request_id)] = (
+                coleccion if isinstance(coleccion, str) else "")
+
+    def _terminar(self, event):
+        with self._lock:
+            coleccion = self._colecciones.pop((event.connection_id, event.request_id), "")
+        segundos = event.duration_micros / 1e6
+        if has_request_context():
+            metricas = g.get("metricas_db")
+            if metricas is not None:
+                metricas["consultas"] += 1
+                metricas["segundos"] += segundos
+        return coleccion, segundos
+
+    def succeeded(self, event):
+        coleccion, segundos = self._terminar(event)
+        self.duracion.observar(segundos, event.command_name, coleccion)
+
+    def failed(self, event):
+        coleccion, segundos = self._terminar(event)
+        self.duracion.observar(segundos, event.command_name, coleccion)
+        self.fallidos.incrementar(event.command_name)
@@ -1,27 +1,117 @@
-from flask import Blueprint, request, jsonify
-import uuid
+# cortate/backend/controllers/authController.py
 
-auth_bp = Blueprint('auth', __name__)
-usuarios = []
+import hmac
+import os
+import re
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, g
+from pymongo.errors import DuplicateKeyError
+import jwt
+from config.database import usuarios_collection
+from middleware.auth import SECRET_KEY, token_required, revocar_token
+from utils import passwords
+from utils.cache_documentos import usuarios_cache
+from utils.helpers import validar_credenciales
 
-@auth_bp.route('/register', methods=['POST'])
+auth_controller = Blueprint('auth_controller', __name__)
+
+PASSWORD_MIN_LENGTH = int(os.getenv("PASSWORD_MIN_LENGTH", 6))
+_UNIDADES = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Duración del token en formato '7d', '12h', '30m' o segundos
+def _duracion(valor):
+    coincidencia = re.fullmatch(r"(\d+)([smhd]?)", valor.strip())
+    if not coincidencia:
+        raise ValueError(f"Duración inválida: {valor}")
+    return timedelta(seconds=int(coincidencia.group(1)) * _UNIDADES.get(coincidencia.group(2) or "s"))
+
+JWT_EXPIRE = _duracion(os.getenv("JWT_EXPIRE", "7d"))
+
+def _emitir_token(usuario):
+    ahora = datetime.utcnow()
+    payload = {"user_id": str(usuario["_id"]), "tipo": usuario.get("tipo"), "iat": ahora, "exp": ahora + JWT_EXPIRE}
+    return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
+
+# Datos públicos del usuario (sin contraseña)
+def _publico(usuario):
+    return {k: v for k, v in usuario.items() if k not in ("password", "password_hash")}
+
+# Registrar usuario
+@auth_controller.route('/register', methods=['POST'])
 def register():
-    data = request.get_json()
+    data = request.get_json() or {}
+    error = validar_credenciales(data)
+    if error:
+        return jsonify({"error": error}), 400
+    email = (data.get("email") or "").strip().lower()
+    password = data.get("password") or ""
+    if not email or "@" not in email:
+        return jsonify({"error": "Email inválido"}), 400
+    if len(password) < PASSWORD_MIN_LENGTH:
+        return jsonify({"error": f"La contraseña debe tener al menos {PASSWORD_MIN_LENGTH} caracteres"}), 400
+    try:
+        password_hash = passwords.hashear(password)
+    except passwords.PoolSaturado as e:
+        return jsonify({"error": str(e)}), 503
     nuevo_usuario = {
-        "id": str(uuid.uuid4()),
         "nombre": data.get("nombre"),
-        "email": data.get("email"),
+        "email": email,
         "telefono": data.get("telefono"),
-        "password": data.get("password"),
-        "tipo": "cliente"
+        "password_hash": password_hash,
+        "tipo": "cliente",
+        "creado_en": datetime.utcnow(),
     }
-    usuarios.append(nuevo_usuario)
-    return jsonify({"mensaje": "Usuario registrado", "usuario": nuevo_usuario})
+    try:
+        usuarios_collection.insert_one(nuevo_usuario)
+    except DuplicateKeyError:
+        return jsonify({"error": "El email ya está registrado"}), 409
+    return jsonify({"mensaje": "Usuario registrado", "usuario": _publico(nuevo_usuario)}), 201
 
-@auth_bp.route('/login', methods=['POST'])
+# Iniciar sesión (búsqueda por el índice único de email)
+@auth_controller.route('/login', methods=['POST'])
 def login():
-    data = request.get_json()
-    for user in usuarios:
-        if user['email'] == data.get("email") and user['password'] == data.get("password"):
-            return jsonify({"mensaje": "Login exitoso", "usuario": user})
-    return jsonify({"mensaje": "Credenciales inválidas"}), 401
+    data = request.get_json() or {}
+    # Antes de buscar o verificar: un número o una lista no llega a pbkdf2
+    error = validar_credenciales(data)
+    if error:
+        return jsonify({"error": error}), 400
+    email = (data.get("email") or "").strip().lower()
+    password = data.get("password") or ""
+    usuario = usuarios_collection.find_one({"email": email}) if email else None
+    try:
+        if usuario and usuario.get("password_hash"):
+            valido = passwords.verificar(password, usuario["password_hash"])
+        else:
+            # Usuario inexistente: se verifica igual contra un hash de relleno
+            # para que la respuesta tarde lo mismo
+            passwords.verificar(password, passwords.HASH_RELLENO)
+            # Usuarios antiguos con la contraseña en texto plano
+            valido = bool(usuario and usuario.get("password")) and hmac.compare_digest(
+                str(usuario["password"]).encode(), password.encode())
+        if valido and passwords.necesita_rehash(usuario.get("password_hash")):
+            usuarios_collection.update_one(
+                {"_id": usuario["_id"]},
+                {"$set": {"password_hash": passwords.hashear(password)}, "$unset": {"password": ""}},
+            )
+            usuarios_cache.invalidar(usuario["_id"])
+    except passwords.PoolSaturado as e:
+        return jsonify({"error": str(e)}), 503
+    if not valido:
+        return jsonify({"mensaje": "Credenciales inválidas"}), 401
+    return jsonify({"mensaje": "Login exitoso", "token": _emitir_token(usuario), "usuario": _publico(usuario)})
+
+# Cerrar sesión: revoca el token actual
+@auth_controller.route('/logout', methods=['POST'])
+@token_required
+def logout():
+    _, _, token = request.headers.get("Authorization", "").partition(" ")
+    revocar_token(token.strip())
+    return '', 204
+
+# Usuario autenticado
+@auth_controller.route('/me', methods=['GET'])
+@token_required
+def me():
+    if not g.current_user:
+        return jsonify({"error": "Usuario no encontrado"}), 404
+    return jsonify(_publico(g.current_user)), 200
@@ -1,52 +1,420 @@
 # cortate/backend/controllers/barberController.py
 
+import math
+import os
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
-from config.database import barbers_collection
+from pymongo import ReturnDocument, ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from config.database import barbers_collection, lectura
+from utils.streaming import leer_formato_stream, leer_batch_size, respuesta_stream
+from utils.geo import leer_coordenadas, punto_geojson
+from utils.proyeccion import leer_proyeccion
+from utils import indices_barberos
+from utils.cache_documentos import barberos_cache
+from utils import versiones
+from middleware.conditional import get_condicional
+from utils.bulk import leer_lote, insertar_lote, respuesta_lote, leer_ids
+from utils.busqueda import RANGOS_PRECIO, rango_precio, formatear_rangos
+from utils.trabajos import encolar
+from utils import imagenes
+from middleware.uploadMiddleware import handle_upload
 
 barber_controller = Blueprint('barber_controller', __name__)
 
+# 'mongo' usa $geoNear sobre el índice 2dsphere; 'memoria' fuerza el índice en proceso
+GEO_BACKEND = os.getenv("GEO_BACKEND", "mongo")
+# 'mongo' usa el índice de texto; 'memoria' fuerza el índice invertido en proceso
+BUSQUEDA_BACKEND = os.getenv("BUSQUEDA_BACKEND", "mongo")
+LIMITE_BUSQUEDA_MAX = 50
+RADIO_MAX_KM = 50
+LIMITE_CERCANOS_MAX = 100
+# Mejor evaluados primero; a igual promedio, el con más reseñas
+ORDEN_RATING = [("rating_avg", DESCENDING), ("rating_count", DESCENDING), ("_id", ASCENDING)]
+
+# Guarda las coordenadas del payload como punto GeoJSON en 'ubicacion'
+def _normalizar_ubicacion(data):
+    coordenadas = leer_coordenadas(data)
+    if coordenadas:
+        data["ubicacion"] = punto_geojson(*coordenadas)
+    return data
+
 # Registrar un barbero
 @barber_controller.route('/create', methods=['POST'])
 def crear_barbero():
     data = request.get_json()
     if not data:
         return jsonify({"error": "Datos incompletos"}), 400
-    resultado = barbers_collection.insert_one(data)
-    data["_id"] = str(resultado.inserted_id)
+    try:
+        _normalizar_ubicacion(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    barbers_collection.insert_one(data)
+    versiones.incrementar("barberos")
+    indices_barberos.sincronizar(data)
     return jsonify(data), 201
 
+# Registrar barberos en lote (importaciones desde planillas)
+@barber_controller.route('/bulk', methods=['POST'])
+def crear_barberos_lote():
+    try:
+        documentos = leer_lote()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def validar(data):
+        try:
+            _normalizar_ubicacion(data)
+        except ValueError as e:
+            return str(e)
+
+    insertados, errores = insertar_lote(barbers_collection, documentos, validar)
+    if insertados:
+        versiones.incrementar("barberos")
+        for barbero in insertados:
+            indices_barberos.sincronizar(barbero)
+    cuerpo, status = respuesta_lote(insertados, errores)
+    return jsonify(cuerpo), status
+
+# Obtener varios barberos por ID (?ids=a,b,c) con una sola consulta
+@barber_controller.route('/batch', methods=['GET'])
+def obtener_barberos_lote():
+    try:
+        ids = leer_ids()
+        encontrados = barberos_cache.obtener_varios(ids, leer_proyeccion("barberos"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "barberos": [encontrados[i] for i in ids if i in encontrados],
+        "no_encontrados": [i for i in ids if i not in encontrados],
+    }), 200
+
 # Obtener todos los barberos
 @barber_controller.route('/all', methods=['GET'])
+@get_condicional(lambda: ["barberos"])
 def listar_barberos():
+    try:
+        cursor = lectura(barbers_collection).find({}, leer_proyeccion("barberos"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if request.args.get("sort") == "rating":
+        cursor = cursor.sort(ORDEN_RATING)
+    formato = leer_formato_stream()
+    if formato:
+        return respuesta_stream(cursor, formato, leer_batch_size())
+    return jsonify(cursor), 200
+
+# Filtro común de búsqueda por tipo de atención y precio del corte
+def _filtro_cercanos(tipo_atencion, precio_min, precio_max):
+    filtro = {}
+    if tipo_atencion:
+        # Los barberos 'mixto' atienden tanto en local como a domicilio
+        filtro["tipo_atencion"] = {"$in": [tipo_atencion, "mixto"]}
+    if precio_min is not None or precio_max is not None:
+        filtro["precio_corte"] = {}
+        if precio_min is not None:
+            filtro["precio_corte"]["$gte"] = precio_min
+        if precio_max is not None:
+            filtro["precio_corte"]["$lte"] = precio_max
+    return filtro
+
+def _cercanos_mongo(lat, lng, radio_km, limite, filtro, proyeccion):
+    pipeline = [
+        {"$geoNear": {
+            "near": punto_geojson(lat, lng),
+            "distanceField": "distancia_km",
+            "distanceMultiplier": 0.001,
+            "maxDistance": radio_km * 1000,
+            "spherical": True,
+            "query": filtro,
+        }},
+        {"$limit": limite},
+    ]
+    if proyeccion:
+        pipeline.append({"$project": {**proyeccion, "distancia_km": 1}})
+    return list(lectura(barbers_collection).aggregate(pipeline))
+
+def _cercanos_memoria(lat, lng, radio_km, limite, tipo_atencion, precio_min, precio_max, proyeccion):
+    def coincide(datos):
+        if tipo_atencion and datos.get("tipo_atencion") not in (tipo_atencion, "mixto"):
+            return False
+        precio = datos.get("precio_corte")
+        if precio_min is not None and (precio is None or precio < precio_min):
+            return False
+        if precio_max is not None and (precio is None or precio > precio_max):
+            return False
+        return True
+
+    resultados = indices_barberos.indice_geo().buscar(lat, lng, radio_km, limite, coincide)
+    if not resultados:
+        return []
+    documentos = {
+        str(b["_id"]): b
+        for b in lectura(barbers_collection).find({"_id": {"$in": [ObjectId(i) for i, _ in resultados]}}, proyeccion)
+    }
     barberos = []
-    for b in barbers_collection.find():
-        b["_id"] = str(b["_id"])
-        barberos.append(b)
+    for _id, distancia in resultados:
+        if _id in documentos:
+            documentos[_id]["distancia_km"] = distancia
+            barberos.append(documentos[_id])
+    return barberos
+
+# Barberos cercanos a una coordenada, ordenados por distancia
+@barber_controller.route('/nearby', methods=['GET'])
+@get_condicional(lambda: ["barberos"])
+def barberos_cercanos():
+    try:
+        lat = float(request.args["lat"])
+        lng = float(request.args["lng"])
+        radio_km = float(request.args.get("radius_km", 5))
+        limite = max(1, min(int(request.args.get("limit", 20)), LIMITE_CERCANOS_MAX))
+        precio_min = float(request.args["precio_min"]) if request.args.get("precio_min") else None
+        precio_max = float(request.args["precio_max"]) if request.args.get("precio_max") else None
+    except (KeyError, ValueError):
+        return jsonify({"error": "Parámetros 'lat' y 'lng' numéricos requeridos"}), 400
+    # NaN e infinito pasan por float(); sin esto llegan a $geoNear o a la grilla
+    if not all(math.isfinite(v) for v in (lat, lng, radio_km)):
+        return jsonify({"error": "Parámetros 'lat', 'lng' y 'radius_km' deben ser finitos"}), 400
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return jsonify({"error": "Coordenadas fuera de rango"}), 400
+    if radio_km <= 0:
+        return jsonify({"error": "'radius_km' debe ser mayor que 0"}), 400
+    radio_km = min(radio_km, RADIO_MAX_KM)
+    try:
+        proyeccion = leer_proyeccion("barberos")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    tipo_atencion = request.args.get("tipo_atencion")
+
+    barberos = None
+    if GEO_BACKEND != "memoria":
+        try:
+            filtro = _filtro_cercanos(tipo_atencion, precio_min, precio_max)
+            barberos = _cercanos_mongo(lat, lng, radio_km, limite, filtro, proyeccion)
+        except OperationFailure:
+            # Sin índice 2dsphere disponible: se responde desde el índice en memoria
+            barberos = None
+    if barberos is None:
+        barberos = _cercanos_memoria(lat, lng, radio_km, limite, tipo_atencion, precio_min, precio_max, proyeccion)
+
+    for b in barberos:
+        b["distancia_km"] = round(b["distancia_km"], 2)
     return jsonify(barberos), 200
 
+# Clusters de barberos para el viewport del mapa (?bbox=oeste,sur,este,norte&zoom=)
+@barber_controller.route('/clusters', methods=['GET'])
+def clusters_barberos():
+    try:
+        oeste, sur, este, norte = (float(v) for v in request.args["bbox"].split(","))
+        zoom = int(request.args.get("zoom", 12))
+    except (KeyError, ValueError):
+        return jsonify({"error": "Parámetro 'bbox' (oeste,sur,este,norte) y 'zoom' requeridos"}), 400
+    if not all(math.isfinite(v) for v in (oeste, sur, este, norte)):
+        return jsonify({"error": "Los valores de 'bbox' deben ser finitos"}), 400
+    # oeste > este es válido: el viewport cruza el antimeridiano
+    if not (-90 <= sur <= norte <= 90 and -180 <= oeste <= 180 and -180 <= este <= 180):
+        return jsonify({"error": "'bbox' fuera de rango (lng en [-180, 180], lat en [-90, 90], sur <= norte)"}), 400
+    zoom, clusters = indices_barberos.consultar_clusters(oeste, sur, este, norte, zoom)
+    return jsonify({"zoom": zoom, "clusters": clusters}), 200
+
+# Métricas del cache de perfiles (tasa de aciertos, tamaño)
+@barber_controller.route('/cache/stats', methods=['GET'])
+def estadisticas_cache_barberos():
+    return jsonify(barberos_cache.estadisticas()), 200
+
+# Filtros de búsqueda: tipo de atención y rangos de precio de corte y barba
+def _filtro_busqueda(tipo_atencion, precios):
+    filtro = _filtro_cercanos(tipo_atencion, *precios["precio_corte"])
+    precio_min, precio_max = precios["precio_barba"]
+    if precio_min is not None or precio_max is not None:
+        filtro["precio_barba"] = {}
+        if precio_min is not None:
+            filtro["precio_barba"]["$gte"] = precio_min
+        if precio_max is not None:
+            filtro["precio_barba"]["$lte"] = precio_max
+    return filtro
+
+# Cuenta por rango de precio (sólo documentos con precio numérico)
+def _faceta_precio(campo):
+    return [
+        {"$match": {campo: {"$type": "number", "$gte": RANGOS_PRECIO[0]}}},
+        {"$bucket": {"groupBy": f"${campo}", "boundaries": RANGOS_PRECIO, "default": "mas",
+                     "output": {"cantidad": {"$sum": 1}}}},
+    ]
+
+def _buscar_mongo(consulta, filtro, pagina, limite, proyeccion):
+    match = dict(filtro)
+    pipeline = [{"$match": match}]
+    if consulta:
+        match["$text"] = {"$search": consulta}
+        pipeline.append({"$addFields": {"relevancia": {"$meta": "textScore"}}})
+        orden = {"relevancia": -1, "_id": 1}
+    else:
+        orden = dict(ORDEN_RATING)
+    resultados = [{"$sort": orden}, {"$skip": (pagina - 1) * limite}, {"$limit": limite}]
+    if proyeccion:
+        resultados.append({"$project": {**proyeccion, "relevancia": 1}})
+    pipeline.append({"$facet": {
+        "resultados": resultados,
+        "total": [{"$count": "n"}],
+        "tipo_atencion": [{"$group": {"_id": "$tipo_atencion", "cantidad": {"$sum": 1}}}],
+        "precio_corte": _faceta_precio("precio_corte"),
+        "precio_barba": _faceta_precio("precio_barba"),
+    }})
+    salida = next(lectura(barbers_collection).aggregate(pipeline))
+    facetas = {
+        "tipo_atencion": {f["_id"] or "sin_tipo": f["cantidad"] for f in salida["tipo_atencion"]},
+        "precio_corte": formatear_rangos({f["_id"]: f["cantidad"] for f in salida["precio_corte"]}),
+        "precio_barba": formatear_rangos({f["_id"]: f["cantidad"] for f in salida["precio_barba"]}),
+    }
+    total = salida["total"][0]["n"] if salida["total"] else 0
+    return salida["resultados"], total, facetas
+
+def _buscar_memoria(consulta, tipo_atencion, precios, pagina, limite, proyeccion):
+    def coincide(datos):
+        if tipo_atencion and datos.get("tipo_atencion") not in (tipo_atencion, "mixto"):
+            return False
+        for campo, (precio_min, precio_max) in precios.items():
+            precio = datos.get(campo)
+            if precio_min is not None and (precio is None or precio < precio_min):
+                return False
+            if precio_max is not None and (precio is None or precio > precio_max):
+                return False
+        return True
+
+    coincidencias = indices_barberos.buscar_texto(consulta, coincide)
+    if not consulta:
+        coincidencias.sort(key=lambda c: (-(c[2].get("rating_avg") or 0), -(c[2].get("rating_count") or 0), c[0]))
+    facetas = {"tipo_atencion": {}, "precio_corte": {}, "precio_barba": {}}
+    for _, _, datos in coincidencias:
+        tipo = datos.get("tipo_atencion") or "sin_tipo"
+        facetas["tipo_atencion"][tipo] = facetas["tipo_atencion"].get(tipo, 0) + 1
+        for campo in ("precio_corte", "precio_barba"):
+            rango = rango_precio(datos.get(campo))
+            if rango is not None:
+                facetas[campo][rango] = facetas[campo].get(rango, 0) + 1
+    facetas["precio_corte"] = formatear_rangos(facetas["precio_corte"])
+    facetas["precio_barba"] = formatear_rangos(facetas["precio_barba"])
+
+    pagina_actual = coincidencias[(pagina - 1) * limite: pagina * limite]
+    documentos = {
+        str(b["_id"]): b
+        for b in lectura(barbers_collection).find({"_id": {"$in": [ObjectId(i) for i, _, _ in pagina_actual]}}, proyeccion)
+    } if pagina_actual else {}
+    resultados = []
+    for _id, relevancia, _ in pagina_actual:
+        if _id in documentos:
+            if consulta:
+                documentos[_id]["relevancia"] = relevancia
+            resultados.append(documentos[_id])
+    return resultados, len(coincidencias), facetas
+
+# Búsqueda de texto con facetas (?q=&tipo_atencion=&precio_corte_min=&...&page=&limit=)
+@barber_controller.route('/search', methods=['GET'])
+@get_condicional(lambda: ["barberos"])
+def buscar_barberos():
+    try:
+        precios = {
+            campo: tuple(
+                float(request.args[f"{campo}_{limite}"]) if request.args.get(f"{campo}_{limite}") else None
+                for limite in ("min", "max")
+            )
+            for campo in ("precio_corte", "precio_barba")
+        }
+        pagina = max(1, int(request.args.get("page", 1)))
+        limite = max(1, min(int(request.args.get("limit", 20)), LIMITE_BUSQUEDA_MAX))
+        proyeccion = leer_proyeccion("barberos")
+    except ValueError as e:
+        return jsonify({"error": f"Parámetros de búsqueda inválidos: {e}"}), 400
+    consulta = request.args.get("q", "").strip()
+    tipo_atencion = request.args.get("tipo_atencion")
+
+    resultado = None
+    if BUSQUEDA_BACKEND != "memoria":
+        try:
+            filtro = _filtro_busqueda(tipo_atencion, precios)
+            resultado = _buscar_mongo(consulta, filtro, pagina, limite, proyeccion)
+        except OperationFailure:
+            # Sin índice de texto disponible: se responde desde el índice en memoria
+            resultado = None
+    if resultado is None:
+        resultado = _buscar_memoria(consulta, tipo_atencion, precios, pagina, limite, proyeccion)
+
+    barberos, total, facetas = resultado
+    return jsonify({
+        "resultados": barberos,
+        "total": total,
+        "pagina": pagina,
+        "limite": limite,
+        "facetas": facetas,
+    }), 200
+
 # Obtener barbero por ID
 @barber_controller.route('/<barber_id>', methods=['GET'])
+@get_condicional(lambda barber_id: [f"barberos:{barber_id}"])
 def obtener_barbero(barber_id):
-    barbero = barbers_collection.find_one({"_id": ObjectId(barber_id)})
+    try:
+        barbero = barberos_cache.obtener(barber_id, leer_proyeccion("barberos"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     if not barbero:
         return jsonify({"error": "Barbero no encontrado"}), 404
-    barbero["_id"] = str(barbero["_id"])
     return jsonify(barbero), 200
 
 # Actualizar perfil de barbero
 @barber_controller.route('/update/<barber_id>', methods=['PUT'])
 def actualizar_barbero(barber_id):
     data = request.get_json()
-    resultado = barbers_collection.update_one({"_id": ObjectId(barber_id)}, {"$set": data})
-    if resultado.matched_count == 0:
+    try:
+        _normalizar_ubicacion(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    barbero = barbers_collection.find_one_and_update(
+        {"_id": ObjectId(barber_id)},
+        {"$set": data},
+        projection=indices_barberos.CAMPOS_INDICE,
+        return_document=ReturnDocument.AFTER,
+    )
+    if barbero is None:
         return jsonify({"error": "Barbero no encontrado"}), 404
+    barberos_cache.invalidar(barber_id)
+    versiones.incrementar("barberos", f"barberos:{barber_id}")
+    indices_barberos.sincronizar(barbero)
     return jsonify({"mensaje": "Perfil actualizado correctamente"}), 200
 
-# Eliminar barbero
+# Subir una foto del barbero (multipart, campo 'imagen'); las miniaturas y
+# versiones WebP se generan en segundo plano y aparecen luego en 'fotos'
+@barber_controller.route('/<barber_id>/imagenes', methods=['POST'])
+def subir_imagen_barbero(barber_id):
+    if not ObjectId.is_valid(barber_id):
+        return jsonify({"error": "ID inválido"}), 400
+    if barbers_collection.count_documents({"_id": ObjectId(barber_id)}, limit=1) == 0:
+        return jsonify({"error": "Barbero no encontrado"}), 404
+    foto, error, status = handle_upload("imagen")
+    if error:
+        return error, status
+    resultado = barbers_collection.update_one(
+        {"_id": ObjectId(barber_id), "fotos.id": {"$ne": foto["id"]}},
+        {"$push": {"fotos": foto, "imagenes": foto["original"]}},
+    )
+    if resultado.modified_count == 0:
+        # El barbero ya tenía esta imagen
+        return jsonify(foto), 200
+    if set(foto) == {"id", "original"}:
+        # Las variantes pudieron terminar entre la subida y el $push
+        imagenes.sincronizar_barberos(foto["id"])
+    barberos_cache.invalidar(barber_id)
+    versiones.incrementar("barberos", f"barberos:{barber_id}")
+    return jsonify(foto), 201
+
+# Eliminar barbero; sus reservas, reseñas y penalizaciones se borran en segundo plano
 @barber_controller.route('/delete/<barber_id>', methods=['DELETE'])
 def eliminar_barbero(barber_id):
     resultado = barbers_collection.delete_one({"_id": ObjectId(barber_id)})
     if resultado.deleted_count == 0:
         return jsonify({"error": "Barbero no encontrado"}), 404
+    barberos_cache.invalidar(barber_id)
+    versiones.incrementar("barberos", f"barberos:{barber_id}")
+    indices_barberos.quitar(barber_id)
+    encolar("eliminar_barbero", barbero_id=barber_id)
     return '', 204
@@ -2,51 +2,152 @@
 
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
-from config.database import bookings_collection
+from pymongo.errors import DuplicateKeyError
+from config.database import bookings_collection, lectura
+from utils.streaming import leer_formato_stream, leer_batch_size, respuesta_stream
+from utils.proyeccion import leer_proyeccion
+from utils.paginacion import paginar_agenda, CursorInvalido
+from utils import buckets
+from utils.helpers import formatear_fecha
+from utils import disponibilidad
+from utils import versiones
+from utils import puntaje
+from middleware.conditional import get_condicional
+from utils.bulk import leer_lote, insertar_lote, respuesta_lote
+from utils.trabajos import encolar
+from utils import eventos
 
 booking_controller = Blueprint('booking_controller', __name__)
 
+# Claves de versión que cambian con cada reserva creada o cancelada
+def _versiones_reserva(reserva):
+    return ("reservas", f"reservas:barbero:{reserva.get('barbero_id')}",
+            f"reservas:cliente:{reserva.get('cliente_id')}")
+
+# Aviso al barbero (webhook de notificaciones) fuera de la request
+def _notificar(evento, reserva):
+    encolar("notificar", evento=evento, datos={
+        "reserva_id": str(reserva["_id"]),
+        **{campo: reserva.get(campo) for campo in ("barbero_id", "cliente_id", "fecha", "hora")},
+    })
+
+# Valida una reserva nueva; devuelve el mensaje de error o None
+def _validar_reserva(data):
+    if not data.get("barbero_id") or not data.get("fecha") or not data.get("hora"):
+        return "Se requieren barbero_id, fecha y hora"
+    fecha = formatear_fecha(data["fecha"])
+    if fecha is None:
+        return "Fecha inválida (YYYY-MM-DD)"
+    try:
+        indice = disponibilidad.indice_slot(data["hora"])
+    except disponibilidad.SlotInvalido as e:
+        return str(e)
+    # Forma canónica: '2026-11-5' y '9:00' deben chocar con '2026-11-05' y
+    # '09:00' en el índice único y en la clave del bitmap
+    data["fecha"] = fecha.strftime("%Y-%m-%d")
+    data["hora"] = disponibilidad.hora_slot(indice)
+    # El índice único parcial sobre (barbero_id, fecha, hora) reserva el bloque
+    # de forma atómica: dos clientes no pueden tomar la misma hora
+    data["slot_activo"] = True
+    return None
+
 # Crear reserva
 @booking_controller.route('/create', methods=['POST'])
 def crear_reserva():
     data = request.get_json()
     if not data:
         return jsonify({"error": "Datos incompletos"}), 400
-    resultado = bookings_collection.insert_one(data)
-    data["_id"] = str(resultado.inserted_id)
+    error = _validar_reserva(data)
+    if error:
+        return jsonify({"error": error}), 400
+    if data.get("cliente_id") and puntaje.bloqueado(data["cliente_id"]):
+        return jsonify({"error": "Usuario bloqueado por penalizaciones"}), 403
+    try:
+        bookings_collection.insert_one(data)
+    except DuplicateKeyError:
+        return jsonify({"error": "El horario ya está reservado"}), 409
+    disponibilidad.ocupar(data["barbero_id"], data["fecha"], data["hora"])
+    versiones.incrementar(*_versiones_reserva(data))
+    buckets.registrar(data["barbero_id"], data["fecha"], reservas=1)
+    eventos.emitir("reservas", "insert", [data])
+    _notificar("reserva_creada", data)
     return jsonify(data), 201
 
+# Crear reservas en lote (migración de reservas históricas)
+@booking_controller.route('/bulk', methods=['POST'])
+def crear_reservas_lote():
+    try:
+        documentos = leer_lote()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    insertados, errores = insertar_lote(bookings_collection, documentos, _validar_reserva,
+                                        mensajes_duplicado="El horario ya está reservado")
+    if insertados:
+        disponibilidad.ocupar_lote([(r["barbero_id"], r["fecha"], r["hora"]) for r in insertados])
+        buckets.registrar_lote([(r["barbero_id"], r["fecha"], {"reservas": 1}) for r in insertados])
+        versiones.incrementar(*(clave for r in insertados for clave in _versiones_reserva(r)))
+        eventos.emitir("reservas", "insert", insertados)
+    cuerpo, status = respuesta_lote(insertados, errores)
+    return jsonify(cuerpo), status
+
 # Obtener todas las reservas
 @booking_controller.route('/all', methods=['GET'])
+@get_condicional(lambda: ["reservas"])
 def listar_reservas():
-    reservas = []
-    for r in bookings_collection.find():
-        r["_id"] = str(r["_id"])
-        reservas.append(r)
-    return jsonify(reservas), 200
+    try:
+        cursor = lectura(bookings_collection).find({}, leer_proyeccion("reservas"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    formato = leer_formato_stream()
+    if formato:
+        return respuesta_stream(cursor, formato, leer_batch_size())
+    return jsonify(cursor), 200
+
+# Disponibilidad de un barbero por día (?barbero_id=&desde=&hasta=)
+@booking_controller.route('/availability', methods=['GET'])
+@get_condicional(lambda: [f"reservas:barbero:{request.args.get('barbero_id')}"])
+def disponibilidad_barbero():
+    barbero_id = request.args.get("barbero_id")
+    if not barbero_id:
+        return jsonify({"error": "Parámetro 'barbero_id' requerido"}), 400
+    try:
+        dias = disponibilidad.consultar(barbero_id, request.args.get("desde"), request.args.get("hasta"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"barbero_id": barbero_id, "slot_minutos": disponibilidad.SLOT_MINUTOS, "dias": dias}), 200
+
+# Página de la agenda (keyset sobre fecha, hora, _id) con filtros desde/hasta
+def _agenda(filtro):
+    try:
+        # fecha y hora forman el cursor: siempre se proyectan
+        proyeccion = leer_proyeccion("reservas", requeridos=("fecha", "hora"))
+        reservas, siguiente = paginar_agenda(bookings_collection, filtro, proyeccion)
+    except (CursorInvalido, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"reservas": reservas, "next_cursor": siguiente}), 200
 
 # Obtener reservas de un cliente
 @booking_controller.route('/cliente/<cliente_id>', methods=['GET'])
+@get_condicional(lambda cliente_id: [f"reservas:cliente:{cliente_id}"])
 def reservas_cliente(cliente_id):
-    reservas = []
-    for r in bookings_collection.find({"cliente_id": cliente_id}):
-        r["_id"] = str(r["_id"])
-        reservas.append(r)
-    return jsonify(reservas), 200
+    return _agenda({"cliente_id": cliente_id})
 
 # Obtener reservas de un barbero
 @booking_controller.route('/barbero/<barbero_id>', methods=['GET'])
+@get_condicional(lambda barbero_id: [f"reservas:barbero:{barbero_id}"])
 def reservas_barbero(barbero_id):
-    reservas = []
-    for r in bookings_collection.find({"barbero_id": barbero_id}):
-        r["_id"] = str(r["_id"])
-        reservas.append(r)
-    return jsonify(reservas), 200
+    return _agenda({"barbero_id": barbero_id})
 
 # Cancelar reserva
 @booking_controller.route('/delete/<reserva_id>', methods=['DELETE'])
 def cancelar_reserva(reserva_id):
-    resultado = bookings_collection.delete_one({"_id": ObjectId(reserva_id)})
-    if resultado.deleted_count == 0:
+    reserva = bookings_collection.find_one_and_delete({"_id": ObjectId(reserva_id)})
+    if reserva is None:
         return jsonify({"error": "Reserva no encontrada"}), 404
+    if reserva.get("slot_activo"):
+        disponibilidad.liberar(reserva["barbero_id"], reserva["fecha"], reserva["hora"])
+    versiones.incrementar(*_versiones_reserva(reserva))
+    buckets.registrar(reserva.get("barbero_id"), reserva.get("fecha"), reservas=-1)
+    eventos.emitir("reservas", "delete", [reserva])
+    _notificar("reserva_cancelada", reserva)
     return '', 204
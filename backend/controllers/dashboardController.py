@@ -1,19 +1,61 @@
+# cortate/backend/controllers/dashboardController.py
+
 from flask import Blueprint, jsonify, request
+from config.database import revenues_collection
+from models.Revenue import Revenue
+from utils import buckets
 
 dashboard_bp = Blueprint('dashboard', __name__)
-ingresos = []
-reservas = []
-penalizaciones = []
 
+
+def _respuesta(barbero_id, totales):
+    return {
+        "barbero_id": barbero_id,
+        "ingresos_totales": totales["ingresos"],
+        "reservas_recibidas": totales["reservas"],
+        "penalizaciones": totales["penalizaciones"],
+        "puntos_penalizacion": totales["puntos_penalizacion"],
+        "monto_penalizaciones": totales["monto_penalizaciones"]
+    }
+
+# Registrar un ingreso y acumularlo en los buckets del barbero
+@dashboard_bp.route('/ingresos', methods=['POST'])
+def registrar_ingreso():
+    data = request.get_json()
+    try:
+        ingreso = Revenue.from_dict(data)
+        buckets.periodos(ingreso.fecha)
+        if isinstance(ingreso.monto, bool) or not isinstance(ingreso.monto, (int, float)):
+            raise ValueError
+    except (TypeError, KeyError, ValueError):
+        return jsonify({"error": "Se requieren barbero_id, monto y fecha (YYYY-MM-DD)"}), 400
+    # El _id lo asigna la base: uno repetido del cliente terminaría en 500
+    ingreso.id = None
+    resultado = revenues_collection.insert_one(ingreso.to_dict())
+    buckets.registrar(ingreso.barbero_id, ingreso.fecha, ingresos=ingreso.monto)
+    ingreso.id = resultado.inserted_id
+    return jsonify(ingreso.to_dict()), 201
+
+# Totales históricos del barbero
 @dashboard_bp.route('/dashboard/<barbero_id>', methods=['GET'])
 def ver_dashboard(barbero_id):
-    total_ingresos = sum([i["monto"] for i in ingresos if i["barbero_id"] == barbero_id])
-    total_reservas = len([r for r in reservas if r["barbero"] == barbero_id])
-    total_penalizaciones = sum([p["monto"] for p in penalizaciones if p["user_id"] == barbero_id])
-    
-    return jsonify({
-        "barbero_id": barbero_id,
-        "ingresos_totales": total_ingresos,
-        "reservas_recibidas": total_reservas,
-        "monto_penalizaciones": total_penalizaciones
-    })
+    return jsonify(_respuesta(barbero_id, buckets.totales(barbero_id)))
+
+# Totales de un rango de fechas (?desde=&hasta=) y serie opcional (?granularidad=dia|semana|mes)
+@dashboard_bp.route('/dashboard/<barbero_id>/rango', methods=['GET'])
+def ver_dashboard_rango(barbero_id):
+    desde = request.args.get("desde")
+    hasta = request.args.get("hasta")
+    granularidad = request.args.get("granularidad")
+    if granularidad and granularidad not in buckets.GRANULARIDADES:
+        return jsonify({"error": "Granularidad inválida (dia, semana o mes)"}), 400
+    try:
+        respuesta = _respuesta(barbero_id, buckets.totales_rango(barbero_id, desde, hasta))
+        if granularidad:
+            respuesta["serie"] = buckets.serie(barbero_id, granularidad, desde, hasta)
+    except buckets.RangoInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    except (TypeError, ValueError):
+        return jsonify({"error": "Parámetros 'desde' y 'hasta' (YYYY-MM-DD) requeridos"}), 400
+    respuesta.update({"desde": desde, "hasta": hasta})
+    return jsonify(respuesta)
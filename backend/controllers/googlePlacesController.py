@@ -1,12 +1,93 @@
 # cortate/backend/controllers/googlePlacesController.py
 
+import math
 import os
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from flask import Blueprint, request, jsonify
+from utils.cache import CacheTTL, SingleFlight
+from utils.geo import geohash, centro_geohash
 
 google_places_controller = Blueprint('google_places_controller', __name__)
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
+# Configurable para poder apuntar a un servidor stub local
+GOOGLE_PLACES_URL = os.getenv("GOOGLE_PLACES_URL", "https://maps.googleapis.com/maps/api/place/nearbysearch/json")
+PLACES_TIMEOUT = float(os.getenv("GOOGLE_PLACES_TIMEOUT", 5))
+PLACES_CACHE_TTL = int(os.getenv("GOOGLE_PLACES_CACHE_TTL", 600))
+PLACES_CACHE_MAX = int(os.getenv("GOOGLE_PLACES_CACHE_MAX", 2000))
+# Precisión 6 ≈ celdas de 1,2 km x 0,6 km
+PLACES_GEOHASH_PRECISION = int(os.getenv("GOOGLE_PLACES_GEOHASH_PRECISION", 6))
+PLACES_POOL_SIZE = int(os.getenv("GOOGLE_PLACES_POOL_SIZE", 20))
+
+# Sesión compartida: reutiliza conexiones keep-alive hacia la API
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=PLACES_POOL_SIZE, pool_maxsize=PLACES_POOL_SIZE)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+_cache = CacheTTL(max_entradas=PLACES_CACHE_MAX, ttl=PLACES_CACHE_TTL)
+_vuelos = SingleFlight()
+# Lo incrementan los hilos que lideran cada vuelo, en paralelo
+_llamadas_lock = threading.Lock()
+_llamadas_upstream = 0
+
+
+class ErrorPlaces(Exception):
+    def __init__(self, mensaje, status):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def _clave(location, radius, keyword):
+    """
+    Normaliza la búsqueda: ubicación a celda geohash, radio entero y keyword
+    en minúsculas. Lanza ValueError si la ubicación o el radio no son válidos.
+    """
+    lat, lng = (float(v) for v in location.split(","))
+    radio = float(radius)
+    # NaN e infinito pasan por float(); int(inf) lanzaría OverflowError
+    if not all(math.isfinite(v) for v in (lat, lng, radio)):
+        raise ValueError("Valores no finitos")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or radio < 1:
+        raise ValueError("Fuera de rango")
+    return geohash(lat, lng, PLACES_GEOHASH_PRECISION), int(radio), keyword.strip().lower()
+
+
+def _consultar_google(clave):
+    global _llamadas_upstream
+    celda, radius, keyword = clave
+    lat, lng = centro_geohash(celda)
+    params = {
+        "location": f"{lat:.6f},{lng:.6f}",
+        "radius": radius,
+        "keyword": keyword,
+        "key": GOOGLE_API_KEY
+    }
+    with _llamadas_lock:
+        _llamadas_upstream += 1
+    try:
+        response = _session.get(GOOGLE_PLACES_URL, params=params, timeout=PLACES_TIMEOUT)
+    except requests.Timeout:
+        raise ErrorPlaces("Tiempo de espera agotado consultando Google Places", 504)
+    except requests.RequestException:
+        raise ErrorPlaces("Error consultando Google Places", 502)
+    if response.status_code != 200:
+        raise ErrorPlaces("Error consultando Google Places", 500)
+
+    try:
+        resultado = response.json()
+    except ValueError:
+        # Página de error de un proxy o respuesta truncada con status 200
+        raise ErrorPlaces("Error consultando Google Places", 502)
+    if not isinstance(resultado, dict):
+        raise ErrorPlaces("Error consultando Google Places", 502)
+    # Sólo se cachean respuestas válidas; errores de cuota o clave no
+    if resultado.get("status") in ("OK", "ZERO_RESULTS"):
+        _cache.guardar(clave, resultado)
+    return resultado
+
 
 @google_places_controller.route('/barberias', methods=['GET'])
 def buscar_barberias():
@@ -16,18 +97,25 @@ def buscar_barberias():
 
     if not location:
         return jsonify({"error": "Parámetro 'location' requerido"}), 400
+    try:
+        clave = _clave(location, radius, keyword)
+    except ValueError:
+        return jsonify({"error": "Parámetros 'location' o 'radius' inválidos"}), 400
 
-    url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-    params = {
-        "location": location,
-        "radius": radius,
-        "keyword": keyword,
-        "key": GOOGLE_API_KEY
-    }
+    resultado = _cache.obtener(clave)
+    if resultado is None:
+        try:
+            # Fallos concurrentes con la misma clave hacen una sola llamada
+            resultado = _vuelos.ejecutar(clave, lambda: _consultar_google(clave))
+        except ErrorPlaces as e:
+            return jsonify({"error": str(e)}), e.status
 
-    response = requests.get(url, params=params)
+    return jsonify(resultado), 200
 
-    if response.status_code != 200:
-        return jsonify({"error": "Error consultando Google Places"}), 500
 
-    return jsonify(response.json()), 200
+@google_places_controller.route('/barberias/stats', methods=['GET'])
+def estadisticas_cache():
+    estadisticas = _cache.estadisticas()
+    estadisticas["llamadas_upstream"] = _llamadas_upstream
+    estadisticas["llamadas_agrupadas"] = _vuelos.agrupadas
+    return jsonify(estadisticas), 200
@@ -1,43 +1,113 @@
 # cortate/backend/controllers/penaltyController.py
 
+from datetime import datetime
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
-from config.database import penalties_collection
+from config.database import penalties_collection, lectura
+from utils.streaming import leer_formato_stream, leer_batch_size, respuesta_stream
+from utils.proyeccion import leer_proyeccion
+from utils import buckets
+from utils import puntaje
+from utils import eventos
+from utils.bulk import leer_lote, insertar_lote, respuesta_lote
 
 penalty_controller = Blueprint('penalty_controller', __name__)
 
+# Campos numéricos que se acumulan en buckets y puntaje
+CAMPOS_NUMERICOS = ("puntos", "monto")
+
+# Valida una penalización nueva; devuelve el mensaje de error o None
+def _validar_penalizacion(data):
+    for campo in CAMPOS_NUMERICOS:
+        if campo in data and not (puntaje.es_numero(data[campo]) and data[campo] >= 0):
+            return f"'{campo}' debe ser un número mayor o igual a 0"
+    data["generado_en"] = puntaje.momento(data.get("generado_en"))
+    return None
+
+# Evento para los buckets del dashboard: suma (signo=1) o resta (signo=-1)
+def _evento(penalizacion, signo):
+    generado_en = penalizacion.get("generado_en")
+    if not isinstance(generado_en, datetime):
+        generado_en = datetime.utcnow()
+    return penalizacion.get("usuario_id"), generado_en, {
+        "penalizaciones": signo,
+        "puntos_penalizacion": signo * puntaje.numero(penalizacion.get("puntos")),
+        "monto_penalizaciones": signo * puntaje.numero(penalizacion.get("monto")),
+    }
+
+def _acumular(penalizacion, signo):
+    buckets.registrar_lote([_evento(penalizacion, signo)])
+    puntaje.registrar([penalizacion], signo)
+
 # Crear penalización
 @penalty_controller.route('/create', methods=['POST'])
 def crear_penalizacion():
     data = request.get_json()
     if not data:
         return jsonify({"error": "Datos faltantes"}), 400
-    resultado = penalties_collection.insert_one(data)
-    data["_id"] = str(resultado.inserted_id)
+    error = _validar_penalizacion(data)
+    if error:
+        return jsonify({"error": error}), 400
+    penalties_collection.insert_one(data)
+    _acumular(data, 1)
+    eventos.emitir("penalizaciones", "insert", [data])
     return jsonify(data), 201
 
+# Crear penalizaciones en lote
+@penalty_controller.route('/bulk', methods=['POST'])
+def crear_penalizaciones_lote():
+    try:
+        documentos = leer_lote()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    insertados, errores = insertar_lote(penalties_collection, documentos, _validar_penalizacion)
+    if insertados:
+        buckets.registrar_lote([_evento(p, 1) for p in insertados])
+        puntaje.registrar(insertados)
+        eventos.emitir("penalizaciones", "insert", insertados)
+    cuerpo, status = respuesta_lote(insertados, errores)
+    return jsonify(cuerpo), status
+
 # Obtener todas las penalizaciones
 @penalty_controller.route('/all', methods=['GET'])
 def listar_penalizaciones():
-    penalizaciones = []
-    for p in penalties_collection.find():
-        p["_id"] = str(p["_id"])
-        penalizaciones.append(p)
-    return jsonify(penalizaciones), 200
+    try:
+        cursor = lectura(penalties_collection).find({}, leer_proyeccion("penalizaciones"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    formato = leer_formato_stream()
+    if formato:
+        return respuesta_stream(cursor, formato, leer_batch_size())
+    return jsonify(cursor), 200
+
+# Puntaje de penalización vigente (con decaimiento) y si bloquea reservas
+@penalty_controller.route('/score/<usuario_id>', methods=['GET'])
+def puntaje_usuario(usuario_id):
+    valor = puntaje.obtener(usuario_id)
+    return jsonify({
+        "usuario_id": usuario_id,
+        "puntaje": round(valor, 4),
+        "umbral_bloqueo": puntaje.PENALIZACION_UMBRAL_BLOQUEO,
+        "bloqueado": valor >= puntaje.PENALIZACION_UMBRAL_BLOQUEO,
+        "vida_media_dias": puntaje.PENALIZACION_VIDA_MEDIA_DIAS,
+    }), 200
 
 # Obtener penalizaciones por ID de usuario
 @penalty_controller.route('/user/<usuario_id>', methods=['GET'])
 def obtener_penalizaciones_usuario(usuario_id):
-    penalizaciones = []
-    for p in penalties_collection.find({"usuario_id": usuario_id}):
-        p["_id"] = str(p["_id"])
-        penalizaciones.append(p)
-    return jsonify(penalizaciones), 200
+    try:
+        proyeccion = leer_proyeccion("penalizaciones")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(penalties_collection.find({"usuario_id": usuario_id}, proyeccion)), 200
 
 # Eliminar penalización
 @penalty_controller.route('/delete/<penalty_id>', methods=['DELETE'])
 def eliminar_penalizacion(penalty_id):
-    resultado = penalties_collection.delete_one({"_id": ObjectId(penalty_id)})
-    if resultado.deleted_count == 0:
+    penalizacion = penalties_collection.find_one_and_delete({"_id": ObjectId(penalty_id)})
+    if penalizacion is None:
         return jsonify({"error": "Penalización no encontrada"}), 404
+    _acumular(penalizacion, -1)
+    eventos.emitir("penalizaciones", "delete", [penalizacion])
     return '', 204
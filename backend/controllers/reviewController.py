@@ -2,7 +2,14 @@
 
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
-from config.database import reviews_collection
+from config.database import reviews_collection, lectura
+from utils.streaming import leer_formato_stream, leer_batch_size, respuesta_stream
+from utils.proyeccion import leer_proyeccion
+from utils.ratings import puntuacion_valida, aplicar_resena, aplicar_resenas
+from utils import versiones
+from utils import eventos
+from middleware.conditional import get_condicional
+from utils.bulk import leer_lote, insertar_lote, respuesta_lote
 
 review_controller = Blueprint('review_controller', __name__)
 
@@ -12,32 +19,65 @@ def crear_resena():
     data = request.get_json()
     if not data:
         return jsonify({"error": "Faltan datos"}), 400
-    resultado = reviews_collection.insert_one(data)
-    data["_id"] = str(resultado.inserted_id)
+    if not puntuacion_valida(data.get("puntuacion")):
+        return jsonify({"error": "La puntuación debe ser un entero de 1 a 5"}), 400
+    reviews_collection.insert_one(data)
+    versiones.incrementar("reseñas", f"reseñas:barbero:{data.get('barbero_id')}")
+    aplicar_resena(data.get("barbero_id"), data["puntuacion"])
+    eventos.emitir("reseñas", "insert", [data])
     return jsonify(data), 201
 
+# Crear reseñas en lote (migración de reseñas históricas)
+@review_controller.route('/bulk', methods=['POST'])
+def crear_resenas_lote():
+    try:
+        documentos = leer_lote()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def validar(data):
+        if not puntuacion_valida(data.get("puntuacion")):
+            return "La puntuación debe ser un entero de 1 a 5"
+
+    insertados, errores = insertar_lote(reviews_collection, documentos, validar)
+    if insertados:
+        aplicar_resenas([(r.get("barbero_id"), r["puntuacion"]) for r in insertados])
+        versiones.incrementar("reseñas", *(f"reseñas:barbero:{r.get('barbero_id')}" for r in insertados))
+        eventos.emitir("reseñas", "insert", insertados)
+    cuerpo, status = respuesta_lote(insertados, errores)
+    return jsonify(cuerpo), status
+
 # Obtener todas las reseñas
 @review_controller.route('/all', methods=['GET'])
+@get_condicional(lambda: ["reseñas"])
 def listar_resenas():
-    resenas = []
-    for r in reviews_collection.find():
-        r["_id"] = str(r["_id"])
-        resenas.append(r)
-    return jsonify(resenas), 200
+    try:
+        cursor = lectura(reviews_collection).find({}, leer_proyeccion("reseñas"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    formato = leer_formato_stream()
+    if formato:
+        return respuesta_stream(cursor, formato, leer_batch_size())
+    return jsonify(cursor), 200
 
 # Obtener reseñas por barbero
 @review_controller.route('/barbero/<barbero_id>', methods=['GET'])
+@get_condicional(lambda barbero_id: [f"reseñas:barbero:{barbero_id}"])
 def resenas_barbero(barbero_id):
-    resenas = []
-    for r in reviews_collection.find({"barbero_id": barbero_id}):
-        r["_id"] = str(r["_id"])
-        resenas.append(r)
-    return jsonify(resenas), 200
+    try:
+        proyeccion = leer_proyeccion("reseñas")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(lectura(reviews_collection).find({"barbero_id": barbero_id}, proyeccion)), 200
 
 # Eliminar reseña
 @review_controller.route('/delete/<resena_id>', methods=['DELETE'])
 def eliminar_resena(resena_id):
-    resultado = reviews_collection.delete_one({"_id": ObjectId(resena_id)})
-    if resultado.deleted_count == 0:
+    resena = reviews_collection.find_one_and_delete({"_id": ObjectId(resena_id)})
+    if resena is None:
         return jsonify({"error": "Reseña no encontrada"}), 404
+    versiones.incrementar("reseñas", f"reseñas:barbero:{resena.get('barbero_id')}")
+    if puntuacion_valida(resena.get("puntuacion")):
+        aplicar_resena(resena.get("barbero_id"), resena["puntuacion"], -1)
+    eventos.emitir("reseñas", "delete", [resena])
     return '', 204
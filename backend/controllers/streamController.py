@@ -0,0 +1,89 @@
+# cortate/backend/controllers/streamController.py
+
+import os
+import queue
+import threading
+import time
+from flask import Blueprint, Response, request, jsonify
+from bson import ObjectId
+from utils import eventos
+
+stream_controller = Blueprint('stream_controller', __name__)
+
+# Cada stream abierto ocupa un hilo del worker (gthread) mientras dure: el
+# tope por proceso deja siempre al menos un hilo libre para la API REST. Son
+# GUNICORN_THREADS - 1 streams por worker (3 por defecto); para más dashboards
+# se suben los hilos (ver gunicorn.conf.py)
+HILOS_WORKER = int(os.getenv("GUNICORN_THREADS", 4))
+SSE_MAX_CONEXIONES = min(int(os.getenv("SSE_MAX_CONEXIONES", HILOS_WORKER - 1)), HILOS_WORKER - 1)
+# Comentario cada tanto para que proxies y balanceadores no corten la conexión
+SSE_KEEPALIVE_S = float(os.getenv("SSE_KEEPALIVE_S", 15))
+# Los streams se cierran y el navegador reconecta solo (con Last-Event-ID),
+# así un reinicio de workers no queda esperando conexiones eternas
+SSE_DURACION_MAX_S = float(os.getenv("SSE_DURACION_MAX_S", 300))
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", 3000))
+
+_cupos = threading.BoundedSemaphore(max(SSE_MAX_CONEXIONES, 0))
+
+
+def _mensaje(evento):
+    evento_id, nombre, datos = evento
+    return f"id: {evento_id}\nevent: {nombre}\ndata: {datos}\n\n"
+
+
+# Eventos en vivo de un barbero (reservas, reseñas y penalizaciones)
+@stream_controller.route('/barbero/<barbero_id>', methods=['GET'])
+def stream_barbero(barbero_id):
+    if not ObjectId.is_valid(barbero_id):
+        return jsonify({"error": "ID inválido"}), 400
+    if not _cupos.acquire(blocking=False):
+        return jsonify({"error": "Demasiadas conexiones en vivo, reintenta"}), 503, {"Retry-After": "5"}
+
+    cola = eventos.suscribir(barbero_id)
+    ultimo_id = request.headers.get("Last-Event-ID")
+    liberado = threading.Event()
+
+    def liberar():
+        # Lo llama el servidor al cerrar la respuesta, aunque el generador
+        # no haya llegado a empezar
+        if not liberado.is_set():
+            liberado.set()
+            eventos.difusor.desuscribir(barbero_id, cola)
+            _cupos.release()
+
+    def generar():
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        enviado = -1
+        if ultimo_id:
+            pendientes = eventos.difusor.pendientes_desde(barbero_id, ultimo_id)
+            if pendientes is None:
+                # Se perdieron eventos (otro worker o historial agotado):
+                # el cliente debe volver a pedir los datos por REST
+                yield 'event: resincronizar\ndata: {}\n\n'
+            else:
+                for evento in pendientes:
+                    enviado = eventos.secuencia(evento[0])[1]
+                    yield _mensaje(evento)
+        yield 'event: conectado\ndata: {}\n\n'
+        limite = time.monotonic() + SSE_DURACION_MAX_S
+        while time.monotonic() < limite:
+            try:
+                evento = cola.get(timeout=min(SSE_KEEPALIVE_S, max(0.0, limite - time.monotonic())))
+            except queue.Empty:
+                yield ": ping\n\n"
+                continue
+            if evento is eventos.FIN:
+                break
+            # Lo publicado entre la suscripción y la lectura del historial
+            # llega por las dos vías
+            if eventos.secuencia(evento[0])[1] <= enviado:
+                continue
+            yield _mensaje(evento)
+
+    respuesta = Response(generar(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # Sin buffer en nginx, para que cada evento salga al instante
+        "X-Accel-Buffering": "no",
+    })
+    respuesta.call_on_close(liberar)
+    return respuesta
@@ -0,0 +1,21 @@
+# cortate/backend/controllers/uploadController.py
+
+import os
+from flask import Blueprint, abort, send_from_directory
+from utils.imagenes import UPLOAD_FOLDER
+
+upload_controller = Blueprint('upload_controller', __name__)
+
+# La URL lleva el hash del contenido: el archivo nunca cambia y se cachea un año
+CACHE_UPLOADS_S = int(os.getenv("CACHE_UPLOADS_S", 365 * 24 * 3600))
+
+# Servir imágenes subidas y sus variantes
+@upload_controller.route('/<path:ruta>', methods=['GET'])
+def servir_archivo(ruta):
+    # Los temporales de subidas en curso empiezan con punto
+    if any(parte.startswith('.') for parte in ruta.split('/')):
+        abort(404)
+    respuesta = send_from_directory(UPLOAD_FOLDER, ruta, max_age=CACHE_UPLOADS_S)
+    respuesta.cache_control.public = True
+    respuesta.cache_control.immutable = True
+    return respuesta
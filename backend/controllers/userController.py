@@ -2,7 +2,15 @@
 
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
-from config.database import users_collection
+from pymongo.errors import DuplicateKeyError
+from config.database import users_collection, lectura
+from utils.streaming import leer_formato_stream, leer_batch_size, respuesta_stream
+from utils.proyeccion import leer_proyeccion
+from utils.cache_documentos import usuarios_cache
+from utils import passwords
+from utils.bulk import leer_ids
+from utils.trabajos import encolar
+from utils.helpers import validar_credenciales
 
 user_controller = Blueprint('user_controller', __name__)
 
@@ -12,32 +20,71 @@ def crear_usuario():
     data = request.get_json()
     if not data:
         return jsonify({"error": "Datos faltantes"}), 400
-    resultado = users_collection.insert_one(data)
-    data["_id"] = str(resultado.inserted_id)
+    error = validar_credenciales(data)
+    if error:
+        return jsonify({"error": error}), 400
+    if data.get("email"):
+        data["email"] = data["email"].strip().lower()
+    # La contraseña nunca se guarda en texto plano
+    if data.get("password"):
+        try:
+            data["password_hash"] = passwords.hashear(data.pop("password"))
+        except passwords.PoolSaturado as e:
+            return jsonify({"error": str(e)}), 503
+    try:
+        users_collection.insert_one(data)
+    except DuplicateKeyError:
+        return jsonify({"error": "El email ya está registrado"}), 409
+    data.pop("password_hash", None)
     return jsonify(data), 201
 
 # Obtener todos los usuarios
 @user_controller.route('/all', methods=['GET'])
 def listar_usuarios():
-    usuarios = []
-    for u in users_collection.find():
-        u["_id"] = str(u["_id"])
-        usuarios.append(u)
-    return jsonify(usuarios), 200
+    try:
+        cursor = lectura(users_collection).find({}, leer_proyeccion("usuarios"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    formato = leer_formato_stream()
+    if formato:
+        return respuesta_stream(cursor, formato, leer_batch_size())
+    return jsonify(cursor), 200
+
+# Métricas del cache de usuarios
+@user_controller.route('/cache/stats', methods=['GET'])
+def estadisticas_cache_usuarios():
+    return jsonify(usuarios_cache.estadisticas()), 200
+
+# Obtener varios usuarios por ID (?ids=a,b,c) con una sola consulta
+@user_controller.route('/batch', methods=['GET'])
+def obtener_usuarios_lote():
+    try:
+        ids = leer_ids()
+        encontrados = usuarios_cache.obtener_varios(ids, leer_proyeccion("usuarios"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "usuarios": [encontrados[i] for i in ids if i in encontrados],
+        "no_encontrados": [i for i in ids if i not in encontrados],
+    }), 200
 
 # Obtener usuario por ID
 @user_controller.route('/<user_id>', methods=['GET'])
 def obtener_usuario(user_id):
-    usuario = users_collection.find_one({"_id": ObjectId(user_id)})
+    try:
+        usuario = usuarios_cache.obtener(user_id, leer_proyeccion("usuarios"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     if not usuario:
         return jsonify({"error": "Usuario no encontrado"}), 404
-    usuario["_id"] = str(usuario["_id"])
     return jsonify(usuario), 200
 
-# Eliminar usuario
+# Eliminar usuario; sus reservas, reseñas y penalizaciones se borran en segundo plano
 @user_controller.route('/delete/<user_id>', methods=['DELETE'])
 def eliminar_usuario(user_id):
     resultado = users_collection.delete_one({"_id": ObjectId(user_id)})
     if resultado.deleted_count == 0:
         return jsonify({"error": "Usuario no encontrado"}), 404
+    usuarios_cache.invalidar(user_id)
+    encolar("eliminar_usuario", usuario_id=user_id)
     return '', 204
@@ -0,0 +1,55 @@
+# cortate/backend/gunicorn.conf.py
+#
+# Servidor de producción: gunicorn -c gunicorn.conf.py app:app
+# Recarga sin cortar tráfico: kill -HUP <pid del maestro> (los workers
+# terminan sus requests antes de ser reemplazados).
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Workers por CPU (2n+1) con un máximo, porque cada uno carga su propio
+# cliente de MongoDB e índices en memoria; WEB_CONCURRENCY lo fija a mano
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, int(os.getenv("GUNICORN_WORKERS_MAX", 8)))))
+# Hilos por worker: las vistas pasan la mayor parte del tiempo esperando a MongoDB.
+#
+# Tope de streams SSE (/api/stream): con gthread cada stream abierto ocupa un
+# hilo mientras dura, así que la app admite como mucho GUNICORN_THREADS - 1
+# por worker (SSE_MAX_CONEXIONES puede bajarlo, no subirlo) y siempre queda un
+# hilo para la API. Con los valores por defecto son 3 por worker, es decir
+# workers x 3 dashboards en vivo por instancia; el resto recibe 503 con
+# Retry-After. Es un tope deliberado: la app es WSGI síncrona (pymongo, hash
+# de contraseñas y trabajos en hilos) y no se ejecuta bajo gevent/eventlet.
+# Un hilo de stream pasa casi todo el tiempo bloqueado en su cola, así que
+# para más dashboards se sube GUNICORN_THREADS (p. ej. 32) sin costo de CPU
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# La app se importa una vez en el maestro y los workers la heredan al hacer
+# fork, así arrancan rápido. El MongoClient se crea en cada worker al primer uso
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+# Reciclar workers de a poco acota el crecimiento de memoria de los caches
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    # El maestro usó MongoDB al importar la app (índices); se cierra ese
+    # cliente para que ningún socket ni hilo de monitoreo cruce el fork
+    from config.database import cerrar_cliente
+    cerrar_cliente()
+
+
+def post_fork(server, worker):
+    from controllers.streamController import SSE_MAX_CONEXIONES
+    server.log.info("Worker %s listo (MongoClient se crea al primer uso, hasta %s streams SSE)",
+                    worker.pid, max(SSE_MAX_CONEXIONES, 0))
@@ -1,24 +1,134 @@
 # cortate/backend/middleware/auth.py
 
 from functools import wraps
-from flask import request, jsonify
+from datetime import datetime, timedelta, timezone
+from flask import request, jsonify, g
+from werkzeug.local import LocalProxy
+from bson import ObjectId
+import hashlib
+import threading
+import time
 import jwt
+import logging
 import os
 
+from config.database import tokens_revocados_collection
+from utils.cache import CacheTTL
+from utils.cache_documentos import usuarios_cache
+
 SECRET_KEY = os.getenv("SECRET_KEY", "mi_clave_secreta")
+# Tokens verificados en cache; cada entrada vence con el 'exp' del token
+AUTH_CACHE_MAX = int(os.getenv("AUTH_CACHE_MAX", 10000))
+# Vida máxima en cache de un token sin 'exp'
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", 300))
+# Cada cuántos segundos se leen las revocaciones hechas por otros workers
+AUTH_REVOCACION_SYNC = int(os.getenv("AUTH_REVOCACION_SYNC", 30))
+
+logger = logging.getLogger(__name__)
+
+_tokens = CacheTTL(max_entradas=AUTH_CACHE_MAX, ttl=AUTH_CACHE_TTL)
+_revocados = {}
+_lock = threading.Lock()
+_ultima_sincronizacion = None
+
+
+def _digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _sincronizar_revocados():
+    """
+    Trae las revocaciones nuevas de la colección compartida, como máximo una
+    vez cada AUTH_REVOCACION_SYNC segundos.
+    """
+    global _ultima_sincronizacion
+    ahora = time.monotonic()
+    with _lock:
+        if _ultima_sincronizacion and ahora - _ultima_sincronizacion[0] < AUTH_REVOCACION_SYNC:
+            return
+        desde = _ultima_sincronizacion[1] if _ultima_sincronizacion else datetime.min
+        # Se solapa un período completo para tolerar relojes desfasados entre workers
+        _ultima_sincronizacion = (ahora, datetime.utcnow() - timedelta(seconds=AUTH_REVOCACION_SYNC))
+    try:
+        for revocado in tokens_revocados_collection.find({"revocado_en": {"$gte": desde}}, {"expira_en": 1}):
+            _revocar_local(revocado["_id"], revocado.get("expira_en"))
+    except Exception as e:
+        logger.warning("No se pudieron leer los tokens revocados: %s", e)
+
+
+def _revocar_local(digest, expira_en):
+    with _lock:
+        _revocados[digest] = expira_en
+        # Las revocaciones de tokens ya vencidos no hacen falta
+        ahora = datetime.utcnow()
+        for d in [d for d, e in _revocados.items() if e is not None and e < ahora]:
+            del _revocados[d]
+    _tokens.invalidar(digest)
+
+
+def revocar_token(token):
+    """
+    Revoca un token antes de su 'exp' (p. ej. al cerrar sesión). Se guarda en
+    la colección 'tokens_revocados' (con índice TTL al vencimiento) para que
+    los demás workers lo vean en su próxima sincronización.
+    """
+    digest = _digest(token)
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        exp = None
+    expira_en = datetime.fromtimestamp(exp, timezone.utc).replace(tzinfo=None) if exp else None
+    tokens_revocados_collection.update_one(
+        {"_id": digest},
+        {"$set": {"expira_en": expira_en, "revocado_en": datetime.utcnow()}},
+        upsert=True,
+    )
+    _revocar_local(digest, expira_en)
+
+
+def verificar_token(token):
+    """
+    Devuelve el payload de un token válido o lanza jwt.PyJWTError. Los tokens
+    ya verificados se sirven desde cache hasta su 'exp'.
+    """
+    _sincronizar_revocados()
+    digest = _digest(token)
+    if digest in _revocados:
+        raise jwt.InvalidTokenError("Token revocado")
+    payload = _tokens.obtener(digest)
+    if payload is not None:
+        return payload
+    payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    restante = payload["exp"] - time.time() if "exp" in payload else AUTH_CACHE_TTL
+    if restante > 0:
+        _tokens.guardar(digest, payload, ttl=restante)
+    return payload
+
+
+def estadisticas_tokens():
+    return {**_tokens.estadisticas(), "revocados": len(_revocados)}
+
+
+def _cargar_usuario():
+    # Se consulta una sola vez por request y sólo si la vista lo usa
+    if "_usuario_actual" not in g:
+        user_id = g.get("user_id")
+        g._usuario_actual = usuarios_cache.obtener(user_id) if user_id and ObjectId.is_valid(user_id) else None
+    return g._usuario_actual
+
 
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        if "Authorization" in request.headers:
-            token = request.headers["Authorization"].split(" ")[1]
+        _, _, token = request.headers.get("Authorization", "").partition(" ")
         if not token:
             return jsonify({"error": "Token faltante"}), 401
         try:
-            data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            request.user_id = data["user_id"]
+            data = verificar_token(token.strip())
+            request.user_id = g.user_id = data["user_id"]
         except Exception as e:
             return jsonify({"error": "Token inválido o expirado"}), 401
+        g.token_payload = data
+        g.current_user = LocalProxy(_cargar_usuario)
         return f(*args, **kwargs)
     return decorated
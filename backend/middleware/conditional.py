@@ -0,0 +1,52 @@
+# cortate/backend/middleware/conditional.py
+
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, current_app, g
+from config.database import MAX_STALENESS_S
+from utils import versiones
+
+
+def get_condicional(claves):
+    """
+    Decorador para GET con ETag / Last-Modified a partir de los contadores de
+    versión. `claves(**kwargs)` recibe los parámetros de la ruta y devuelve las
+    claves de versión de las que depende la respuesta. Si el cliente ya tiene
+    la versión vigente se responde 304 sin consultar ni serializar los datos.
+    """
+    def decorador(f):
+        @wraps(f)
+        def envoltura(*args, **kwargs):
+            # Las versiones se leen antes que los datos: si una escritura ocurre
+            # entre medio, el ETag queda viejo y la próxima consulta responde 200
+            lista, ultima_modificacion = versiones.leer(claves(**kwargs))
+            # Cambios más nuevos que el retraso tolerado: la vista lee del primario
+            g.lectura_primaria = (ultima_modificacion is not None and
+                                  datetime.utcnow() - ultima_modificacion < timedelta(seconds=MAX_STALENESS_S))
+            firma = repr((request.full_path, lista)).encode()
+            etag = hashlib.sha1(firma).hexdigest()
+            if ultima_modificacion is not None:
+                ultima_modificacion = ultima_modificacion.replace(microsecond=0)
+
+            if request.if_none_match:
+                no_modificado = request.if_none_match.contains_weak(etag)
+            else:
+                desde = request.if_modified_since
+                no_modificado = (desde is not None and ultima_modificacion is not None
+                                 and ultima_modificacion <= desde.replace(tzinfo=None))
+
+            if no_modificado:
+                respuesta = current_app.response_class(status=304)
+            else:
+                respuesta = current_app.make_response(f(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+            respuesta.set_etag(etag)
+            if ultima_modificacion is not None:
+                respuesta.last_modified = ultima_modificacion
+            # El cliente puede guardar la respuesta pero debe revalidarla
+            respuesta.headers["Cache-Control"] = "no-cache"
+            return respuesta
+        return envoltura
+    return decorador
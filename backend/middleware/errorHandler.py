@@ -20,6 +20,10 @@ def register_error_handlers(app):
     def not_found(error):
         return jsonify({'error': 'Recurso no encontrado', 'detalle': str(error)}), 404
 
+    @app.errorhandler(413)
+    def request_entity_too_large(error):
+        return jsonify({'error': 'Solicitud demasiado grande', 'detalle': str(error)}), 413
+
     @app.errorhandler(500)
     def internal_server_error(error):
         return jsonify({'error': 'Error interno del servidor', 'detalle': str(error)}), 500
@@ -0,0 +1,89 @@
+# cortate/backend/middleware/metrics.py
+
+import os
+import random
+import time
+from flask import Response, g, request
+from config import database
+from middleware.auth import estadisticas_tokens
+from utils.cache_documentos import barberos_cache, usuarios_cache
+from utils.metricas import registro, BUCKETS_TAMANO
+from utils import eventos, trabajos
+
+# Fracción de requests que se miden (1 = todas). Con valores bajos el costo
+# por request sin muestrear es un random(); los contadores siguen siendo exactos
+METRICS_MUESTREO = float(os.getenv("METRICS_MUESTREO", 1))
+# Agrega el header Server-Timing (app y db) a las respuestas muestreadas
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "0") == "1"
+# Si se define, /metrics exige "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+_ETIQUETAS = ("blueprint", "endpoint", "metodo")
+
+requests_total = registro.contador(
+    "cortate_http_requests_total", "Requests atendidas", _ETIQUETAS + ("status",))
+latencia = registro.histograma(
+    "cortate_http_latencia_segundos", "Latencia de las requests muestreadas", _ETIQUETAS)
+tamano = registro.histograma(
+    "cortate_http_respuesta_bytes", "Tamaño de las respuestas muestreadas", _ETIQUETAS, BUCKETS_TAMANO)
+db_latencia = registro.histograma(
+    "cortate_http_db_segundos", "Tiempo en MongoDB por request muestreada", _ETIQUETAS)
+db_consultas = registro.contador(
+    "cortate_http_db_consultas_total", "Comandos de MongoDB por endpoint (requests muestreadas)", _ETIQUETAS)
+
+registro.gauges("cortate_mongo_pool", "Pool de conexiones de MongoDB", database.listener_pool.estadisticas)
+registro.gauges("cortate_cache_barberos", "Caché de documentos de barberos", barberos_cache.estadisticas)
+registro.gauges("cortate_cache_usuarios", "Caché de documentos de usuarios", usuarios_cache.estadisticas)
+registro.gauges("cortate_tokens", "Caché de tokens JWT", estadisticas_tokens)
+registro.gauges("cortate_trabajos", "Cola de trabajos en segundo plano", trabajos.estadisticas)
+registro.gauges("cortate_eventos", "Suscriptores y eventos en vivo (SSE)", eventos.estadisticas)
+
+
+def _etiquetas():
+    # El endpoint (no la URL) mantiene acotada la cardinalidad
+    return (request.blueprint or "", request.endpoint or "sin_ruta", request.method)
+
+
+def register_metrics(app):
+
+    @app.before_request
+    def iniciar_medicion():
+        if METRICS_MUESTREO >= 1 or random.random() < METRICS_MUESTREO:
+            g.metricas_inicio = time.perf_counter()
+            g.metricas_db = {"consultas": 0, "segundos": 0.0}
+
+    @app.after_request
+    def registrar_medicion(response):
+        etiquetas = _etiquetas()
+        requests_total.incrementar(*etiquetas, str(response.status_code))
+        inicio = g.pop("metricas_inicio", None)
+        if inicio is None:
+            return response
+        segundos = time.perf_counter() - inicio
+        metricas_db = g.pop("metricas_db")
+        latencia.observar(segundos, *etiquetas)
+        db_latencia.observar(metricas_db["segundos"], *etiquetas)
+        if metricas_db["consultas"]:
+            db_consultas.incrementar(*etiquetas, valor=metricas_db["consultas"])
+        # Las respuestas en streaming no tienen largo conocido
+        if not response.is_streamed and response.content_length is not None:
+            tamano.observar(response.content_length, *etiquetas)
+        if METRICS_SERVER_TIMING:
+            response.headers.add(
+                "Server-Timing",
+                f'app;dur={segundos * 1000:.1f}, '
+                f'db;dur={metricas_db["segundos"] * 1000:.1f};desc="{metricas_db["consultas"]} consultas"',
+            )
+        return response
+
+    # Métricas del worker en formato Prometheus. Con gunicorn cada worker
+    # tiene las suyas: el pid va en cortate_proceso_info para distinguirlos
+    @app.route('/metrics')
+    def metrics():
+        if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+            return {"error": "No autorizado"}, 401
+        cuerpo = registro.exportar()
+        cuerpo += (f"# HELP cortate_proceso_info Worker que respondió\n"
+                   f"# TYPE cortate_proceso_info gauge\n"
+                   f'cortate_proceso_info{{pid="{os.getpid()}",muestreo="{METRICS_MUESTREO}"}} 1\n')
+        return Response(cuerpo, content_type="text/plain; version=0.0.4; charset=utf-8")
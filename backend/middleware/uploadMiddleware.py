@@ -1,26 +1,35 @@
 # cortate/backend/middleware/uploadMiddleware.py
 
-import os
-from werkzeug.utils import secure_filename
 from flask import request, jsonify
+from utils import imagenes
 
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+# Holgura para los encabezados multipart al comparar Content-Length con el tope
+MARGEN_MULTIPART = 64 * 1024
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def handle_upload(file_key):
+    """
+    Guarda la imagen del campo `file_key` bajo el hash de su contenido.
+    Devuelve (foto, None, None) con las URLs de utils.imagenes.describir, o
+    (None, respuesta de error, status).
+    """
+    # Se rechaza antes de leer el cuerpo si ya se sabe que excede el tope
+    if request.content_length and request.content_length > imagenes.UPLOAD_MAX_BYTES + MARGEN_MULTIPART:
+        return None, jsonify({"error": f"La imagen supera {imagenes.UPLOAD_MAX_BYTES // (1024 * 1024)} MB"}), 413
     if file_key not in request.files:
         return None, jsonify({"error": f"Archivo '{file_key}' no encontrado"}), 400
     file = request.files[file_key]
     if file.filename == '':
         return None, jsonify({"error": "Nombre de archivo vacío"}), 400
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        path = os.path.join(UPLOAD_FOLDER, filename)
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-        file.save(path)
-        return path, None, None
-    return None, jsonify({"error": "Formato no permitido"}), 400
+    if not allowed_file(file.filename):
+        return None, jsonify({"error": "Formato no permitido"}), 400
+    try:
+        return imagenes.guardar(file.stream), None, None
+    except imagenes.ArchivoDemasiadoGrande as e:
+        return None, jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return None, jsonify({"error": str(e)}), 400
@@ -14,6 +14,8 @@ class Barber(BaseModel):
     tipo_atencion: str  # 'local', 'domicilio' o 'mixto'
     descripcion: Optional[str] = None
     imagenes: List[str] = []
+    # Una por imagen subida: id (hash), original y URLs de las variantes
+    fotos: List[dict] = []
     creado_en: Optional[datetime] = Field(default_factory=datetime.utcnow)
 
     class Config:
@@ -6,4 +6,21 @@ class Revenue:
         self.barbero_id = barbero_id
         self.monto = monto
         self.servicio = servicio
-        self.fecha = fecha
+        self.fecha = fecha  # formato esperado: 'YYYY-MM-DD'
+
+    @classmethod
+    def from_dict(cls, data):
+        revenue = cls(data["barbero_id"], data["monto"], data.get("servicio"), data["fecha"])
+        revenue.id = data.get("_id")
+        return revenue
+
+    def to_dict(self):
+        documento = {
+            "barbero_id": self.barbero_id,
+            "monto": self.monto,
+            "servicio": self.servicio,
+            "fecha": self.fecha,
+        }
+        if self.id is not None:
+            documento["_id"] = self.id
+        return documento
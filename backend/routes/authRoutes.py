@@ -1,9 +1,10 @@
 # cortate/backend/routes/authRoutes.py
 
 from flask import Blueprint
+from controllers.authController import auth_controller
 
-auth_bp = Blueprint('auth', __name__)
+# Registrar blueprint para rutas de autenticación
+auth_bp = Blueprint('auth_bp', __name__)
 
-@auth_bp.route('/login', methods=['POST'])
-def login():
-    return {"message": "Login route works"}
+# Enlazar rutas del controller
+auth_bp.register_blueprint(auth_controller, url_prefix="/")
@@ -0,0 +1,10 @@
+# cortate/backend/routes/dashboardRoutes.py
+
+from flask import Blueprint
+from controllers.dashboardController import dashboard_bp as dashboard_controller
+
+# Blueprint general para el dashboard de barberos
+dashboard_bp = Blueprint('dashboard_bp', __name__)
+
+# Enlazar rutas
+dashboard_bp.register_blueprint(dashboard_controller, url_prefix="/")
@@ -0,0 +1,10 @@
+# cortate/backend/routes/streamRoutes.py
+
+from flask import Blueprint
+from controllers.streamController import stream_controller
+
+# Blueprint general para eventos en vivo
+stream_bp = Blueprint('stream_bp', __name__)
+
+# Enlazar rutas
+stream_bp.register_blueprint(stream_controller, url_prefix="/")
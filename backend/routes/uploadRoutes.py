@@ -0,0 +1,10 @@
+# cortate/backend/routes/uploadRoutes.py
+
+from flask import Blueprint
+from controllers.uploadController import upload_controller
+
+# Blueprint general para archivos subidos
+upload_bp = Blueprint('upload_bp', __name__)
+
+# Enlazar rutas
+upload_bp.register_blueprint(upload_controller, url_prefix="/")
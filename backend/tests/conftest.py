@@ -0,0 +1,43 @@
+# cortate/backend/tests/conftest.py
+#
+# Pruebas de regresión con MongoDB en memoria (mongomock, como el benchmark
+# --memoria) y la app en proceso.
+#
+#   cd backend
+#   pip install -r tests/requirements.txt
+#   python -m pytest tests
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("mongomock")
+
+from bench import stubs
+
+# Las variables se leen al importar los módulos: van antes de importar la app.
+# Sin hilos de trabajos: las pruebas no dependen de tareas en segundo plano
+os.environ.setdefault("TRABAJOS_HABILITADOS", "0")
+stubs.usar_mongo_en_memoria()
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app as aplicacion
+    return aplicacion
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def _base_limpia():
+    yield
+    from config.database import db
+    for nombre in db.list_collection_names():
+        db[nombre].delete_many({})
@@ -0,0 +1,40 @@
+# cortate/backend/tests/test_agenda.py
+
+import pytest
+from bson import ObjectId
+from config.database import bookings_collection
+
+
+@pytest.fixture
+def barbero_id():
+    barbero_id = str(ObjectId())
+    bookings_collection.insert_many([
+        {"barbero_id": barbero_id, "cliente_id": str(ObjectId()), "fecha": fecha, "hora": "10:00", "estado": "confirmada"}
+        for fecha in ("2026-01-05", "2026-01-20", "2026-02-03")
+    ])
+    return barbero_id
+
+
+def _fechas(respuesta):
+    return [r["fecha"] for r in respuesta.get_json()["reservas"]]
+
+
+def test_rango_de_fechas(cliente, barbero_id):
+    respuesta = cliente.get(f"/api/bookings/barbero/{barbero_id}?desde=2026-01-06&hasta=2026-02-03")
+    assert respuesta.status_code == 200
+    assert _fechas(respuesta) == ["2026-01-20", "2026-02-03"]
+
+
+def test_fecha_sin_ceros_se_normaliza(cliente, barbero_id):
+    # Comparada como texto, '2026-1-6' quedaría después de '2026-01-xx'
+    respuesta = cliente.get(f"/api/bookings/barbero/{barbero_id}?desde=2026-1-6")
+    assert _fechas(respuesta) == ["2026-01-20", "2026-02-03"]
+
+
+@pytest.mark.parametrize("consulta", [
+    "desde=mañana", "hasta=2026-13-01", "desde=2026-02-30", "desde=20260105",
+    "desde=2026-02-01&hasta=2026-01-01",
+])
+def test_rango_invalido(cliente, barbero_id, consulta):
+    respuesta = cliente.get(f"/api/bookings/barbero/{barbero_id}?{consulta}")
+    assert respuesta.status_code == 400
@@ -0,0 +1,29 @@
+# cortate/backend/tests/test_auth.py
+
+import pytest
+
+CUERPOS_INVALIDOS = [
+    [1, 2],
+    "texto",
+    {"email": 5, "password": "secreto123"},
+    {"email": {"$gt": ""}, "password": "secreto123"},
+    {"email": "ana@cortate.cl", "password": 12345678},
+    {"email": "ana@cortate.cl", "password": ["secreto123"]},
+    {"email": "ana@cortate.cl", "password": False},
+]
+
+
+@pytest.mark.parametrize("ruta", ["/api/auth/register", "/api/auth/login", "/api/users/create"])
+@pytest.mark.parametrize("cuerpo", CUERPOS_INVALIDOS)
+def test_tipos_invalidos(cliente, ruta, cuerpo):
+    assert cliente.post(ruta, json=cuerpo).status_code == 400
+
+
+def test_registro_y_login(cliente):
+    datos = {"email": "Ana@Cortate.cl ", "password": "secreto123"}
+    assert cliente.post("/api/auth/register", json=datos).status_code == 201
+    assert cliente.post("/api/auth/register", json=datos).status_code == 409
+
+    respuesta = cliente.post("/api/auth/login", json={"email": "ana@cortate.cl", "password": "secreto123"})
+    assert respuesta.status_code == 200
+    assert cliente.post("/api/auth/login", json={"email": "ana@cortate.cl", "password": "otra"}).status_code == 401
@@ -0,0 +1,51 @@
+# cortate/backend/tests/test_barberos.py
+
+import pytest
+from utils.proyeccion import leer_proyeccion
+
+
+@pytest.fixture
+def barbero_id(cliente):
+    respuesta = cliente.post("/api/barbers/create", json={
+        "nombre": "Barbería Centro", "precio_corte": 8000, "tipo_atencion": "local",
+        "lat": -33.4372, "lng": -70.6506,
+    })
+    assert respuesta.status_code == 201
+    return respuesta.get_json()["_id"]
+
+
+@pytest.mark.parametrize("consulta", [
+    "lat=nan&lng=-70.65", "lat=-33.4&lng=inf", "lat=91&lng=0", "lat=0&lng=-181",
+    "lat=-33.4&lng=-70.65&radius_km=0", "lat=-33.4&lng=-70.65&radius_km=-3",
+    "lat=-33.4&lng=-70.65&radius_km=nan", "lat=-33.4&lng=-70.65&radius_km=inf",
+])
+def test_cercanos_parametros_invalidos(cliente, consulta):
+    assert cliente.get(f"/api/barbers/nearby?{consulta}").status_code == 400
+
+
+def test_cercanos(cliente, barbero_id):
+    respuesta = cliente.get("/api/barbers/nearby?lat=-33.44&lng=-70.65&radius_km=2")
+    assert respuesta.status_code == 200
+    assert [b["_id"] for b in respuesta.get_json()] == [barbero_id]
+
+
+@pytest.mark.parametrize("campos, esperado", [
+    ("ubicacion,ubicacion.coordinates,nombre", {"ubicacion": 1, "nombre": 1}),
+    ("ubicacion.coordinates,ubicacion", {"ubicacion": 1}),
+    ("a.b.c,a.b,a.bc", {"a.b": 1, "a.bc": 1}),
+])
+def test_proyeccion_sin_colision_de_rutas(app, campos, esperado):
+    with app.test_request_context(f"/?fields={campos}"):
+        assert leer_proyeccion("barberos") == esperado
+
+
+def test_etag_cambia_tras_actualizar_con_id_en_mayusculas(cliente, barbero_id):
+    ruta = f"/api/barbers/{barbero_id.upper()}"
+    primera = cliente.get(ruta)
+    assert primera.status_code == 200
+
+    cliente.put(f"/api/barbers/update/{barbero_id}", json={"nombre": "Barbería Norte"})
+
+    segunda = cliente.get(ruta, headers={"If-None-Match": primera.headers["ETag"]})
+    assert segunda.status_code == 200
+    assert segunda.get_json()["nombre"] == "Barbería Norte"
@@ -0,0 +1,85 @@
+# cortate/backend/tests/test_cache_documentos.py
+
+import mongomock
+import pytest
+from utils import cache
+from utils.cache_documentos import BackendMemoria, CacheDocumentos, CACHE_L1_TTL
+
+
+class Reloj:
+    """Reemplaza a time.monotonic en utils.cache para vencer TTLs sin esperar."""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(cache, "time", reloj)
+    return reloj
+
+
+@pytest.fixture
+def coleccion():
+    return mongomock.MongoClient().db.barberos
+
+
+def _workers(coleccion):
+    # Dos caches sobre el mismo backend se comportan como dos workers
+    compartido = BackendMemoria()
+    return CacheDocumentos(coleccion, "barberos", compartido), CacheDocumentos(coleccion, "barberos", compartido)
+
+
+def test_lectura_desde_el_compartido(coleccion, reloj):
+    a, b = _workers(coleccion)
+    _id = coleccion.insert_one({"nombre": "Antes"}).inserted_id
+
+    assert a.obtener(str(_id))["nombre"] == "Antes"
+    assert b.obtener(str(_id))["nombre"] == "Antes"
+    assert (a.lecturas_db, b.lecturas_db, b.aciertos_compartido) == (1, 0, 1)
+
+
+def test_invalidacion_de_un_worker_la_ve_el_otro(coleccion, reloj):
+    a, b = _workers(coleccion)
+    _id = coleccion.insert_one({"nombre": "Antes"}).inserted_id
+    a.obtener(str(_id))
+    b.obtener(str(_id))
+
+    coleccion.update_one({"_id": _id}, {"$set": {"nombre": "Después"}})
+    a.invalidar(str(_id))
+
+    # La copia local de b vive a lo más CACHE_L1_TTL segundos
+    assert b.obtener(str(_id))["nombre"] == "Antes"
+    reloj.ahora += CACHE_L1_TTL + 1
+    assert b.obtener(str(_id))["nombre"] == "Después"
+    assert b.lecturas_db == 1
+
+
+def test_invalidacion_con_otra_forma_del_id(coleccion, reloj):
+    a, b = _workers(coleccion)
+    _id = coleccion.insert_one({"nombre": "Antes"}).inserted_id
+    b.obtener(str(_id).upper())
+
+    coleccion.update_one({"_id": _id}, {"$set": {"nombre": "Después"}})
+    a.invalidar(_id)
+
+    reloj.ahora += CACHE_L1_TTL + 1
+    assert b.obtener(str(_id))["nombre"] == "Después"
+
+
+def test_limpiar_vacia_el_compartido(coleccion, reloj):
+    a, b = _workers(coleccion)
+    ids = [coleccion.insert_one({"nombre": f"b{i}"}).inserted_id for i in range(3)]
+    for _id in ids:
+        a.obtener(str(_id))
+
+    b.limpiar()
+
+    reloj.ahora += CACHE_L1_TTL + 1
+    for _id in ids:
+        b.obtener(str(_id))
+    assert (b.aciertos_compartido, b.lecturas_db) == (0, 3)
@@ -0,0 +1,48 @@
+# cortate/backend/tests/test_clusters.py
+
+import pytest
+from utils.clusters import IndiceClusters
+
+# Fiyi a ambos lados del antimeridiano y Santiago
+PUNTOS = {"a" * 24: (-17.5, 178.0), "b" * 24: (-17.6, -179.0), "c" * 24: (-33.4, -70.6)}
+
+
+@pytest.fixture
+def indice():
+    indice = IndiceClusters()
+    for _id, (lat, lng) in PUNTOS.items():
+        indice.agregar(_id, lat, lng)
+    return indice
+
+
+def _ids(clusters):
+    return sorted(c["barbero_id"] for c in clusters)
+
+
+@pytest.mark.parametrize("zoom", [2, 12])
+def test_bbox_que_cruza_el_antimeridiano(indice, zoom):
+    _, clusters = indice.consultar(170, -20, -170, -10, zoom)
+    assert _ids(clusters) == ["a" * 24, "b" * 24]
+
+
+def test_bbox_que_da_la_vuelta_completa(indice):
+    _, clusters = indice.consultar(10, -90, 9.9999, 90, 12)
+    assert _ids(clusters) == sorted(PUNTOS)
+
+
+def test_bbox_normal(indice):
+    _, clusters = indice.consultar(-75, -35, -70, -30, 12)
+    assert _ids(clusters) == ["c" * 24]
+
+
+@pytest.mark.parametrize("bbox", [
+    "nan,0,1,1", "0,0,inf,1", "-181,0,0,1", "0,-91,1,0", "0,10,1,5", "1,2,3",
+])
+def test_bbox_invalido(cliente, bbox):
+    respuesta = cliente.get(f"/api/barbers/clusters?bbox={bbox}&zoom=10")
+    assert respuesta.status_code == 400
+
+
+def test_bbox_antimeridiano_por_http(cliente):
+    respuesta = cliente.get("/api/barbers/clusters?bbox=170,-20,-170,-10&zoom=10")
+    assert respuesta.status_code == 200
@@ -0,0 +1,31 @@
+# cortate/backend/tests/test_dashboard.py
+
+from bson import ObjectId
+
+
+def _ingreso(barbero_id, **extra):
+    return {"barbero_id": barbero_id, "monto": 15000, "servicio": "corte", "fecha": "2026-03-10", **extra}
+
+
+def test_ingreso_ignora_id_del_cliente(cliente):
+    barbero_id = str(ObjectId())
+    _id = str(ObjectId())
+
+    primera = cliente.post("/api/ingresos", json=_ingreso(barbero_id, _id=_id))
+    segunda = cliente.post("/api/ingresos", json=_ingreso(barbero_id, _id=_id))
+
+    assert (primera.status_code, segunda.status_code) == (201, 201)
+    assert primera.get_json()["_id"] != _id
+    assert primera.get_json()["_id"] != segunda.get_json()["_id"]
+    totales = cliente.get(f"/api/dashboard/{barbero_id}").get_json()
+    assert totales["ingresos_totales"] == 30000
+
+
+def test_ingreso_invalido(cliente):
+    respuesta = cliente.post("/api/ingresos", json=_ingreso(str(ObjectId()), fecha="10/03/2026"))
+    assert respuesta.status_code == 400
+
+
+def test_rango_demasiado_largo(cliente):
+    respuesta = cliente.get(f"/api/dashboard/{ObjectId()}/rango?desde=2000-01-01&hasta=2026-01-01")
+    assert respuesta.status_code == 400
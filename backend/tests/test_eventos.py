@@ -0,0 +1,97 @@
+# cortate/backend/tests/test_eventos.py
+
+import os
+import threading
+
+import pytest
+from pymongo.errors import OperationFailure
+from utils import eventos
+
+
+def _nombres(cola):
+    nombres = []
+    while not cola.empty():
+        nombres.append(cola.get_nowait()[1])
+    return nombres
+
+
+@pytest.fixture
+def difusor(monkeypatch):
+    difusor = eventos.Difusor()
+    monkeypatch.setattr(eventos, "difusor", difusor)
+    return difusor
+
+
+@pytest.fixture
+def change_stream(monkeypatch):
+    # Como si el change stream de este proceso estuviera activo
+    fuente = eventos._Fuente()
+    fuente.modo, fuente._pid = "change_stream", os.getpid()
+    monkeypatch.setattr(eventos, "_fuente", fuente)
+    return fuente
+
+
+def test_reanudar_sin_suscriptores_en_el_medio(difusor):
+    cola = difusor.suscribir("b1")
+    difusor.publicar("b1", "reserva_creada", {})
+    ultimo = cola.get_nowait()[0]
+    difusor.desuscribir("b1", cola)
+
+    difusor.publicar("b1", "reserva_cancelada", {})
+
+    pendientes = difusor.pendientes_desde("b1", ultimo)
+    assert [e[1] for e in pendientes] == ["reserva_cancelada"]
+
+
+def test_id_de_otra_epoca_resincroniza(difusor):
+    difusor.publicar("b1", "reserva_creada", {})
+    assert difusor.pendientes_desde("b1", "otraepoca-1") is None
+    assert difusor.pendientes_desde("b1", "sin-numero") is None
+
+
+def test_eliminados_sin_pre_imagen_se_publican_localmente(difusor, change_stream):
+    cola = difusor.suscribir("b1")
+    change_stream.pre_imagenes = False
+
+    eventos.emitir("reservas", "insert", [{"_id": 1, "barbero_id": "b1"}])
+    eventos.emitir("reservas", "delete", [{"_id": 1, "barbero_id": "b1"}])
+
+    assert _nombres(cola) == ["reserva_cancelada"]
+
+
+def test_con_pre_imagen_el_change_stream_entrega_todo(difusor, change_stream):
+    cola = difusor.suscribir("b1")
+    change_stream.pre_imagenes = True
+
+    eventos.emitir("reservas", "delete", [{"_id": 1, "barbero_id": "b1"}])
+    assert _nombres(cola) == []
+
+    change_stream._despachar({"ns": {"coll": "reservas"}, "operationType": "delete",
+                              "fullDocumentBeforeChange": {"_id": 1, "barbero_id": "b1"}})
+    assert _nombres(cola) == ["reserva_cancelada"]
+
+
+class _BaseSinPreImagenes:
+    """MongoDB < 6: collMod no conoce changeStreamPreAndPostImages y es standalone."""
+
+    def __init__(self):
+        self.opciones_watch = None
+
+    def command(self, *args, **kwargs):
+        raise OperationFailure("BSON field 'changeStreamPreAndPostImages' is an unknown field", code=40415)
+
+    def watch(self, pipeline, **kwargs):
+        self.opciones_watch = kwargs
+        raise OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+
+
+def test_sin_pre_imagenes_abre_el_stream_sin_documento_previo(monkeypatch, caplog):
+    base = _BaseSinPreImagenes()
+    monkeypatch.setattr(eventos, "db", base)
+    fuente = eventos._Fuente()
+
+    fuente._escuchar(threading.Event())
+
+    assert fuente.pre_imagenes is False
+    assert base.opciones_watch["full_document_before_change"] is None
+    assert [r.levelname for r in caplog.records if r.name == "cortate.eventos"] == ["WARNING", "WARNING"]
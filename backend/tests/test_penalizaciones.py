@@ -0,0 +1,36 @@
+# cortate/backend/tests/test_penalizaciones.py
+
+import pytest
+from config.database import penalties_collection
+
+USUARIO = "65f0c0ffee0000000000c001"
+VALORES_INVALIDOS = ["abc", "12", -1, True, None, [3], {"$gt": 0}]
+
+
+@pytest.mark.parametrize("campo", ["puntos", "monto"])
+@pytest.mark.parametrize("valor", VALORES_INVALIDOS)
+def test_crear_con_numero_invalido(cliente, campo, valor):
+    respuesta = cliente.post("/api/penalties/create", json={"usuario_id": USUARIO, campo: valor})
+    assert respuesta.status_code == 400
+    assert penalties_collection.count_documents({}) == 0
+
+
+def test_crear_con_nan(cliente):
+    # json.dumps deja pasar NaN e Infinity como literales
+    for literal in ("NaN", "Infinity"):
+        respuesta = cliente.post("/api/penalties/create", data=f'{{"usuario_id": "{USUARIO}", "puntos": {literal}}}',
+                                 content_type="application/json")
+        assert respuesta.status_code == 400
+    assert penalties_collection.count_documents({}) == 0
+
+
+def test_lote_rechaza_solo_los_invalidos(cliente):
+    respuesta = cliente.post("/api/penalties/bulk", json=[
+        {"usuario_id": USUARIO, "puntos": 2, "monto": 1500},
+        {"usuario_id": USUARIO, "puntos": "abc"},
+        {"usuario_id": USUARIO, "monto": -1},
+    ])
+    assert respuesta.status_code == 207
+    assert respuesta.get_json()["insertados"] == 1
+    assert len(respuesta.get_json()["errores"]) == 2
+    assert penalties_collection.count_documents({}) == 1
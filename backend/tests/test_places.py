@@ -0,0 +1,23 @@
+# cortate/backend/tests/test_places.py
+
+import pytest
+from controllers import googlePlacesController as places
+
+
+@pytest.mark.parametrize("consulta", [
+    "location=nan,-70.65", "location=-33.4,inf", "location=91,0", "location=-33.4",
+    "location=-33.4,-70.65&radius=inf", "location=-33.4,-70.65&radius=1e400",
+    "location=-33.4,-70.65&radius=nan", "location=-33.4,-70.65&radius=0", "location=-33.4,-70.65&radius=-5",
+])
+def test_parametros_invalidos_sin_llamar_a_google(cliente, monkeypatch, consulta):
+    def no_llamar(clave):
+        raise AssertionError("No debería consultar Google Places")
+
+    monkeypatch.setattr(places, "_consultar_google", no_llamar)
+    assert cliente.get(f"/api/places/barberias?{consulta}").status_code == 400
+
+
+def test_clave_normaliza_radio_y_keyword():
+    celda, radio, keyword = places._clave("-33.4372,-70.6506", "1500.7", "  Barbería ")
+    assert (radio, keyword) == (1500, "barbería")
+    assert places._clave("-33.4372,-70.6506", 1500, "barbería")[0] == celda
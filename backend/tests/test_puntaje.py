@@ -0,0 +1,69 @@
+# cortate/backend/tests/test_puntaje.py
+
+import logging
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+from config.database import puntajes_collection, trabajos_collection
+from utils import puntaje, trabajos
+import utils.tareas  # noqa: F401  (registra las tareas)
+
+PERIODICO = "periodico:compactar_penalizaciones"
+
+
+@pytest.fixture
+def motor():
+    motor = trabajos._Motor()
+    motor.procesados = motor.fallidos = motor.reintentos = 0
+    return motor
+
+
+def test_momento_convierte_a_utc():
+    esperado = datetime(2026, 3, 10, 15, 0)
+    assert puntaje.momento("2026-03-10T12:00:00-03:00") == esperado
+    assert puntaje.momento(datetime(2026, 3, 10, 12, 0, tzinfo=timezone(timedelta(hours=-3)))) == esperado
+    assert puntaje.momento("2026-03-10T15:00:00Z") == esperado
+    assert puntaje.momento(esperado) == esperado
+
+
+def test_compactacion_programada_una_sola_vez():
+    trabajos._programar_periodicas()
+    trabajos._programar_periodicas()
+    assert trabajos_collection.count_documents({"tipo": "compactar_penalizaciones"}) == 1
+    assert trabajos_collection.find_one({"_id": PERIODICO})["estado"] == trabajos.PENDIENTE
+
+
+def test_compactacion_se_reprograma(motor):
+    trabajos._programar_periodicas()
+    motor._ejecutar(PERIODICO)
+
+    trabajo = trabajos_collection.find_one({"_id": PERIODICO})
+    assert trabajo["estado"] == trabajos.PENDIENTE
+    assert trabajo["disponible_en"] - trabajo["ejecutado_en"] == timedelta(hours=puntaje.PENALIZACION_COMPACTAR_CADA_H)
+    assert "finalizado_en" not in trabajo
+
+
+def test_compactacion_fallida_vuelve_a_su_turno(motor, monkeypatch):
+    trabajos._programar_periodicas()
+    trabajos_collection.update_one({"_id": PERIODICO}, {"$set": {"max_intentos": 1}})
+    monkeypatch.setattr(puntaje, "compactar", mock.Mock(side_effect=RuntimeError("sin base")))
+    motor._ejecutar(PERIODICO)
+
+    trabajo = trabajos_collection.find_one({"_id": PERIODICO})
+    assert (trabajo["estado"], trabajo["intentos"]) == (trabajos.PENDIENTE, 0)
+    assert trabajo["disponible_en"] > datetime.utcnow() + timedelta(hours=puntaje.PENALIZACION_COMPACTAR_CADA_H - 1)
+
+
+def test_aporte_descartado_se_registra(monkeypatch, caplog):
+    puntajes_collection.insert_one({"_id": "u1", "score": 1.0, "as_of": datetime.utcnow(), "version": 1})
+    # Simula una compactación que gana todas las carreras
+    falsa = mock.Mock(wraps=puntajes_collection)
+    falsa.update_one.return_value = mock.Mock(modified_count=0)
+    monkeypatch.setattr(puntaje, "puntajes_collection", falsa)
+
+    with caplog.at_level(logging.WARNING, logger="cortate.puntaje"):
+        puntaje.registrar([{"usuario_id": "u1", "puntos": 2, "generado_en": datetime.utcnow()}])
+
+    assert falsa.update_one.call_count == puntaje.REINTENTOS
+    assert "descartado" in caplog.text
@@ -0,0 +1,37 @@
+# cortate/backend/tests/test_reservas.py
+
+import pytest
+from config.database import bookings_collection
+from utils.disponibilidad import normalizar_reservas
+
+BARBERO = "65f0c0ffee0000000000b001"
+
+
+def _reservar(cliente, fecha, hora):
+    return cliente.post("/api/bookings/create", json={
+        "barbero_id": BARBERO, "cliente_id": "65f0c0ffee0000000000c001", "fecha": fecha, "hora": hora,
+    })
+
+
+@pytest.mark.parametrize("fecha, hora", [("2026-11-5", "9:00"), ("2026-11-05", "9:00"), ("2026-11-5", "09:00")])
+def test_forma_no_canonica_choca_con_la_canonica(cliente, fecha, hora):
+    assert _reservar(cliente, "2026-11-05", "09:00").status_code == 201
+    assert _reservar(cliente, fecha, hora).status_code == 409
+    assert bookings_collection.count_documents({"barbero_id": BARBERO}) == 1
+
+
+def test_reserva_se_guarda_en_forma_canonica(cliente):
+    respuesta = _reservar(cliente, "2026-11-5", "9:00")
+    assert respuesta.status_code == 201
+    assert (respuesta.get_json()["fecha"], respuesta.get_json()["hora"]) == ("2026-11-05", "09:00")
+
+
+def test_normalizar_reservas_existentes():
+    bookings_collection.insert_many([
+        {"barbero_id": BARBERO, "fecha": "2026-11-5", "hora": "9:00", "slot_activo": True},
+        {"barbero_id": BARBERO, "fecha": "ayer", "hora": "9:00", "slot_activo": True},
+    ])
+
+    assert normalizar_reservas() == (1, 0)
+    assert bookings_collection.count_documents({"fecha": "2026-11-05", "hora": "09:00"}) == 1
+    assert bookings_collection.count_documents({"fecha": "ayer"}) == 1
@@ -0,0 +1,68 @@
+# cortate/backend/tests/test_subidas.py
+
+import io
+import pytest
+from config.database import barbers_collection
+from utils import imagenes
+
+LIMITE = "--limite"
+PNG = b"\x89PNG\r\n\x1a\n"
+
+
+class Lectura(io.BytesIO):
+    """Cuerpo que cuenta cuántos bytes leyó el servidor."""
+
+    leidos = 0
+
+    def read(self, n=-1):
+        datos = super().read(n)
+        self.leidos += len(datos)
+        return datos
+
+    def readline(self, n=-1):
+        datos = super().readline(n)
+        self.leidos += len(datos)
+        return datos
+
+
+def _multipart(contenido):
+    return (f'{LIMITE}\r\nContent-Disposition: form-data; name="imagen"; filename="foto.png"\r\n'
+            f'Content-Type: image/png\r\n\r\n').encode() + contenido + f"\r\n{LIMITE}--\r\n".encode()
+
+
+@pytest.fixture
+def barbero_id():
+    return str(barbers_collection.insert_one({"nombre": "Barbero"}).inserted_id)
+
+
+@pytest.fixture(autouse=True)
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(imagenes, "UPLOAD_FOLDER", str(tmp_path))
+
+
+def test_subida_chunked_demasiado_grande_se_corta(cliente, barbero_id):
+    cuerpo = Lectura(_multipart(PNG + b"0" * (imagenes.UPLOAD_MAX_BYTES + 1024)))
+    respuesta = cliente.post(
+        f"/api/barbers/{barbero_id}/imagenes", input_stream=cuerpo,
+        headers={"Transfer-Encoding": "chunked", "Content-Type": "multipart/form-data; boundary=limite"},
+        environ_base={"wsgi.input_terminated": True},
+    )
+    assert respuesta.status_code == 413
+    # Werkzeug corta en MAX_CONTENT_LENGTH: nunca lee el archivo entero
+    assert cuerpo.leidos < len(cuerpo.getvalue())
+
+
+def test_subida_con_content_length_demasiado_grande(cliente, barbero_id):
+    respuesta = cliente.post(
+        f"/api/barbers/{barbero_id}/imagenes", data=_multipart(PNG + b"0" * (imagenes.UPLOAD_MAX_BYTES + 1024)),
+        headers={"Content-Type": "multipart/form-data; boundary=limite"},
+    )
+    assert respuesta.status_code == 413
+
+
+def test_subida_valida(cliente, barbero_id):
+    respuesta = cliente.post(
+        f"/api/barbers/{barbero_id}/imagenes", data=_multipart(PNG + b"0" * 1024),
+        headers={"Content-Type": "multipart/form-data; boundary=limite"},
+    )
+    assert respuesta.status_code in (200, 201)
@@ -0,0 +1,149 @@
+# cortate/backend/utils/buckets.py
+
+import logging
+import os
+from datetime import date, datetime, timedelta
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from config.database import dashboard_collection, lectura
+
+logger = logging.getLogger("cortate.buckets")
+
+GRANULARIDADES = ("dia", "semana", "mes")
+METRICAS = ("ingresos", "reservas", "penalizaciones", "puntos_penalizacion", "monto_penalizaciones")
+# Días máximos de un rango del dashboard (acota los ids que arma _ids_rango)
+RANGO_MAX_DIAS = int(os.getenv("DASHBOARD_RANGO_MAX_DIAS", 3 * 366))
+
+
+class RangoInvalido(ValueError):
+    pass
+
+
+def _a_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.strptime(valor, "%Y-%m-%d").date()
+
+
+def periodos(fecha):
+    """
+    Devuelve [(granularidad, periodo)] de una fecha: el día, el lunes de su
+    semana ISO y el mes.
+    """
+    fecha = _a_fecha(fecha)
+    lunes = fecha - timedelta(days=fecha.weekday())
+    return [
+        ("dia", fecha.isoformat()),
+        ("semana", lunes.isoformat()),
+        ("mes", fecha.strftime("%Y-%m")),
+    ]
+
+
+def _bucket_id(barbero_id, granularidad, periodo):
+    return f"{barbero_id}:{granularidad}:{periodo}"
+
+
+def registrar(barbero_id, fecha, **incrementos):
+    """
+    Suma los incrementos (p. ej. ingresos=15000, reservas=1) a los buckets
+    diario, semanal y mensual del barbero en una sola escritura por lotes.
+    """
+    registrar_lote([(barbero_id, fecha, incrementos)])
+
+
+def registrar_lote(eventos):
+    """
+    Como registrar() para muchos eventos (barbero_id, fecha, incrementos):
+    agrupa los incrementos por bucket y escribe todo en un solo bulk_write.
+    """
+    acumulados = {}
+    for barbero_id, fecha, incrementos in eventos:
+        if not barbero_id or not fecha:
+            continue
+        try:
+            fecha_periodos = periodos(fecha)
+        except (TypeError, ValueError):
+            # Datos antiguos con otro formato (p. ej. '05/11/2026'): no tienen
+            # bucket y no deben tumbar la escritura que ya se hizo
+            logger.warning("Fecha ilegible para buckets de %s: %r", barbero_id, fecha)
+            continue
+        for granularidad, periodo in fecha_periodos:
+            _id = _bucket_id(barbero_id, granularidad, periodo)
+            bucket = acumulados.setdefault(_id, ({}, {"barbero_id": barbero_id, "granularidad": granularidad, "periodo": periodo}))
+            for metrica, valor in incrementos.items():
+                bucket[0][metrica] = bucket[0].get(metrica, 0) + valor
+    operaciones = [
+        UpdateOne({"_id": _id}, {"$inc": incrementos, "$setOnInsert": datos}, upsert=True)
+        for _id, (incrementos, datos) in acumulados.items()
+    ]
+    if not operaciones:
+        return
+    try:
+        dashboard_collection.bulk_write(operaciones, ordered=False)
+    except BulkWriteError as e:
+        # Dos upserts concurrentes del primer evento de un bucket: el que
+        # pierde choca con el _id recién creado y al repetirlo lo actualiza.
+        # Sólo se repiten las operaciones que fallaron (las otras ya sumaron)
+        errores = e.details.get("writeErrors", [])
+        if not errores or any(error.get("code") != 11000 for error in errores):
+            raise
+        dashboard_collection.bulk_write([operaciones[error["index"]] for error in errores], ordered=False)
+
+
+def _sumar(buckets):
+    totales = dict.fromkeys(METRICAS, 0)
+    for bucket in buckets:
+        for metrica in METRICAS:
+            totales[metrica] += bucket.get(metrica, 0)
+    return totales
+
+
+def totales(barbero_id):
+    """
+    Totales históricos del barbero sumando sólo sus buckets mensuales.
+    """
+    return _sumar(lectura(dashboard_collection).find({"barbero_id": barbero_id, "granularidad": "mes"}))
+
+
+def _ids_rango(barbero_id, desde, hasta):
+    # Cubre [desde, hasta] con meses completos y días sueltos en los extremos
+    ids = []
+    dia = desde
+    while dia <= hasta:
+        inicio_mes = dia.day == 1
+        siguiente_mes = (dia.replace(day=28) + timedelta(days=4)).replace(day=1)
+        if inicio_mes and siguiente_mes - timedelta(days=1) <= hasta:
+            ids.append(_bucket_id(barbero_id, "mes", dia.strftime("%Y-%m")))
+            dia = siguiente_mes
+        else:
+            ids.append(_bucket_id(barbero_id, "dia", dia.isoformat()))
+            dia += timedelta(days=1)
+    return ids
+
+
+def totales_rango(barbero_id, desde, hasta):
+    """
+    Totales de un rango arbitrario de fechas uniendo buckets mensuales y
+    diarios, sin recorrer los registros originales.
+    """
+    desde, hasta = _a_fecha(desde), _a_fecha(hasta)
+    if desde > hasta:
+        raise RangoInvalido("'desde' debe ser anterior a 'hasta'")
+    if (hasta - desde).days >= RANGO_MAX_DIAS:
+        raise RangoInvalido(f"El rango no puede superar {RANGO_MAX_DIAS} días")
+    return _sumar(lectura(dashboard_collection).find({"_id": {"$in": _ids_rango(barbero_id, desde, hasta)}}))
+
+
+def serie(barbero_id, granularidad, desde, hasta):
+    """
+    Buckets de una granularidad entre dos fechas, ordenados por periodo.
+    """
+    inicio = dict(periodos(desde))[granularidad]
+    fin = dict(periodos(hasta))[granularidad]
+    cursor = lectura(dashboard_collection).find(
+        {"barbero_id": barbero_id, "granularidad": granularidad, "periodo": {"$gte": inicio, "$lte": fin}},
+        {"_id": 0, "barbero_id": 0, "granularidad": 0},
+    ).sort("periodo", 1)
+    return [{"periodo": b.pop("periodo"), **dict.fromkeys(METRICAS, 0), **b} for b in cursor]
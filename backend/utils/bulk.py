@@ -0,0 +1,87 @@
+# cortate/backend/utils/bulk.py
+
+from bson import ObjectId
+from flask import request
+from pymongo.errors import BulkWriteError
+from utils.helpers import normalizar_id
+
+BULK_MAX = 1000
+BATCH_MAX = 200
+
+
+def leer_lote():
+    """
+    Lee el cuerpo de un /bulk: una lista de documentos o {"items": [...]}.
+    Lanza ValueError si no es una lista válida o supera BULK_MAX.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list) or not data:
+        raise ValueError("Se espera una lista de documentos (o {\"items\": [...]})")
+    if len(data) > BULK_MAX:
+        raise ValueError(f"El lote no puede superar {BULK_MAX} documentos")
+    return data
+
+
+def insertar_lote(coleccion, documentos, validar=None, mensajes_duplicado=None):
+    """
+    Inserta los documentos con un solo insert_many sin orden: un error no
+    detiene al resto. `validar(doc)` puede normalizar el documento y devuelve
+    un mensaje de error o None. Devuelve (insertados, errores), donde cada
+    error es {"indice": i, "error": mensaje} con el índice del lote original.
+    """
+    validos, indices, errores = [], [], []
+    for i, documento in enumerate(documentos):
+        if not isinstance(documento, dict):
+            errores.append({"indice": i, "error": "El elemento debe ser un objeto"})
+            continue
+        error = validar(documento) if validar else None
+        if error:
+            errores.append({"indice": i, "error": error})
+            continue
+        validos.append(documento)
+        indices.append(i)
+
+    fallidos = set()
+    if validos:
+        try:
+            coleccion.insert_many(validos, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                fallidos.add(error["index"])
+                mensaje = (mensajes_duplicado or "Documento duplicado") if error.get("code") == 11000 else error.get("errmsg")
+                errores.append({"indice": indices[error["index"]], "error": mensaje})
+
+    insertados = [documento for j, documento in enumerate(validos) if j not in fallidos]
+    errores.sort(key=lambda e: e["indice"])
+    return insertados, errores
+
+
+def respuesta_lote(insertados, errores):
+    """
+    Cuerpo y status de un /bulk: 201 si entró todo, 207 si hubo errores.
+    """
+    cuerpo = {
+        "insertados": len(insertados),
+        "ids": [str(d["_id"]) for d in insertados],
+        "errores": errores,
+    }
+    return cuerpo, 207 if errores else 201
+
+
+def leer_ids():
+    """
+    Lee ?ids=a,b,c como lista de ids (ObjectId válidos) sin repetir, en el
+    orden pedido.
+    Lanza ValueError si falta, hay ids inválidos o supera BATCH_MAX.
+    """
+    ids = [i.strip() for i in request.args.get("ids", "").split(",") if i.strip()]
+    if not ids:
+        raise ValueError("Parámetro 'ids' requerido")
+    if len(ids) > BATCH_MAX:
+        raise ValueError(f"No se pueden pedir más de {BATCH_MAX} ids")
+    invalidos = [i for i in ids if not ObjectId.is_valid(i)]
+    if invalidos:
+        raise ValueError(f"Ids inválidos: {', '.join(invalidos[:10])}")
+    return list(dict.fromkeys(normalizar_id(i) for i in ids))
@@ -0,0 +1,123 @@
+# cortate/backend/utils/busqueda.py
+
+import math
+import re
+import unicodedata
+
+# Peso de cada campo en la relevancia (los mismos que el índice de texto)
+PESOS = {"nombre": 10, "servicios": 5, "descripcion": 1}
+# Límites de los rangos de precio para las facetas (CLP)
+RANGOS_PRECIO = [0, 5000, 10000, 15000, 20000, 30000]
+
+_STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los", "para",
+    "por", "que", "se", "sin", "su", "sus", "un", "una", "y", "o",
+}
+_PALABRA = re.compile(r"\w+")
+
+
+def normalizar(texto):
+    """
+    Minúsculas y sin tildes: 'Peluquería' -> 'peluqueria'.
+    """
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def _raiz(palabra):
+    # Singular aproximado, para que 'cortes' coincida con 'corte'
+    if len(palabra) > 4 and palabra.endswith("es"):
+        return palabra[:-2]
+    if len(palabra) > 3 and palabra.endswith("s"):
+        return palabra[:-1]
+    return palabra
+
+
+def terminos(texto):
+    """
+    Tokens normalizados de un texto, sin stopwords.
+    """
+    return [_raiz(p) for p in _PALABRA.findall(normalizar(texto or "")) if p not in _STOPWORDS]
+
+
+def _texto_campo(valor):
+    if isinstance(valor, (list, tuple)):
+        return " ".join(str(v) for v in valor)
+    return str(valor) if valor is not None else ""
+
+
+def rango_precio(precio):
+    """
+    Límite inferior del rango de RANGOS_PRECIO que contiene el precio, o
+    'mas' si supera el último.
+    """
+    if not isinstance(precio, (int, float)) or precio < RANGOS_PRECIO[0]:
+        return None
+    for inferior, superior in zip(RANGOS_PRECIO, RANGOS_PRECIO[1:]):
+        if inferior <= precio < superior:
+            return inferior
+    return "mas"
+
+
+def formatear_rangos(conteos):
+    """
+    Convierte {limite_inferior | 'mas': cantidad} en la lista de rangos de la
+    respuesta, en orden y sólo con los rangos que tienen resultados.
+    """
+    rangos = []
+    for inferior, superior in zip(RANGOS_PRECIO, RANGOS_PRECIO[1:] + [None]):
+        cantidad = conteos.get(inferior if superior is not None else "mas", 0)
+        if cantidad:
+            rangos.append({"desde": inferior, "hasta": superior, "cantidad": cantidad})
+    return rangos
+
+
+class IndiceTexto:
+    """
+    Índice invertido en memoria (término -> {id: peso}) con ranking TF-IDF
+    ponderado por campo. Es el respaldo del índice de texto de MongoDB.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._terminos_doc = {}
+        self.datos = {}
+
+    def agregar(self, _id, documento, datos):
+        self.quitar(_id)
+        pesos = {}
+        for campo, peso in PESOS.items():
+            for termino in terminos(_texto_campo(documento.get(campo))):
+                pesos[termino] = pesos.get(termino, 0) + peso
+        for termino, peso in pesos.items():
+            self._postings.setdefault(termino, {})[_id] = peso
+        self._terminos_doc[_id] = list(pesos)
+        self.datos[_id] = datos
+
+    def quitar(self, _id):
+        for termino in self._terminos_doc.pop(_id, ()):
+            posting = self._postings.get(termino)
+            if posting is not None:
+                posting.pop(_id, None)
+                if not posting:
+                    del self._postings[termino]
+        self.datos.pop(_id, None)
+
+    def buscar(self, consulta, filtro=None):
+        """
+        Devuelve [(id, relevancia)] ordenado por relevancia. Sin consulta
+        devuelve todos los documentos que pasan el filtro con relevancia 0.
+        Un documento coincide si contiene alguno de los términos, como $text.
+        """
+        if not consulta or not terminos(consulta):
+            return [(i, 0.0) for i, d in self.datos.items() if filtro is None or filtro(d)]
+        total = len(self.datos) or 1
+        puntajes = {}
+        for termino in set(terminos(consulta)):
+            posting = self._postings.get(termino, {})
+            idf = math.log(1 + total / (1 + len(posting)))
+            for _id, peso in posting.items():
+                puntajes[_id] = puntajes.get(_id, 0.0) + peso * idf
+        resultados = [(i, p) for i, p in puntajes.items() if filtro is None or filtro(self.datos[i])]
+        resultados.sort(key=lambda r: (-r[1], r[0]))
+        return resultados
@@ -0,0 +1,117 @@
+# cortate/backend/utils/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+_VACIO = object()
+
+
+class CacheTTL:
+    """
+    Cache en memoria con expiración por TTL y desalojo LRU, segura entre hilos.
+    Lleva contadores de aciertos, fallos y desalojos.
+    """
+
+    def __init__(self, max_entradas=1000, ttl=300):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave, defecto=None):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave, _VACIO)
+            if entrada is not _VACIO and entrada[1] > ahora:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[0]
+            if entrada is not _VACIO:
+                del self._datos[clave]
+            self.fallos += 1
+            return defecto
+
+    def guardar(self, clave, valor, ttl=None):
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.desalojos += 1
+
+    def invalidar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def invalidar_prefijo(self, prefijo):
+        with self._lock:
+            for clave in [c for c in self._datos if isinstance(c, str) and c.startswith(prefijo)]:
+                del self._datos[clave]
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def estadisticas(self):
+        total = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._datos),
+            "max_entradas": self.max_entradas,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "desalojos": self.desalojos,
+            "tasa_aciertos": round(self.aciertos / total, 4) if total else 0.0,
+        }
+
+
+class _Vuelo:
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave: sólo la primera ejecuta la
+    función y las demás esperan y reciben su mismo resultado (o excepción).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vuelos = {}
+        self.agrupadas = 0
+
+    def ejecutar(self, clave, funcion):
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelos[clave] = _Vuelo()
+            else:
+                self.agrupadas += 1
+
+        if not lider:
+            vuelo.evento.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.resultado
+
+        try:
+            vuelo.resultado = funcion()
+            return vuelo.resultado
+        except Exception as e:
+            vuelo.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._vuelos[clave]
+            vuelo.evento.set()
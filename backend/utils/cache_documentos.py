@@ -0,0 +1,223 @@
+# cortate/backend/utils/cache_documentos.py
+
+import logging
+import os
+import threading
+import bson
+from bson import ObjectId
+from config.database import barbers_collection, users_collection
+from utils.cache import CacheTTL, SingleFlight
+from utils.proyeccion import aplicar_proyeccion
+from utils.helpers import normalizar_id
+
+try:
+    import redis
+except ImportError:  # redis es opcional
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_DOCUMENTOS_TTL = int(os.getenv("CACHE_DOCUMENTOS_TTL", 300))
+CACHE_DOCUMENTOS_MAX = int(os.getenv("CACHE_DOCUMENTOS_MAX", 5000))
+# '' (sólo en proceso), 'memoria' (sustituto para pruebas) o 'redis'
+CACHE_COMPARTIDO = os.getenv("CACHE_COMPARTIDO", "")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Con backend compartido la copia local vive poco: otro worker puede haber
+# invalidado el documento y sólo se entera al volver a leer el compartido
+CACHE_L1_TTL = int(os.getenv("CACHE_L1_TTL", 5))
+
+
+class BackendMemoria:
+    """
+    Backend compartido en memoria con la misma interfaz que BackendRedis.
+    Sirve para pruebas: varias instancias de CacheDocumentos que lo comparten
+    se comportan como workers distintos.
+    """
+
+    def __init__(self):
+        self._cache = CacheTTL(max_entradas=100000, ttl=CACHE_DOCUMENTOS_TTL)
+
+    def obtener(self, clave):
+        valor = self._cache.obtener(clave)
+        return None if valor is None else bson.decode(valor)
+
+    def guardar(self, clave, documento, ttl):
+        self._cache.guardar(clave, bson.encode(documento), ttl)
+
+    def invalidar(self, clave):
+        self._cache.invalidar(clave)
+
+    def limpiar(self, prefijo):
+        self._cache.invalidar_prefijo(prefijo)
+
+
+class BackendRedis:
+    """
+    Backend compartido en Redis; los documentos se guardan como BSON para
+    conservar ObjectId y fechas.
+    """
+
+    def __init__(self, url):
+        self._redis = redis.Redis.from_url(url)
+
+    def obtener(self, clave):
+        valor = self._redis.get(clave)
+        return None if valor is None else bson.decode(valor)
+
+    def guardar(self, clave, documento, ttl):
+        self._redis.set(clave, bson.encode(documento), ex=ttl)
+
+    def invalidar(self, clave):
+        self._redis.delete(clave)
+
+    def limpiar(self, prefijo):
+        claves = list(self._redis.scan_iter(match=f"{prefijo}*", count=500))
+        if claves:
+            self._redis.delete(*claves)
+
+
+def _crear_backend_compartido():
+    if CACHE_COMPARTIDO == "memoria":
+        return BackendMemoria()
+    if CACHE_COMPARTIDO == "redis":
+        if redis is None:
+            logger.warning("CACHE_COMPARTIDO=redis pero el paquete 'redis' no está instalado; se usa sólo el cache local")
+            return None
+        return BackendRedis(REDIS_URL)
+    return None
+
+
+class CacheDocumentos:
+    """
+    Cache read-through de documentos por _id: primero el cache local (TTL/LRU),
+    luego el backend compartido (si hay) y por último MongoDB. Las escrituras
+    deben llamar a invalidar() con el _id modificado.
+    """
+
+    def __init__(self, coleccion, nombre, compartido=None, ttl=CACHE_DOCUMENTOS_TTL, max_entradas=CACHE_DOCUMENTOS_MAX):
+        self.coleccion = coleccion
+        self.nombre = nombre
+        self.ttl = ttl
+        self.compartido = compartido
+        ttl_local = min(ttl, CACHE_L1_TTL) if compartido is not None else ttl
+        self.local = CacheTTL(max_entradas=max_entradas, ttl=ttl_local)
+        self._vuelos = SingleFlight()
+        self._lock = threading.Lock()
+        # Cambia con cada invalidación; una lectura que empezó antes no guarda
+        # su resultado para no reinstalar una versión vieja del documento
+        self._generacion = 0
+        self.aciertos_compartido = 0
+        self.errores_compartido = 0
+        self.lecturas_db = 0
+
+    def _clave(self, documento_id):
+        # Lecturas e invalidaciones deben dar la misma clave aunque el id
+        # venga como ObjectId o con otra capitalización
+        return f"cortate:{self.nombre}:{normalizar_id(documento_id)}"
+
+    def obtener(self, documento_id, proyeccion=None):
+        """
+        Devuelve el documento (con la proyección aplicada) o None si no existe.
+        """
+        clave = self._clave(documento_id)
+        documento = self.local.obtener(clave)
+        if documento is None:
+            documento = self._vuelos.ejecutar(clave, lambda: self._cargar(clave, documento_id))
+        if documento is None:
+            return None
+        return aplicar_proyeccion(documento, proyeccion) if proyeccion else dict(documento)
+
+    def obtener_varios(self, ids, proyeccion=None):
+        """
+        Devuelve {id: documento} para los ids encontrados. Los que no están en
+        el cache local se leen con una sola consulta $in.
+        """
+        encontrados, faltantes = {}, []
+        for documento_id in map(normalizar_id, ids):
+            documento = self.local.obtener(self._clave(documento_id))
+            if documento is None:
+                faltantes.append(documento_id)
+            else:
+                encontrados[documento_id] = documento
+        if faltantes:
+            generacion = self._generacion
+            self.lecturas_db += 1
+            for documento in self.coleccion.find({"_id": {"$in": [ObjectId(i) for i in faltantes]}}):
+                documento_id = str(documento["_id"])
+                self._guardar_local(self._clave(documento_id), documento, generacion)
+                encontrados[documento_id] = documento
+        return {
+            documento_id: aplicar_proyeccion(documento, proyeccion) if proyeccion else dict(documento)
+            for documento_id, documento in encontrados.items()
+        }
+
+    def _cargar(self, clave, documento_id):
+        generacion = self._generacion
+        if self.compartido is not None:
+            try:
+                documento = self.compartido.obtener(clave)
+            except Exception as e:
+                self.errores_compartido += 1
+                logger.warning("Cache compartido no disponible: %s", e)
+                documento = None
+            if documento is not None:
+                self.aciertos_compartido += 1
+                self._guardar_local(clave, documento, generacion)
+                return documento
+
+        self.lecturas_db += 1
+        documento = self.coleccion.find_one({"_id": ObjectId(documento_id)})
+        if documento is None:
+            return None
+        self._guardar_local(clave, documento, generacion)
+        if self.compartido is not None and generacion == self._generacion:
+            try:
+                self.compartido.guardar(clave, documento, self.ttl)
+            except Exception as e:
+                self.errores_compartido += 1
+                logger.warning("Cache compartido no disponible: %s", e)
+        return documento
+
+    def _guardar_local(self, clave, documento, generacion):
+        with self._lock:
+            if generacion == self._generacion:
+                self.local.guardar(clave, documento)
+
+    def invalidar(self, documento_id):
+        clave = self._clave(documento_id)
+        with self._lock:
+            self._generacion += 1
+            self.local.invalidar(clave)
+        if self.compartido is not None:
+            try:
+                self.compartido.invalidar(clave)
+            except Exception as e:
+                self.errores_compartido += 1
+                logger.warning("No se pudo invalidar el cache compartido: %s", e)
+
+    def limpiar(self):
+        with self._lock:
+            self._generacion += 1
+            self.local.limpiar()
+        if self.compartido is not None:
+            self.compartido.limpiar(self._clave(""))
+
+    def estadisticas(self):
+        local = self.local.estadisticas()
+        consultas = local["aciertos"] + local["fallos"]
+        return {
+            "coleccion": self.nombre,
+            "local": local,
+            "compartido": CACHE_COMPARTIDO or None,
+            "aciertos_compartido": self.aciertos_compartido,
+            "errores_compartido": self.errores_compartido,
+            "lecturas_db": self.lecturas_db,
+            "lecturas_agrupadas": self._vuelos.agrupadas,
+            # Aciertos en cualquiera de los dos niveles sobre el total de lecturas
+            "tasa_aciertos": round((local["aciertos"] + self.aciertos_compartido) / consultas, 4) if consultas else 0.0,
+        }
+
+
+_compartido = _crear_backend_compartido()
+barberos_cache = CacheDocumentos(barbers_collection, "barberos", _compartido)
+usuarios_cache = CacheDocumentos(users_collection, "usuarios", _compartido)
@@ -0,0 +1,132 @@
+# cortate/backend/utils/clusters.py
+
+import math
+
+ZOOM_MAX = 18
+# Tamaño de celda en píxeles de pantalla: 4 celdas por tile de 256 px
+CELDAS_POR_TILE = 4
+LAT_MAX_MERCATOR = 85.05112878
+
+
+def _mercator(lat, lng):
+    """
+    Proyecta (lat, lng) a coordenadas Web Mercator normalizadas en [0, 1).
+    """
+    lat = max(-LAT_MAX_MERCATOR, min(LAT_MAX_MERCATOR, lat))
+    x = (lng + 180.0) / 360.0
+    sen = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sen) / (1 - sen)) / (4 * math.pi)
+    return min(max(x, 0.0), 1 - 1e-12), min(max(y, 0.0), 1 - 1e-12)
+
+
+def _id_entero(_id):
+    # ObjectId en hex -> entero; el XOR de los ids de una celda con un solo
+    # punto es exactamente el id de ese punto
+    try:
+        return int(_id, 16)
+    except ValueError:
+        return hash(_id)
+
+
+class IndiceClusters:
+    """
+    Grilla jerárquica por nivel de zoom sobre Web Mercator. Cada celda guarda
+    cantidad, suma de coordenadas (para el centroide) y el XOR de los ids, y se
+    actualiza de forma incremental al agregar o quitar puntos.
+    """
+
+    def __init__(self, zoom_max=ZOOM_MAX):
+        self.zoom_max = zoom_max
+        self.niveles = [{} for _ in range(zoom_max + 1)]
+        self.puntos = {}
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.puntos)
+
+    def _celdas(self, lat, lng):
+        x, y = _mercator(lat, lng)
+        for zoom in range(self.zoom_max + 1):
+            n = CELDAS_POR_TILE << zoom
+            yield zoom, (int(x * n), int(y * n))
+
+    def agregar(self, _id, lat, lng):
+        self.quitar(_id)
+        clave_id = _id_entero(_id)
+        self.puntos[_id] = (lat, lng)
+        self.ids[clave_id] = _id
+        for zoom, celda in self._celdas(lat, lng):
+            datos = self.niveles[zoom].get(celda)
+            if datos is None:
+                self.niveles[zoom][celda] = [1, lat, lng, clave_id]
+            else:
+                datos[0] += 1
+                datos[1] += lat
+                datos[2] += lng
+                datos[3] ^= clave_id
+
+    def quitar(self, _id):
+        punto = self.puntos.pop(_id, None)
+        if punto is None:
+            return
+        lat, lng = punto
+        clave_id = _id_entero(_id)
+        self.ids.pop(clave_id, None)
+        for zoom, celda in self._celdas(lat, lng):
+            datos = self.niveles[zoom][celda]
+            datos[0] -= 1
+            if datos[0] == 0:
+                del self.niveles[zoom][celda]
+            else:
+                datos[1] -= lat
+                datos[2] -= lng
+                datos[3] ^= clave_id
+
+    def consultar(self, oeste, sur, este, norte, zoom):
+        """
+        Devuelve los clusters visibles en el bbox para el nivel de zoom dado.
+        El costo depende de las celdas del viewport, no del total de puntos.
+        Con oeste > este el viewport cruza el antimeridiano.
+        """
+        zoom = max(0, min(int(zoom), self.zoom_max))
+        n = CELDAS_POR_TILE << zoom
+        x_min, y_min = _mercator(norte, oeste)
+        x_max, y_max = _mercator(sur, este)
+        cx_min, cx_max = int(x_min * n), int(x_max * n)
+        cy_min, cy_max = int(y_min * n), int(y_max * n)
+        if oeste <= este:
+            columnas = [(cx_min, cx_max)]
+        elif cx_max >= cx_min:
+            # Los dos tramos se tocan: el viewport da la vuelta completa
+            columnas = [(0, n - 1)]
+        else:
+            # Del oeste hasta lng 180 y desde lng -180 hasta el este
+            columnas = [(cx_min, n - 1), (0, cx_max)]
+
+        nivel = self.niveles[zoom]
+        area = sum(hasta - desde + 1 for desde, hasta in columnas) * (cy_max - cy_min + 1)
+        if area <= len(nivel):
+            candidatas = (
+                ((cx, cy), nivel.get((cx, cy)))
+                for desde, hasta in columnas
+                for cx in range(desde, hasta + 1)
+                for cy in range(cy_min, cy_max + 1)
+            )
+        else:
+            candidatas = (
+                (celda, datos) for celda, datos in nivel.items()
+                if cy_min <= celda[1] <= cy_max and any(desde <= celda[0] <= hasta for desde, hasta in columnas)
+            )
+
+        clusters = []
+        for _, datos in candidatas:
+            if not datos:
+                continue
+            cantidad, suma_lat, suma_lng, xor_ids = datos
+            if cantidad == 1:
+                _id = self.ids[xor_ids]
+                lat, lng = self.puntos[_id]
+                clusters.append({"lat": lat, "lng": lng, "count": 1, "barbero_id": _id})
+            else:
+                clusters.append({"lat": suma_lat / cantidad, "lng": suma_lng / cantidad, "count": cantidad})
+        return zoom, clusters
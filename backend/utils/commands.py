@@ -0,0 +1,87 @@
+# cortate/backend/utils/commands.py
+
+import click
+
+
+def register_commands(app):
+    """
+    Registra los comandos de mantenimiento (`flask <comando>`).
+    """
+
+    # --encolar deja el trabajo en la colección 'trabajos' para que lo
+    # ejecute un worker de la app en vez de este proceso
+    opcion_encolar = click.option("--encolar", is_flag=True, help="Lo ejecuta un worker en segundo plano.")
+
+    def _encolar(tipo):
+        from utils.trabajos import encolar
+        click.echo(f"Trabajo {tipo} encolado: {encolar(tipo)}")
+
+    @app.cli.command("reparar-ratings")
+    @opcion_encolar
+    def reparar_ratings(encolar):
+        """Reconstruye rating_sum, rating_count y rating_hist de los barberos."""
+        if encolar:
+            return _encolar("reconstruir_ratings")
+        from utils.ratings import reconstruir_ratings
+        actualizados = reconstruir_ratings()
+        click.echo(f"Ratings reconstruidos: {actualizados} barberos actualizados")
+
+    @app.cli.command("reparar-disponibilidad")
+    @opcion_encolar
+    def reparar_disponibilidad(encolar):
+        """Reconstruye los bitmaps de disponibilidad desde las reservas activas."""
+        if encolar:
+            return _encolar("reconstruir_disponibilidad")
+        from utils.disponibilidad import reconstruir_disponibilidad
+        dias = reconstruir_disponibilidad()
+        click.echo(f"Disponibilidad reconstruida: {dias} días")
+
+    @app.cli.command("normalizar-reservas")
+    def normalizar_reservas():
+        """Reescribe fecha y hora de las reservas antiguas a YYYY-MM-DD y HH:MM."""
+        from utils.disponibilidad import normalizar_reservas
+        normalizadas, conflictos = normalizar_reservas()
+        click.echo(f"Reservas normalizadas: {normalizadas} ({conflictos} dejaron de ocupar un bloque duplicado)")
+
+    @app.cli.command("compactar-penalizaciones")
+    @opcion_encolar
+    def compactar_penalizaciones(encolar):
+        """Recalcula y rebasa los puntajes de penalización (también corre sola cada PENALIZACION_COMPACTAR_CADA_H horas)."""
+        if encolar:
+            return _encolar("compactar_penalizaciones")
+        from utils.puntaje import compactar
+        resumen = compactar()
+        click.echo(f"Puntajes compactados: {resumen}")
+
+    @app.cli.command("trabajos")
+    @click.option("--reintentar", is_flag=True, help="Vuelve a encolar los trabajos fallidos.")
+    def trabajos(reintentar):
+        """Muestra los trabajos en segundo plano por tipo y estado."""
+        from datetime import datetime
+        from config.database import trabajos_collection
+        from utils.trabajos import FALLIDO, PENDIENTE
+        if reintentar:
+            resultado = trabajos_collection.update_many(
+                {"estado": FALLIDO},
+                {"$set": {"estado": PENDIENTE, "intentos": 0, "disponible_en": datetime.utcnow()},
+                 "$unset": {"finalizado_en": ""}},
+            )
+            click.echo(f"Trabajos fallidos reencolados: {resultado.modified_count}")
+        conteos = trabajos_collection.aggregate([
+            {"$group": {"_id": {"tipo": "$tipo", "estado": "$estado"}, "n": {"$sum": 1}}},
+            {"$sort": {"_id.tipo": 1, "_id.estado": 1}},
+        ])
+        for fila in conteos:
+            click.echo(f"{fila['_id']['tipo']:<28}{fila['_id']['estado']:<12}{fila['n']}")
+
+    @app.cli.command("indices")
+    @click.option("--crear", is_flag=True, help="Crea los índices faltantes antes de comparar.")
+    def indices(crear):
+        """Muestra las diferencias entre los índices declarados y los existentes."""
+        from config.database import db
+        from config.indexes import asegurar_indices, detectar_deriva
+        reporte = asegurar_indices(db) if crear else detectar_deriva(db)
+        if not reporte:
+            click.echo("Índices al día")
+        for coleccion, diferencias in reporte.items():
+            click.echo(f"{coleccion}: {diferencias}")
@@ -0,0 +1,199 @@
+# cortate/backend/utils/disponibilidad.py
+
+import logging
+import os
+import re
+from datetime import timedelta
+from bson.int64 import Int64
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from config.database import disponibilidad_collection, bookings_collection
+from utils.helpers import formatear_fecha
+from utils import versiones
+
+logger = logging.getLogger("cortate.disponibilidad")
+
+# Duración de cada bloque de agenda. Con 30 minutos el día completo cabe en
+# 48 bits, dentro de un entero de 64 bits de MongoDB
+SLOT_MINUTOS = int(os.getenv("SLOT_MINUTOS", 30))
+if SLOT_MINUTOS < 30 or 1440 % SLOT_MINUTOS:
+    raise ValueError("SLOT_MINUTOS debe ser divisor de 1440 y mayor o igual a 30")
+SLOTS_POR_DIA = 1440 // SLOT_MINUTOS
+MASCARA_DIA = (1 << SLOTS_POR_DIA) - 1
+
+HORARIO_APERTURA = os.getenv("HORARIO_APERTURA", "09:00")
+HORARIO_CIERRE = os.getenv("HORARIO_CIERRE", "20:00")
+DIAS_MAX_CONSULTA = 62
+
+
+class SlotInvalido(ValueError):
+    pass
+
+
+def indice_slot(hora):
+    """
+    Convierte 'HH:MM' al índice de bloque del día. La hora debe caer justo
+    al inicio de un bloque.
+    """
+    try:
+        horas, minutos = (int(p) for p in hora.split(":"))
+    except (AttributeError, ValueError):
+        raise SlotInvalido("Hora inválida (HH:MM)")
+    total = horas * 60 + minutos
+    if not (0 <= horas < 24 and 0 <= minutos < 60) or total % SLOT_MINUTOS:
+        raise SlotInvalido(f"La hora debe coincidir con un bloque de {SLOT_MINUTOS} minutos")
+    return total // SLOT_MINUTOS
+
+
+def hora_slot(indice):
+    minutos = indice * SLOT_MINUTOS
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def _dia_id(barbero_id, fecha):
+    return f"{barbero_id}:{fecha}"
+
+
+def ocupar(barbero_id, fecha, hora):
+    """
+    Marca el bloque como ocupado en el bitmap del día (OR atómico).
+    """
+    ocupar_lote([(barbero_id, fecha, hora)])
+
+
+def ocupar_lote(bloques):
+    """
+    Marca muchos bloques (barbero_id, fecha, hora) con un OR por día en un
+    solo bulk_write.
+    """
+    mascaras = {}
+    for barbero_id, fecha, hora in bloques:
+        clave = (barbero_id, fecha)
+        mascaras[clave] = mascaras.get(clave, 0) | 1 << indice_slot(hora)
+    operaciones = [
+        UpdateOne(
+            {"_id": _dia_id(barbero_id, fecha)},
+            {"$bit": {"ocupados": {"or": Int64(mascara)}},
+             "$setOnInsert": {"barbero_id": barbero_id, "fecha": fecha}},
+            upsert=True,
+        )
+        for (barbero_id, fecha), mascara in mascaras.items()
+    ]
+    if operaciones:
+        disponibilidad_collection.bulk_write(operaciones, ordered=False)
+
+
+def liberar(barbero_id, fecha, hora):
+    """
+    Libera el bloque en el bitmap del día (AND atómico con la máscara inversa).
+    """
+    disponibilidad_collection.update_one(
+        {"_id": _dia_id(barbero_id, fecha)},
+        {"$bit": {"ocupados": {"and": Int64(MASCARA_DIA & ~(1 << indice_slot(hora)))}}},
+    )
+
+
+def consultar(barbero_id, desde, hasta):
+    """
+    Disponibilidad por día entre dos fechas leyendo sólo un bitmap por día.
+    """
+    inicio, fin = formatear_fecha(desde), formatear_fecha(hasta)
+    if inicio is None or fin is None or inicio > fin:
+        raise ValueError("Parámetros 'desde' y 'hasta' (YYYY-MM-DD) inválidos")
+    if (fin - inicio).days >= DIAS_MAX_CONSULTA:
+        raise ValueError(f"El rango no puede superar {DIAS_MAX_CONSULTA} días")
+
+    fechas = [(inicio + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((fin - inicio).days + 1)]
+    bitmaps = {
+        d["fecha"]: int(d.get("ocupados", 0))
+        for d in disponibilidad_collection.find({"_id": {"$in": [_dia_id(barbero_id, f) for f in fechas]}})
+    }
+    apertura, cierre = indice_slot(HORARIO_APERTURA), indice_slot(HORARIO_CIERRE)
+    dias = []
+    for fecha in fechas:
+        bitmap = bitmaps.get(fecha, 0)
+        ocupados = [hora_slot(i) for i in range(SLOTS_POR_DIA) if bitmap >> i & 1]
+        libres = [hora_slot(i) for i in range(apertura, cierre) if not bitmap >> i & 1]
+        dias.append({"fecha": fecha, "ocupados": ocupados, "libres": libres})
+    return dias
+
+
+def reconstruir_disponibilidad():
+    """
+    Reconstruye todos los bitmaps desde las reservas activas. Devuelve la
+    cantidad de días escritos.
+    """
+    bitmaps = {}
+    for reserva in bookings_collection.find({"slot_activo": True}, {"barbero_id": 1, "fecha": 1, "hora": 1}):
+        try:
+            bit = 1 << indice_slot(reserva["hora"])
+        except (KeyError, SlotInvalido):
+            continue
+        clave = (reserva["barbero_id"], reserva["fecha"])
+        bitmaps[clave] = bitmaps.get(clave, 0) | bit
+    operaciones = [
+        UpdateOne(
+            {"_id": _dia_id(barbero_id, fecha)},
+            {"$set": {"barbero_id": barbero_id, "fecha": fecha, "ocupados": Int64(bitmap)}},
+            upsert=True,
+        )
+        for (barbero_id, fecha), bitmap in bitmaps.items()
+    ]
+    if operaciones:
+        disponibilidad_collection.bulk_write(operaciones, ordered=False)
+    # Días que ya no tienen reservas activas
+    disponibilidad_collection.delete_many({"_id": {"$nin": [_dia_id(b, f) for b, f in bitmaps]}})
+    versiones.incrementar_coleccion("reservas")
+    return len(operaciones)
+
+
+def normalizar_reservas():
+    """
+    Reescribe fecha y hora de las reservas a 'YYYY-MM-DD' y 'HH:MM'. Si la
+    forma canónica choca con otra reserva activa del mismo bloque, la
+    reserva normalizada deja de ocupar el bloque (slot_activo se quita) para
+    que el índice único se pueda crear. Las que no se pueden interpretar se
+    dejan como están. Devuelve (normalizadas, en conflicto).
+    """
+    no_canonicas = {"$or": [
+        {"fecha": {"$not": re.compile(r"^\d{4}-\d{2}-\d{2}$")}},
+        {"hora": {"$not": re.compile(r"^\d{2}:\d{2}$")}},
+    ]}
+    normalizadas = conflictos = 0
+    for reserva in bookings_collection.find(no_canonicas, {"barbero_id": 1, "fecha": 1, "hora": 1, "slot_activo": 1}):
+        fecha = formatear_fecha(reserva.get("fecha"))
+        try:
+            hora = hora_slot(indice_slot(reserva.get("hora")))
+        except SlotInvalido:
+            hora = None
+        if fecha is None or hora is None:
+            logger.warning("Reserva %s con fecha u hora ilegible: %r %r",
+                           reserva["_id"], reserva.get("fecha"), reserva.get("hora"))
+            continue
+        cambios = {"$set": {"fecha": fecha.strftime("%Y-%m-%d"), "hora": hora}}
+        if reserva.get("slot_activo") and bookings_collection.count_documents({
+            "_id": {"$ne": reserva["_id"]}, "barbero_id": reserva.get("barbero_id"),
+            "fecha": cambios["$set"]["fecha"], "hora": hora, "slot_activo": True,
+        }, limit=1):
+            cambios["$unset"] = {"slot_activo": ""}
+            logger.warning("Reserva %s duplica el bloque %s %s de otra reserva", reserva["_id"],
+                           cambios["$set"]["fecha"], hora)
+        try:
+            bookings_collection.update_one({"_id": reserva["_id"]}, cambios)
+        except DuplicateKeyError:
+            # Otra reserva tomó el bloque canónico mientras tanto
+            if "$unset" in cambios:
+                logger.error("No se pudo normalizar la reserva %s", reserva["_id"])
+                continue
+            cambios["$unset"] = {"slot_activo": ""}
+            try:
+                bookings_collection.update_one({"_id": reserva["_id"]}, cambios)
+            except DuplicateKeyError:
+                logger.error("No se pudo normalizar la reserva %s", reserva["_id"])
+                continue
+        normalizadas += 1
+        conflictos += "$unset" in cambios
+    if normalizadas:
+        # Los bitmaps se indexan por la fecha canónica
+        reconstruir_disponibilidad()
+    return normalizadas, conflictos
@@ -0,0 +1,298 @@
+# cortate/backend/utils/eventos.py
+
+import collections
+import itertools
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from pymongo.errors import OperationFailure, PyMongoError
+from config.database import db
+from utils.json_provider import serializar_bson
+
+logger = logging.getLogger("cortate.eventos")
+
+# 'auto' usa change streams si la base los soporta (replica set o Atlas) y
+# si no publica desde el propio proceso; 'change_stream' o 'local' lo fuerzan
+EVENTOS_FUENTE = os.getenv("EVENTOS_FUENTE", "auto")
+# Eventos pendientes por suscriptor; un cliente más lento que esto se desconecta
+EVENTOS_COLA_MAX = int(os.getenv("EVENTOS_COLA_MAX", 100))
+# Eventos recientes por barbero para reanudar con Last-Event-ID, tenga o no
+# suscriptores en ese momento (un dashboard que reconecta no pierde nada)
+EVENTOS_HISTORIAL = int(os.getenv("EVENTOS_HISTORIAL", 50))
+# Barberos con historial en memoria; se descartan los menos recientes
+EVENTOS_HISTORIAL_BARBEROS = int(os.getenv("EVENTOS_HISTORIAL_BARBEROS", 5000))
+
+# Por colección: campo que identifica al barbero, campos publicados y nombre
+# del evento por operación
+COLECCIONES = {
+    "reservas": ("barbero_id", ("_id", "barbero_id", "cliente_id", "fecha", "hora", "estado"), "reserva"),
+    "reseñas": ("barbero_id", ("_id", "barbero_id", "cliente_id", "puntuacion", "comentario"), "resena"),
+    # Las penalizaciones del barbero se registran con usuario_id
+    "penalizaciones": ("usuario_id", ("_id", "usuario_id", "tipo", "puntos", "generado_en"), "penalizacion"),
+}
+OPERACIONES = {"insert": "creada", "update": "actualizada", "replace": "actualizada", "delete": "eliminada"}
+# Una reserva eliminada es una cancelación
+NOMBRES = {("reservas", "delete"): "reserva_cancelada"}
+
+# Marca para cerrar el stream de un suscriptor
+FIN = object()
+
+
+def describir(coleccion, operacion, documento):
+    """
+    (barbero_id, nombre del evento, datos) de una escritura, o None si no
+    corresponde a un barbero. Lo usan los controladores y el change stream.
+    """
+    campo, publicados, prefijo = COLECCIONES[coleccion]
+    barbero_id = documento.get(campo)
+    if not barbero_id:
+        return None
+    nombre = NOMBRES.get((coleccion, operacion), f"{prefijo}_{OPERACIONES[operacion]}")
+    return str(barbero_id), nombre, {k: documento[k] for k in publicados if k in documento}
+
+
+def secuencia(evento_id):
+    """
+    (época, número) de un id de evento '<época>-<número>', o None si no
+    tiene esa forma.
+    """
+    epoca, _, numero = (evento_id or "").rpartition("-")
+    if not epoca or not numero.isdigit():
+        return None
+    return epoca, int(numero)
+
+
+class Difusor:
+    """
+    Pub/sub en memoria: cada suscriptor tiene su propia cola y cada evento
+    se serializa una sola vez y se copia a las colas de su barbero.
+    Los ids llevan una época propia del proceso: un Last-Event-ID de otro
+    worker (o de antes de un reinicio) nunca coincide y se resincroniza.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self.publicados = 0
+        self.descartados = 0
+
+    def _asegurar_proceso(self):
+        # Con preload_app el difusor se crea en el maestro: cada worker
+        # empieza con su propia época, secuencia e historial
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._epoca = f"{os.getpid():x}{secrets.token_hex(3)}"
+            self._secuencia = itertools.count(1)
+            self._suscriptores = collections.defaultdict(set)
+            self._historial = collections.OrderedDict()
+
+    def suscribir(self, barbero_id):
+        cola = queue.Queue(maxsize=EVENTOS_COLA_MAX)
+        with self._lock:
+            self._asegurar_proceso()
+            self._suscriptores[barbero_id].add(cola)
+        return cola
+
+    def desuscribir(self, barbero_id, cola):
+        with self._lock:
+            self._asegurar_proceso()
+            suscriptores = self._suscriptores.get(barbero_id)
+            if suscriptores is not None:
+                suscriptores.discard(cola)
+                if not suscriptores:
+                    del self._suscriptores[barbero_id]
+
+    def pendientes_desde(self, barbero_id, ultimo_id):
+        """
+        Eventos posteriores a `ultimo_id` si siguen en el historial de este
+        proceso; None si no se puede asegurar que no falte ninguno (id de
+        otra época o ya fuera del historial).
+        """
+        with self._lock:
+            self._asegurar_proceso()
+            historial = list(self._historial.get(barbero_id, ()))
+            epoca = self._epoca
+        ultimo = secuencia(ultimo_id)
+        if ultimo is None or ultimo[0] != epoca:
+            return None
+        # El cliente recibió un evento de esta época para este barbero: si no
+        # hay historial se descartó, y si el historial está lleno y empieza
+        # después de `ultimo_id` se pudo perder alguno entre medio
+        if not historial:
+            return None
+        if len(historial) == EVENTOS_HISTORIAL and secuencia(historial[0][0])[1] > ultimo[1]:
+            return None
+        return [e for e in historial if secuencia(e[0])[1] > ultimo[1]]
+
+    def publicar(self, barbero_id, nombre, datos):
+        with self._lock:
+            self._asegurar_proceso()
+            evento = (f"{self._epoca}-{next(self._secuencia)}", nombre,
+                      json.dumps({"tipo": nombre, "barbero_id": barbero_id, "datos": datos},
+                                 default=serializar_bson, ensure_ascii=False))
+            historial = self._historial.get(barbero_id)
+            if historial is None:
+                historial = self._historial[barbero_id] = collections.deque(maxlen=EVENTOS_HISTORIAL)
+                if len(self._historial) > EVENTOS_HISTORIAL_BARBEROS:
+                    self._historial.popitem(last=False)
+            else:
+                self._historial.move_to_end(barbero_id)
+            historial.append(evento)
+            self.publicados += 1
+            suscriptores = list(self._suscriptores.get(barbero_id, ()))
+        for cola in suscriptores:
+            try:
+                cola.put_nowait(evento)
+            except queue.Full:
+                # Cliente atascado: se cierra y al reconectar se resincroniza
+                self.desuscribir(barbero_id, cola)
+                self.descartados += 1
+                _vaciar_y_cerrar(cola)
+
+    def estadisticas(self):
+        with self._lock:
+            self._asegurar_proceso()
+            return {
+                "barberos": len(self._suscriptores),
+                "suscriptores": sum(len(s) for s in self._suscriptores.values()),
+                "con_historial": len(self._historial),
+                "publicados": self.publicados,
+                "descartados": self.descartados,
+            }
+
+
+def _vaciar_y_cerrar(cola):
+    # Descarta lo pendiente para que FIN sea lo próximo que lea el stream
+    while True:
+        try:
+            while True:
+                cola.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            cola.put_nowait(FIN)
+            return
+        except queue.Full:
+            continue
+
+
+class _Fuente:
+    """
+    Alimenta el Difusor del proceso. Con change streams un solo cursor por
+    proceso cubre las tres colecciones (sin consultas por cliente) y ve las
+    escrituras de todos los workers; sin ellos, los controladores publican
+    con emitir() y sólo llegan a los suscriptores del mismo proceso.
+    """
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+        self.modo = None
+        # Si los 'delete' del change stream traen el documento previo
+        self.pre_imagenes = False
+
+    def asegurar(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self.modo = "local"
+                    if EVENTOS_FUENTE != "local":
+                        listo = threading.Event()
+                        threading.Thread(target=self._escuchar, args=(listo,), daemon=True,
+                                         name="eventos-change-stream").start()
+                        listo.wait(5)
+                    self._pid = os.getpid()
+        return self.modo
+
+    def _habilitar_pre_imagenes(self):
+        # Un 'delete' del change stream sólo trae el _id: sin el documento
+        # previo no se sabe de qué barbero era. collMod lo guarda (MongoDB 6+)
+        try:
+            for coleccion in COLECCIONES:
+                try:
+                    db.command("collMod", coleccion, changeStreamPreAndPostImages={"enabled": True})
+                except OperationFailure as e:
+                    if e.code != 26:  # NamespaceNotFound
+                        raise
+                    db.create_collection(coleccion, changeStreamPreAndPostImages={"enabled": True})
+        except PyMongoError as e:
+            logger.warning("Change streams sin documento previo (%s): los eliminados se publican "
+                           "sólo a los suscriptores del proceso que borra", e)
+            return False
+        return True
+
+    def _abrir(self, reanudar):
+        pipeline = [{"$match": {"ns.coll": {"$in": list(COLECCIONES)}, "operationType": {"$in": list(OPERACIONES)}}}]
+        # full_document_before_change hace fallar watch() antes de MongoDB 6
+        return db.watch(pipeline, full_document="updateLookup",
+                        full_document_before_change="whenAvailable" if self.pre_imagenes else None,
+                        resume_after=reanudar)
+
+    def _escuchar(self, listo):
+        reanudar = None
+        espera = 1
+        self.pre_imagenes = self._habilitar_pre_imagenes()
+        while True:
+            try:
+                with self._abrir(reanudar) as stream:
+                    self.modo = "change_stream"
+                    listo.set()
+                    espera = 1
+                    for cambio in stream:
+                        reanudar = stream.resume_token
+                        self._despachar(cambio)
+            except (OperationFailure, NotImplementedError) as e:
+                if self.modo != "change_stream":
+                    # Standalone o base sin soporte: quedan los eventos locales
+                    if EVENTOS_FUENTE == "change_stream":
+                        logger.error("Change streams no disponibles: %s", e)
+                    else:
+                        logger.warning("Change streams no disponibles, eventos sólo dentro de cada proceso: %s", e)
+                    listo.set()
+                    return
+                logger.warning("Change stream interrumpido, se reanuda: %s", e)
+            except PyMongoError as e:
+                logger.warning("Change stream interrumpido, se reanuda: %s", e)
+            time.sleep(espera)
+            espera = min(espera * 2, 30)
+
+    def _despachar(self, cambio):
+        coleccion = cambio["ns"]["coll"]
+        documento = cambio.get("fullDocument") or cambio.get("fullDocumentBeforeChange")
+        if documento is None:
+            return
+        evento = describir(coleccion, cambio["operationType"], documento)
+        if evento is not None:
+            difusor.publicar(*evento)
+
+
+difusor = Difusor()
+_fuente = _Fuente()
+
+
+def suscribir(barbero_id):
+    _fuente.asegurar()
+    return difusor.suscribir(barbero_id)
+
+
+def emitir(coleccion, operacion, documentos):
+    """
+    Publica las escrituras hechas por este proceso cuando no hay change
+    stream. Si lo hay, él entrega los eventos; los eliminados sólo cuando
+    trae el documento previo, si no se siguen publicando desde aquí.
+    """
+    if _fuente.modo == "change_stream" and _fuente._pid == os.getpid():
+        if operacion != "delete" or _fuente.pre_imagenes:
+            return
+    for documento in documentos:
+        evento = describir(coleccion, operacion, documento)
+        if evento is not None:
+            difusor.publicar(*evento)
+
+
+def estadisticas():
+    return {**difusor.estadisticas(), "fuente": _fuente.modo if _fuente._pid == os.getpid() else None}
@@ -1,6 +1,11 @@
 # cortate/backend/utils/geo.py
 
-from geopy.distance import geodesic
+import math
+import numpy as np
+
+RADIO_TIERRA_KM = 6371.0088
+KM_POR_GRADO = 111.32
+
 
 def calcular_distancia_km(coord1, coord2):
     """
@@ -8,7 +13,152 @@ def calcular_distancia_km(coord1, coord2):
     coord1 y coord2 deben ser tuplas: (latitud, longitud)
     """
     try:
-        return round(geodesic(coord1, coord2).km, 2)
+        distancia = haversine_km(coord1[0], coord1[1], np.array([coord2[0]]), np.array([coord2[1]]))
+        return round(float(distancia[0]), 2)
     except Exception as e:
         print(f"Error al calcular distancia: {e}")
         return None
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """
+    Distancia haversine en km desde (lat, lng) a cada punto de los arreglos
+    lats / lngs, calculada de forma vectorizada con NumPy.
+    """
+    lat1 = np.radians(lat)
+    lats2 = np.radians(lats)
+    dlat = lats2 - lat1
+    dlng = np.radians(lngs) - np.radians(lng)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lats2) * np.sin(dlng / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def leer_coordenadas(data):
+    """
+    Extrae (lat, lng) de un payload con 'lat'/'lng' o 'location': {lat, lng}.
+    Devuelve None si no vienen; lanza ValueError si están fuera de rango.
+    """
+    origen = data.get("location") if isinstance(data.get("location"), dict) else data
+    if origen.get("lat") is None or origen.get("lng") is None:
+        return None
+    lat, lng = float(origen["lat"]), float(origen["lng"])
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("Coordenadas fuera de rango")
+    return lat, lng
+
+
+def punto_geojson(lat, lng):
+    """
+    Punto GeoJSON (orden [lng, lat]) para el índice 2dsphere.
+    """
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+class IndiceGrilla:
+    """
+    Índice espacial en memoria: grilla de celdas de tamaño fijo en grados.
+    Se usa como respaldo cuando MongoDB no tiene índice 2dsphere.
+    """
+
+    def __init__(self, celda_grados=0.05):
+        self.celda = celda_grados
+        self.celdas = {}
+        self.puntos = {}
+
+    def _celda(self, lat, lng):
+        return (math.floor(lat / self.celda), math.floor(lng / self.celda))
+
+    def __len__(self):
+        return len(self.puntos)
+
+    def agregar(self, _id, lat, lng, datos=None):
+        self.quitar(_id)
+        clave = self._celda(lat, lng)
+        self.celdas.setdefault(clave, set()).add(_id)
+        self.puntos[_id] = (lat, lng, datos or {})
+
+    def quitar(self, _id):
+        punto = self.puntos.pop(_id, None)
+        if punto is None:
+            return
+        clave = self._celda(punto[0], punto[1])
+        celda = self.celdas.get(clave)
+        if celda is not None:
+            celda.discard(_id)
+            if not celda:
+                del self.celdas[clave]
+
+    def buscar(self, lat, lng, radio_km, limite, filtro=None):
+        """
+        Devuelve [(id, distancia_km)] de los `limite` puntos más cercanos dentro
+        de radio_km. `filtro` recibe los datos asociados y decide si se incluye.
+        """
+        dlat = radio_km / KM_POR_GRADO
+        dlng = radio_km / (KM_POR_GRADO * max(math.cos(math.radians(lat)), 1e-6))
+        fila_min, col_min = self._celda(lat - dlat, lng - dlng)
+        fila_max, col_max = self._celda(lat + dlat, lng + dlng)
+
+        ids, lats, lngs = [], [], []
+        for fila in range(fila_min, fila_max + 1):
+            for col in range(col_min, col_max + 1):
+                for _id in self.celdas.get((fila, col), ()):
+                    p_lat, p_lng, datos = self.puntos[_id]
+                    if filtro is None or filtro(datos):
+                        ids.append(_id)
+                        lats.append(p_lat)
+                        lngs.append(p_lng)
+        if not ids:
+            return []
+
+        distancias = haversine_km(lat, lng, np.array(lats), np.array(lngs))
+        dentro = np.nonzero(distancias <= radio_km)[0]
+        if len(dentro) > limite:
+            # Top-k sin ordenar todo el arreglo
+            dentro = dentro[np.argpartition(distancias[dentro], limite - 1)[:limite]]
+        dentro = dentro[np.argsort(distancias[dentro])]
+        return [(ids[i], float(distancias[i])) for i in dentro]
+
+
+_BASE32_GEOHASH = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat, lng, precision=6):
+    """
+    Codifica (lat, lng) como geohash de `precision` caracteres.
+    """
+    rango_lat, rango_lng = [-90.0, 90.0], [-180.0, 180.0]
+    codigo, bits, valor, par = [], 0, 0, True
+    while len(codigo) < precision:
+        rango, coordenada = (rango_lng, lng) if par else (rango_lat, lat)
+        medio = (rango[0] + rango[1]) / 2
+        valor <<= 1
+        if coordenada >= medio:
+            valor |= 1
+            rango[0] = medio
+        else:
+            rango[1] = medio
+        par = not par
+        bits += 1
+        if bits == 5:
+            codigo.append(_BASE32_GEOHASH[valor])
+            bits, valor = 0, 0
+    return "".join(codigo)
+
+
+def centro_geohash(codigo):
+    """
+    Devuelve el centro (lat, lng) de la celda de un geohash.
+    """
+    rango_lat, rango_lng = [-90.0, 90.0], [-180.0, 180.0]
+    par = True
+    for caracter in codigo:
+        valor = _BASE32_GEOHASH.index(caracter)
+        for desplazamiento in range(4, -1, -1):
+            rango = rango_lng if par else rango_lat
+            medio = (rango[0] + rango[1]) / 2
+            if (valor >> desplazamiento) & 1:
+                rango[0] = medio
+            else:
+                rango[1] = medio
+            par = not par
+    return (rango_lat[0] + rango_lat[1]) / 2, (rango_lng[0] + rango_lng[1]) / 2
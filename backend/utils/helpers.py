@@ -19,6 +19,32 @@ def formatear_fecha(fecha):
     except:
         return None
 
+def normalizar_id(valor):
+    """
+    Forma canónica de un id para claves de cache y de versión: un ObjectId
+    (o su hex en cualquier capitalización) como str(ObjectId(...)); otros
+    valores como texto tal cual.
+    """
+    if isinstance(valor, ObjectId):
+        return str(valor)
+    valor = str(valor)
+    if len(valor) == 24 and ObjectId.is_valid(valor):
+        return str(ObjectId(valor))
+    return valor
+
+def validar_credenciales(data):
+    """
+    Mensaje de error si el body no es un objeto JSON o si 'email' o
+    'password' vienen y no son texto; None si están bien.
+    """
+    if not isinstance(data, dict):
+        return "El cuerpo debe ser un objeto JSON"
+    if data.get("email") is not None and not isinstance(data["email"], str):
+        return "El email debe ser texto"
+    if data.get("password") is not None and not isinstance(data["password"], str):
+        return "La contraseña debe ser texto"
+    return None
+
 def es_id_valido(id_str):
     """
     Verifica si un string es un ObjectId válido de MongoDB.
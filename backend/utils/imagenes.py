@@ -0,0 +1,199 @@
+# cortate/backend/utils/imagenes.py
+
+import hashlib
+import logging
+import os
+import tempfile
+from datetime import datetime
+from pymongo import ReturnDocument
+from config.database import imagenes_collection, barbers_collection
+from utils.cache_documentos import barberos_cache
+from utils import versiones
+from utils.trabajos import encolar
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # está en requirements.txt; sin él (desarrollo local) se sirve sólo el original
+    Image = None
+
+logger = logging.getLogger("cortate.imagenes")
+
+UPLOAD_FOLDER = os.path.abspath(os.getenv("UPLOAD_FOLDER", "uploads"))
+# Prefijo público de los archivos (p. ej. la URL de un CDN delante de /uploads)
+UPLOAD_URL = os.getenv("UPLOAD_URL", "/uploads").rstrip("/")
+UPLOAD_MAX_BYTES = int(float(os.getenv("UPLOAD_MAX_MB", 5)) * 1024 * 1024)
+UPLOAD_BLOQUE = 64 * 1024
+# Lado máximo por variante; cada una se genera en el formato original y en WebP
+VARIANTES = {"miniatura": 320, "mediana": 1024}
+JPEG_CALIDAD = int(os.getenv("JPEG_CALIDAD", 85))
+WEBP_CALIDAD = int(os.getenv("WEBP_CALIDAD", 80))
+
+# Formato según los primeros bytes; el nombre que manda el cliente no cuenta
+FIRMAS = ((b"\x89PNG\r\n\x1a\n", "png"), (b"\xff\xd8\xff", "jpg"))
+FORMATOS_PIL = {"png": "PNG", "jpg": "JPEG", "webp": "WEBP"}
+OPCIONES_PIL = {
+    "png": {"optimize": True},
+    "jpg": {"quality": JPEG_CALIDAD, "optimize": True, "progressive": True},
+    "webp": {"quality": WEBP_CALIDAD, "method": 4},
+}
+
+PENDIENTE, LISTA, SIN_VARIANTES = "pendiente", "lista", "sin_variantes"
+
+
+class ArchivoDemasiadoGrande(ValueError):
+    pass
+
+
+def _formato(cabecera):
+    for firma, extension in FIRMAS:
+        if cabecera.startswith(firma):
+            return extension
+    raise ValueError("Formato no permitido (PNG o JPEG)")
+
+
+def _relativa(imagen_id, extension, variante=None):
+    # Dos niveles para no juntar miles de archivos en un directorio
+    if variante:
+        return f"{imagen_id[:2]}/{imagen_id}/{variante}.{extension}"
+    return f"{imagen_id[:2]}/{imagen_id}.{extension}"
+
+
+def _ruta(relativa):
+    return os.path.join(UPLOAD_FOLDER, *relativa.split("/"))
+
+
+def _url(relativa):
+    return f"{UPLOAD_URL}/{relativa}"
+
+
+def describir(imagen):
+    """
+    Lo que se guarda en barbero.fotos: id, URL del original y las URLs de
+    las variantes que ya existan.
+    """
+    return {"id": imagen["_id"], "original": _url(_relativa(imagen["_id"], imagen["ext"])),
+            **imagen.get("variantes", {})}
+
+
+def guardar(stream):
+    """
+    Copia el stream al disco por bloques calculando su SHA-256, sin tenerlo
+    entero en memoria, y lo deja en uploads/<hash>.<ext>: dos subidas del
+    mismo contenido comparten archivo. Encola las variantes si la imagen es
+    nueva. Lanza ValueError (o ArchivoDemasiadoGrande) si no se acepta.
+    """
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    digest = hashlib.sha256()
+    total = 0
+    extension = None
+    temporal = tempfile.NamedTemporaryFile(dir=UPLOAD_FOLDER, prefix=".subida-", delete=False)
+    try:
+        with temporal:
+            while True:
+                bloque = stream.read(UPLOAD_BLOQUE)
+                if not bloque:
+                    break
+                if extension is None:
+                    extension = _formato(bloque)
+                total += len(bloque)
+                if total > UPLOAD_MAX_BYTES:
+                    raise ArchivoDemasiadoGrande(f"La imagen supera {UPLOAD_MAX_BYTES // (1024 * 1024)} MB")
+                digest.update(bloque)
+                temporal.write(bloque)
+        if extension is None:
+            raise ValueError("Archivo vacío")
+        imagen_id = digest.hexdigest()
+        destino = _ruta(_relativa(imagen_id, extension))
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        if os.path.exists(destino):
+            os.unlink(temporal.name)
+        else:
+            os.replace(temporal.name, destino)
+    except BaseException:
+        if os.path.exists(temporal.name):
+            os.unlink(temporal.name)
+        raise
+
+    anterior = imagenes_collection.find_one_and_update(
+        {"_id": imagen_id},
+        {"$setOnInsert": {"ext": extension, "bytes": total, "estado": PENDIENTE, "creado_en": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE,
+    )
+    # También se reintenta si la primera vez no estaba Pillow y ahora sí
+    if anterior is None or (anterior.get("estado") == SIN_VARIANTES and Image is not None):
+        encolar("generar_variantes", max_intentos=3, imagen_id=imagen_id)
+    return describir(anterior or {"_id": imagen_id, "ext": extension})
+
+
+def _escribir(imagen, relativa, formato):
+    destino = _ruta(relativa)
+    if os.path.exists(destino):
+        return
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    # Se escribe aparte y se renombra: nunca se sirve una variante a medias
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(destino), prefix=".variante-", delete=False) as temporal:
+        imagen.save(temporal, FORMATOS_PIL[formato], **OPCIONES_PIL[formato])
+    os.replace(temporal.name, destino)
+
+
+def _convertir(imagen, formato):
+    if formato == "jpg" and imagen.mode not in ("RGB", "L"):
+        return imagen.convert("RGB")
+    if formato in ("png", "webp") and imagen.mode not in ("RGB", "RGBA", "L", "LA"):
+        return imagen.convert("RGBA")
+    return imagen
+
+
+def generar_variantes(imagen_id):
+    """
+    Genera las variantes de la imagen (idempotente: salta las que ya están)
+    y completa sus URLs en la colección y en los barberos que la usan.
+    """
+    imagen = imagenes_collection.find_one({"_id": imagen_id})
+    if imagen is None:
+        return
+    if Image is None:
+        logger.warning("Pillow no está instalado: la imagen %s queda sin variantes", imagen_id)
+        imagenes_collection.update_one({"_id": imagen_id, "estado": PENDIENTE}, {"$set": {"estado": SIN_VARIANTES}})
+        return
+    variantes = {}
+    with Image.open(_ruta(_relativa(imagen_id, imagen["ext"]))) as original:
+        # Respeta la orientación de la cámara; los metadatos EXIF no se copian
+        original = ImageOps.exif_transpose(original)
+        ancho, alto = original.size
+        for nombre, lado in VARIANTES.items():
+            reducida = original.copy()
+            reducida.thumbnail((lado, lado))
+            for formato in (imagen["ext"], "webp"):
+                relativa = _relativa(imagen_id, formato, nombre)
+                _escribir(_convertir(reducida, formato), relativa, formato)
+                variantes[f"{nombre}_webp" if formato == "webp" else nombre] = _url(relativa)
+    imagenes_collection.update_one(
+        {"_id": imagen_id},
+        {"$set": {"estado": LISTA, "variantes": variantes, "ancho": ancho, "alto": alto}},
+    )
+    sincronizar_barberos(imagen_id, variantes)
+
+
+def sincronizar_barberos(imagen_id, variantes=None):
+    """
+    Copia las URLs de las variantes a barbero.fotos de cada barbero que usa
+    la imagen. Sin `variantes` las lee de la colección (para una foto
+    agregada justo mientras se generaban).
+    """
+    if variantes is None:
+        imagen = imagenes_collection.find_one({"_id": imagen_id, "estado": LISTA}, {"variantes": 1})
+        if imagen is None:
+            return
+        variantes = imagen["variantes"]
+    ids = [str(b["_id"]) for b in barbers_collection.find({"fotos.id": imagen_id}, {"_id": 1})]
+    if not ids:
+        return
+    barbers_collection.update_many(
+        {"fotos.id": imagen_id},
+        {"$set": {f"fotos.$.{nombre}": url for nombre, url in variantes.items()}},
+    )
+    for barbero_id in ids:
+        barberos_cache.invalidar(barbero_id)
+    versiones.incrementar("barberos", *(f"barberos:{b}" for b in ids))
@@ -0,0 +1,113 @@
+# cortate/backend/utils/indices_barberos.py
+
+import os
+import threading
+import time
+from config.database import barbers_collection, lectura
+from utils.geo import IndiceGrilla
+from utils.clusters import IndiceClusters
+from utils.busqueda import IndiceTexto
+
+# Cada cuántos segundos se reconstruyen los índices desde MongoDB, para recoger
+# cambios hechos por otros workers
+INDICE_TTL = int(os.getenv("INDICE_BARBEROS_TTL", 300))
+
+# Campos mínimos que necesitan los índices en memoria
+CAMPOS_INDICE = {"ubicacion": 1, "tipo_atencion": 1, "precio_corte": 1, "precio_barba": 1,
+                 "nombre": 1, "servicios": 1, "descripcion": 1, "rating_avg": 1, "rating_count": 1}
+
+_lock = threading.Lock()
+_indice_geo = None
+_indice_clusters = None
+_indice_texto = None
+_cargado_en = 0.0
+
+
+def _datos(documento):
+    return {
+        "tipo_atencion": documento.get("tipo_atencion"),
+        "precio_corte": documento.get("precio_corte"),
+        "precio_barba": documento.get("precio_barba"),
+        "rating_avg": documento.get("rating_avg"),
+        "rating_count": documento.get("rating_count"),
+    }
+
+
+def _agregar(documento):
+    _id = str(documento["_id"])
+    _indice_texto.agregar(_id, documento, _datos(documento))
+    ubicacion = documento.get("ubicacion")
+    if not ubicacion:
+        return
+    lng, lat = ubicacion["coordinates"]
+    _indice_geo.agregar(_id, lat, lng, _datos(documento))
+    _indice_clusters.agregar(_id, lat, lng)
+
+
+def _quitar(_id):
+    _indice_geo.quitar(_id)
+    _indice_clusters.quitar(_id)
+    _indice_texto.quitar(_id)
+
+
+def _cargar():
+    global _indice_geo, _indice_clusters, _indice_texto, _cargado_en
+    _indice_geo = IndiceGrilla()
+    _indice_clusters = IndiceClusters()
+    _indice_texto = IndiceTexto()
+    for documento in lectura(barbers_collection).find({}, CAMPOS_INDICE):
+        _agregar(documento)
+    _cargado_en = time.monotonic()
+
+
+def _vigente():
+    if _indice_geo is None or time.monotonic() - _cargado_en > INDICE_TTL:
+        _cargar()
+
+
+def indice_geo():
+    """
+    Devuelve el índice geográfico en memoria, cargándolo si no existe o expiró.
+    """
+    with _lock:
+        _vigente()
+        return _indice_geo
+
+
+def buscar_texto(consulta, filtro=None):
+    """
+    Búsqueda en el índice invertido en memoria: [(id, relevancia, datos), ...],
+    donde datos trae tipo de atención, precios y rating para facetas y orden.
+    """
+    with _lock:
+        _vigente()
+        return [(i, r, _indice_texto.datos[i]) for i, r in _indice_texto.buscar(consulta, filtro)]
+
+
+def consultar_clusters(oeste, sur, este, norte, zoom):
+    """
+    Clusters del viewport para el zoom pedido, desde el índice jerárquico.
+    """
+    with _lock:
+        _vigente()
+        return _indice_clusters.consultar(oeste, sur, este, norte, zoom)
+
+
+def sincronizar(documento):
+    """
+    Actualiza los índices en memoria tras crear o modificar un barbero.
+    """
+    with _lock:
+        if _indice_geo is None:
+            return
+        _quitar(str(documento["_id"]))
+        _agregar(documento)
+
+
+def quitar(barber_id):
+    """
+    Quita un barbero eliminado de los índices en memoria.
+    """
+    with _lock:
+        if _indice_geo is not None:
+            _quitar(str(barber_id))
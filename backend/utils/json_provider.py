@@ -0,0 +1,68 @@
+# cortate/backend/utils/json_provider.py
+
+import json
+import os
+from collections.abc import Iterator
+from datetime import date, datetime
+from decimal import Decimal
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+# 'orjson' o 'stdlib'; por defecto se usa orjson si está instalado
+JSON_BACKEND = os.getenv("JSON_BACKEND", "orjson" if orjson else "stdlib")
+
+
+def serializar_bson(o):
+    """
+    Convierte tipos de MongoDB/Python que el encoder JSON no conoce.
+    """
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, Decimal128):
+        return str(o.to_decimal())
+    if isinstance(o, Decimal):
+        return str(o)
+    # Cursores de pymongo (find / aggregate) y generadores
+    if isinstance(o, Iterator):
+        return list(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class MongoJSONProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask que serializa ObjectId, datetime, Decimal128 y
+    cursores de pymongo sin conversiones manuales en los controladores.
+    Usa orjson cuando está disponible (JSON_BACKEND=orjson).
+    """
+
+    default = staticmethod(serializar_bson)
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if JSON_BACKEND == "orjson" and orjson is not None:
+            opciones = orjson.OPT_NON_STR_KEYS
+            if kwargs.get("indent"):
+                opciones |= orjson.OPT_INDENT_2
+            if kwargs.get("sort_keys", self.sort_keys):
+                opciones |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=serializar_bson, option=opciones).decode()
+        kwargs.setdefault("default", serializar_bson)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if JSON_BACKEND == "orjson" and orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
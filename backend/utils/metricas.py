@@ -0,0 +1,155 @@
+# cortate/backend/utils/metricas.py
+
+import math
+import threading
+
+# Límites de los histogramas (los de Prometheus para latencia, en segundos)
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_LATENCIA_DB = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+BUCKETS_TAMANO = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(nombres, valores, extra=()):
+    pares = list(zip(nombres, valores)) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{n}="{_escapar(v)}"' for n, v in pares) + "}"
+
+
+def _numero(valor):
+    if valor == math.inf:
+        return "+Inf"
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _cabecera(self):
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+
+
+class Contador(_Metrica):
+    """
+    Contador monótono por combinación de etiquetas.
+    """
+    tipo = "counter"
+
+    def incrementar(self, *etiquetas, valor=1):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+    def exportar(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        lineas = self._cabecera()
+        for etiquetas, valor in valores:
+            lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, etiquetas)} {_numero(valor)}")
+        return lineas
+
+
+class Histograma(_Metrica):
+    """
+    Histograma acumulativo con buckets fijos: observar() es O(log buckets)
+    y no guarda las muestras.
+    """
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor, *etiquetas):
+        # Índice del primer bucket que contiene el valor (len = sólo +Inf)
+        bajo, alto = 0, len(self.buckets)
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if valor <= self.buckets[medio]:
+                alto = medio
+            else:
+                bajo = medio + 1
+        with self._lock:
+            serie = self._valores.get(etiquetas)
+            if serie is None:
+                serie = self._valores[etiquetas] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][bajo] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self):
+        with self._lock:
+            valores = sorted((e, (list(s[0]), s[1], s[2])) for e, s in self._valores.items())
+        lineas = self._cabecera()
+        for etiquetas, (conteos, suma, total) in valores:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (math.inf,), conteos):
+                acumulado += conteo
+                extra = (("le", _numero(float(limite))),)
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, etiquetas, extra)} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, etiquetas)} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, etiquetas)} {total}")
+        return lineas
+
+
+class Registro:
+    """
+    Conjunto de métricas del proceso. Además de las métricas propias admite
+    funciones que devuelven gauges al momento de exportar, para publicar
+    estadísticas que ya existen (pool, cachés, tokens) sin duplicarlas.
+    """
+
+    def __init__(self):
+        self._metricas = []
+        self._gauges = []
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        metrica = Contador(nombre, ayuda, etiquetas)
+        self._metricas.append(metrica)
+        return metrica
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        metrica = Histograma(nombre, ayuda, etiquetas, buckets)
+        self._metricas.append(metrica)
+        return metrica
+
+    def gauges(self, prefijo, ayuda, funcion):
+        """
+        Registra `funcion() -> {clave: número}`; cada clave numérica se exporta
+        como el gauge <prefijo>_<clave>.
+        """
+        self._gauges.append((prefijo, ayuda, funcion))
+
+    def exportar(self):
+        """
+        Todas las métricas en el formato de texto de Prometheus (0.0.4).
+        """
+        lineas = []
+        for metrica in self._metricas:
+            lineas.extend(metrica.exportar())
+        for prefijo, ayuda, funcion in self._gauges:
+            try:
+                valores = funcion()
+            except Exception:
+                continue
+            for clave, valor in sorted(valores.items()):
+                if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+                    continue
+                nombre = f"{prefijo}_{clave}"
+                lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} gauge", f"{nombre} {_numero(valor)}"]
+        return "\n".join(lineas) + "\n"
+
+
+registro = Registro()
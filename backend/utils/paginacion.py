@@ -0,0 +1,100 @@
+# cortate/backend/utils/paginacion.py
+
+import base64
+import json
+from bson import ObjectId
+from flask import request
+from utils.helpers import formatear_fecha
+
+LIMITE_DEFAULT = 50
+LIMITE_MAX = 200
+
+# Orden estable de la agenda: fecha, hora y _id como desempate
+ORDEN_AGENDA = [("fecha", 1), ("hora", 1), ("_id", 1)]
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(documento):
+    """
+    Genera un cursor opaco a partir del último documento de la página.
+    """
+    valores = [documento.get("fecha"), documento.get("hora"), str(documento["_id"])]
+    crudo = json.dumps(valores, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor):
+    """
+    Devuelve (fecha, hora, ObjectId) desde un cursor opaco.
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        fecha, hora, _id = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return fecha, hora, ObjectId(_id)
+    except Exception:
+        raise CursorInvalido("Cursor inválido")
+
+
+def filtro_despues_de(fecha, hora, _id):
+    """
+    Condición keyset: documentos estrictamente posteriores a (fecha, hora, _id).
+    """
+    return {"$or": [
+        {"fecha": {"$gt": fecha}},
+        {"fecha": fecha, "hora": {"$gt": hora}},
+        {"fecha": fecha, "hora": hora, "_id": {"$gt": _id}},
+    ]}
+
+
+def leer_limite():
+    """
+    Lee ?limit= acotado entre 1 y LIMITE_MAX.
+    """
+    try:
+        limite = int(request.args.get("limit", LIMITE_DEFAULT))
+    except (TypeError, ValueError):
+        limite = LIMITE_DEFAULT
+    return max(1, min(limite, LIMITE_MAX))
+
+
+def filtro_agenda(filtro):
+    """
+    Agrega al filtro base los rangos ?desde= / ?hasta= (YYYY-MM-DD) y la
+    posición del ?cursor= si viene en la petición. Lanza ValueError si una
+    fecha no es válida o desde > hasta.
+    """
+    condiciones = [filtro]
+    rango = {}
+    for parametro, operador in (("desde", "$gte"), ("hasta", "$lte")):
+        if request.args.get(parametro):
+            fecha = formatear_fecha(request.args[parametro])
+            if fecha is None:
+                raise ValueError(f"Fecha inválida en '{parametro}' (YYYY-MM-DD)")
+            # Las fechas se guardan en forma canónica y se comparan como texto
+            rango[operador] = fecha.strftime("%Y-%m-%d")
+    if rango.get("$gte", "") > rango.get("$lte", "9999-12-31"):
+        raise ValueError("'desde' no puede ser posterior a 'hasta'")
+    if rango:
+        condiciones.append({"fecha": rango})
+    if request.args.get("cursor"):
+        condiciones.append(filtro_despues_de(*decodificar_cursor(request.args["cursor"])))
+    return condiciones[0] if len(condiciones) == 1 else {"$and": condiciones}
+
+
+def paginar_agenda(coleccion, filtro, proyeccion=None):
+    """
+    Ejecuta una página de la agenda ordenada por (fecha, hora, _id).
+    Devuelve (documentos, next_cursor); next_cursor es None en la última página.
+    La proyección debe incluir fecha y hora, que forman el cursor.
+    """
+    limite = leer_limite()
+    # Se pide un documento extra para saber si existe una página siguiente
+    documentos = list(coleccion.find(filtro_agenda(filtro), proyeccion).sort(ORDEN_AGENDA).limit(limite + 1))
+    siguiente = None
+    if len(documentos) > limite:
+        documentos = documentos[:limite]
+        siguiente = codificar_cursor(documentos[-1])
+    return documentos, siguiente
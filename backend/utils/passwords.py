@@ -0,0 +1,85 @@
+# cortate/backend/utils/passwords.py
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ALGORITMO = "pbkdf2_sha256"
+# Costo del hash; subirlo hace que los hashes existentes se regeneren al iniciar sesión
+PASSWORD_ITERACIONES = int(os.getenv("PASSWORD_ITERACIONES", 600000))
+# Hilos dedicados a hashear/verificar y cuántas operaciones pueden esperar turno
+PASSWORD_HILOS = int(os.getenv("PASSWORD_HILOS", 2))
+PASSWORD_COLA_MAX = int(os.getenv("PASSWORD_COLA_MAX", 32))
+
+_ejecutor = ThreadPoolExecutor(max_workers=PASSWORD_HILOS, thread_name_prefix="passwords")
+_cupos = threading.BoundedSemaphore(PASSWORD_HILOS + PASSWORD_COLA_MAX)
+
+
+class PoolSaturado(RuntimeError):
+    pass
+
+
+def _b64(datos):
+    return base64.b64encode(datos).decode()
+
+
+def _derivar(password, sal, iteraciones):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), sal, iteraciones)
+
+
+def _hashear(password):
+    sal = secrets.token_bytes(16)
+    derivado = _derivar(password, sal, PASSWORD_ITERACIONES)
+    return f"{ALGORITMO}${PASSWORD_ITERACIONES}${_b64(sal)}${_b64(derivado)}"
+
+
+def _verificar(password, hash_guardado):
+    try:
+        algoritmo, iteraciones, sal, derivado = hash_guardado.split("$")
+    except (AttributeError, ValueError):
+        return False
+    if algoritmo != ALGORITMO:
+        return False
+    calculado = _derivar(password, base64.b64decode(sal), int(iteraciones))
+    return hmac.compare_digest(calculado, base64.b64decode(derivado))
+
+
+def _en_pool(funcion, *args):
+    # El hash es CPU puro (pbkdf2 libera el GIL): se limita a PASSWORD_HILOS
+    # en paralelo y, si la cola está llena, se rechaza en vez de esperar
+    if not _cupos.acquire(blocking=False):
+        raise PoolSaturado("Demasiados inicios de sesión simultáneos, intenta nuevamente")
+    try:
+        return _ejecutor.submit(funcion, *args).result()
+    finally:
+        _cupos.release()
+
+
+def hashear(password):
+    """
+    Devuelve 'pbkdf2_sha256$<iteraciones>$<sal>$<hash>' con sal aleatoria.
+    """
+    return _en_pool(_hashear, password)
+
+
+def verificar(password, hash_guardado):
+    """
+    Compara la contraseña con el hash guardado en tiempo constante.
+    """
+    return _en_pool(_verificar, password, hash_guardado)
+
+
+def necesita_rehash(hash_guardado):
+    """
+    Indica si el hash fue generado con otro algoritmo o costo.
+    """
+    partes = (hash_guardado or "").split("$")
+    return len(partes) != 4 or partes[0] != ALGORITMO or partes[1] != str(PASSWORD_ITERACIONES)
+
+
+# Hash de relleno para que un email inexistente tarde lo mismo que uno válido
+HASH_RELLENO = _hashear(secrets.token_hex(8))
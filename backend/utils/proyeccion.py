@@ -0,0 +1,86 @@
+# cortate/backend/utils/proyeccion.py
+
+import re
+from flask import request
+
+# Presets de campos por colección; 'full' (o sin ?fields) devuelve todo
+PRESETS = {
+    "barberos": {
+        "card": ["nombre", "precio_corte", "precio_barba", "tipo_atencion", "ubicacion", "rating_avg", "rating_count", "fotos"],
+        "marker": ["nombre", "precio_corte", "ubicacion"],
+    },
+    "usuarios": {
+        "card": ["nombre", "tipo"],
+    },
+    "reservas": {
+        "card": ["barbero_id", "cliente_id", "fecha", "hora", "servicio", "estado"],
+    },
+    "reseñas": {
+        "card": ["barbero_id", "cliente_id", "puntuacion", "comentario", "creado_en"],
+    },
+    "penalizaciones": {
+        "card": ["usuario_id", "tipo", "puntos", "generado_en"],
+    },
+}
+
+# Campos que nunca se devuelven en lecturas
+CAMPOS_PRIVADOS = {
+    "usuarios": ("password", "password_hash"),
+}
+
+# Nombres de campo simples o anidados (a.b); nunca operadores '$'
+_CAMPO_VALIDO = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$")
+CAMPOS_MAX = 50
+
+
+def leer_proyeccion(coleccion, requeridos=()):
+    """
+    Convierte ?fields=a,b,c o ?fields=<preset> en una proyección de MongoDB.
+    Devuelve None si se pide el documento completo. `requeridos` se agregan
+    siempre (p. ej. los campos que usa el cursor de paginación).
+    Lanza ValueError si algún campo no es válido.
+    """
+    valor = request.args.get("fields", "").strip()
+    privados = CAMPOS_PRIVADOS.get(coleccion, ())
+    if not valor or valor == "full":
+        return dict.fromkeys(privados, 0) or None
+    campos = PRESETS.get(coleccion, {}).get(valor)
+    if campos is None:
+        campos = [c.strip() for c in valor.split(",") if c.strip()]
+        if len(campos) > CAMPOS_MAX or not all(_CAMPO_VALIDO.match(c) for c in campos):
+            raise ValueError("Campo inválido en 'fields'")
+    proyeccion = dict.fromkeys(campos, 1)
+    proyeccion.update(dict.fromkeys(requeridos, 1))
+    for campo in list(proyeccion):
+        partes = campo.split(".")
+        # MongoDB rechaza un campo junto a uno de sus subcampos (path
+        # collision): si se pide el padre, el hijo ya viene incluido
+        if partes[0] in privados or any(".".join(partes[:i]) in proyeccion for i in range(1, len(partes))):
+            del proyeccion[campo]
+    return proyeccion or {"_id": 1}
+
+
+
+def aplicar_proyeccion(documento, proyeccion):
+    """
+    Aplica una proyección a un documento ya leído (p. ej. desde cache), sin
+    modificar el original. Las exclusiones ({campo: 0}) son de primer nivel.
+    """
+    if proyeccion is None or documento is None:
+        return documento
+    if not any(proyeccion.values()):
+        return {k: v for k, v in documento.items() if k not in proyeccion}
+    resultado = {"_id": documento["_id"]} if "_id" in documento else {}
+    for campo in proyeccion:
+        partes = campo.split(".")
+        valor = documento
+        for parte in partes:
+            if not isinstance(valor, dict) or parte not in valor:
+                break
+            valor = valor[parte]
+        else:
+            destino = resultado
+            for parte in partes[:-1]:
+                destino = destino.setdefault(parte, {})
+            destino[partes[-1]] = valor
+    return resultado
@@ -0,0 +1,158 @@
+# cortate/backend/utils/puntaje.py
+
+import logging
+import math
+import os
+from datetime import datetime, timezone
+from pymongo.errors import DuplicateKeyError
+from config.database import puntajes_collection, penalties_collection
+
+logger = logging.getLogger("cortate.puntaje")
+
+# Cada penalización pierde la mitad de su peso cada PENALIZACION_VIDA_MEDIA_DIAS
+PENALIZACION_VIDA_MEDIA_DIAS = float(os.getenv("PENALIZACION_VIDA_MEDIA_DIAS", 30))
+# Puntaje a partir del cual el usuario no puede reservar
+PENALIZACION_UMBRAL_BLOQUEO = float(os.getenv("PENALIZACION_UMBRAL_BLOQUEO", 10))
+# Cada cuántas horas corre la compactación (tarea periódica de utils/tareas.py)
+PENALIZACION_COMPACTAR_CADA_H = float(os.getenv("PENALIZACION_COMPACTAR_CADA_H", 24))
+# Bajo este puntaje el documento se elimina al compactar
+PUNTAJE_MINIMO = 0.01
+REINTENTOS = 5
+
+LAMBDA = math.log(2) / (PENALIZACION_VIDA_MEDIA_DIAS * 86400)
+
+
+def es_numero(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool) and math.isfinite(valor)
+
+
+def numero(valor):
+    """
+    El valor si es un número finito; 0 si no (penalizaciones antiguas con
+    'puntos' o 'monto' de otro tipo).
+    """
+    return valor if es_numero(valor) else 0
+
+
+def momento(valor):
+    """
+    Fecha de una penalización en UTC sin zona: datetime o texto ISO (con
+    offset se convierte a UTC); si no se puede leer, ahora.
+    """
+    if isinstance(valor, str):
+        try:
+            valor = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+        except ValueError:
+            pass
+    if isinstance(valor, datetime):
+        if valor.tzinfo is not None:
+            return valor.astimezone(timezone.utc).replace(tzinfo=None)
+        return valor
+    return datetime.utcnow()
+
+
+def _decaer(puntaje, desde, hasta):
+    return puntaje * math.exp(-LAMBDA * (hasta - desde).total_seconds())
+
+
+def _aportar(usuario_id, aportes, signo):
+    # El documento guarda (score, as_of): el puntaje vigente en t es
+    # score * e^(-λ(t - as_of)). Un aporte p generado en t_i suma
+    # p * e^(-λ(as_of - t_i)) sin tocar as_of, protegido contra una
+    # compactación concurrente que lo haya movido
+    for _ in range(REINTENTOS):
+        actual = puntajes_collection.find_one({"_id": usuario_id}, {"as_of": 1})
+        if actual is None:
+            ahora = datetime.utcnow()
+            score = signo * sum(_decaer(p, t, ahora) for p, t in aportes)
+            try:
+                puntajes_collection.insert_one({"_id": usuario_id, "score": score, "as_of": ahora, "version": 1})
+                return
+            except DuplicateKeyError:
+                continue
+        as_of = actual["as_of"]
+        delta = signo * sum(_decaer(p, t, as_of) for p, t in aportes)
+        resultado = puntajes_collection.update_one(
+            {"_id": usuario_id, "as_of": as_of},
+            {"$inc": {"score": delta, "version": 1}},
+        )
+        if resultado.modified_count:
+            return
+    # Otra escritura ganó todas las veces: el puntaje queda sin este aporte
+    # hasta la próxima compactación, que lo recalcula desde las penalizaciones
+    logger.warning("Aporte de %s penalizaciones (signo %s) al puntaje de %s descartado tras %s reintentos",
+                   len(aportes), signo, usuario_id, REINTENTOS)
+
+
+def registrar(penalizaciones, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) penalizaciones al puntaje de cada
+    usuario, con una escritura por usuario.
+    """
+    por_usuario = {}
+    for penalizacion in penalizaciones:
+        usuario_id = penalizacion.get("usuario_id")
+        puntos = numero(penalizacion.get("puntos"))
+        if not usuario_id or not puntos:
+            continue
+        por_usuario.setdefault(str(usuario_id), []).append((puntos, momento(penalizacion.get("generado_en"))))
+    for usuario_id, aportes in por_usuario.items():
+        _aportar(usuario_id, aportes, signo)
+
+
+def obtener(usuario_id):
+    """
+    Puntaje vigente del usuario, evaluado al momento con una sola lectura por _id.
+    """
+    actual = puntajes_collection.find_one({"_id": str(usuario_id)}, {"score": 1, "as_of": 1})
+    if actual is None:
+        return 0.0
+    return max(0.0, _decaer(actual["score"], actual["as_of"], datetime.utcnow()))
+
+
+def bloqueado(usuario_id):
+    return obtener(usuario_id) >= PENALIZACION_UMBRAL_BLOQUEO
+
+
+def compactar():
+    """
+    Recalcula todos los puntajes desde las penalizaciones y los rebasa a
+    as_of = ahora, lo que corrige el error acumulado de punto flotante y
+    mantiene acotados los factores e^(λ·Δt). Los puntajes que ya decayeron
+    por debajo de PUNTAJE_MINIMO se eliminan. Un usuario que recibió
+    aportes durante la compactación se deja para la próxima pasada.
+    Devuelve {"actualizados": n, "eliminados": n, "omitidos": n}.
+    """
+    # Versión de cada puntaje antes de leer las penalizaciones
+    versiones = {d["_id"]: d.get("version", 0) for d in puntajes_collection.find({}, {"version": 1})}
+    ahora = datetime.utcnow()
+    puntajes = {}
+    for penalizacion in penalties_collection.find({}, {"usuario_id": 1, "puntos": 1, "generado_en": 1}):
+        puntos = numero(penalizacion.get("puntos"))
+        if not penalizacion.get("usuario_id") or not puntos:
+            continue
+        usuario_id = str(penalizacion["usuario_id"])
+        puntajes[usuario_id] = puntajes.get(usuario_id, 0.0) + _decaer(puntos, momento(penalizacion.get("generado_en")), ahora)
+
+    resumen = {"actualizados": 0, "eliminados": 0, "omitidos": 0}
+    for usuario_id in set(versiones) | set(puntajes):
+        score = puntajes.get(usuario_id, 0.0)
+        if usuario_id not in versiones:
+            if score < PUNTAJE_MINIMO:
+                continue
+            try:
+                puntajes_collection.insert_one({"_id": usuario_id, "score": score, "as_of": ahora, "version": 1})
+                resumen["actualizados"] += 1
+            except DuplicateKeyError:
+                resumen["omitidos"] += 1
+            continue
+        filtro = {"_id": usuario_id, "version": versiones[usuario_id]}
+        if score < PUNTAJE_MINIMO:
+            escrito = puntajes_collection.delete_one(filtro).deleted_count
+            clave = "eliminados"
+        else:
+            escrito = puntajes_collection.update_one(
+                filtro, {"$set": {"score": score, "as_of": ahora}, "$inc": {"version": 1}}).modified_count
+            clave = "actualizados"
+        resumen[clave if escrito else "omitidos"] += 1
+    return resumen
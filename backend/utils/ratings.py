@@ -0,0 +1,100 @@
+# cortate/backend/utils/ratings.py
+
+from bson import ObjectId
+from pymongo import UpdateOne, UpdateMany
+from config.database import barbers_collection, reviews_collection
+from utils.cache_documentos import barberos_cache
+from utils import versiones
+
+PUNTUACIONES = (1, 2, 3, 4, 5)
+
+# Recalcula el promedio desde los contadores actuales del documento (atómico)
+_RECALCULAR_PROMEDIO = [{"$set": {"rating_avg": {"$cond": [
+    {"$gt": ["$rating_count", 0]},
+    {"$divide": ["$rating_sum", "$rating_count"]},
+    None,
+]}}}]
+
+
+def puntuacion_valida(valor):
+    """
+    Verifica que la puntuación sea un entero de 1 a 5.
+    """
+    return isinstance(valor, int) and not isinstance(valor, bool) and valor in PUNTUACIONES
+
+
+def aplicar_resena(barbero_id, puntuacion, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) una reseña a los contadores del barbero:
+    rating_sum, rating_count e histograma rating_hist.<estrellas>.
+    """
+    aplicar_resenas([(barbero_id, puntuacion)], signo)
+
+
+def aplicar_resenas(resenas, signo=1):
+    """
+    Aplica muchas reseñas (barbero_id, puntuacion) con un solo $inc por
+    barbero y un recálculo del promedio para todos los afectados.
+    """
+    incrementos = {}
+    for barbero_id, puntuacion in resenas:
+        if not ObjectId.is_valid(barbero_id):
+            continue
+        inc = incrementos.setdefault(str(barbero_id), {"rating_sum": 0, "rating_count": 0})
+        inc["rating_sum"] += signo * puntuacion
+        inc["rating_count"] += signo
+        inc[f"rating_hist.{puntuacion}"] = inc.get(f"rating_hist.{puntuacion}", 0) + signo
+    if not incrementos:
+        return
+    ids = [ObjectId(i) for i in incrementos]
+    operaciones = [UpdateOne({"_id": ObjectId(i)}, {"$inc": inc}) for i, inc in incrementos.items()]
+    # El promedio se deriva de los contadores ya actualizados, así el último
+    # escritor siempre deja el valor correcto
+    operaciones.append(UpdateMany({"_id": {"$in": ids}}, _RECALCULAR_PROMEDIO))
+    barbers_collection.bulk_write(operaciones, ordered=True)
+    for barbero_id in incrementos:
+        barberos_cache.invalidar(barbero_id)
+    versiones.incrementar("barberos", *(f"barberos:{i}" for i in incrementos))
+
+
+def reconstruir_ratings():
+    """
+    Reconstruye los contadores de todos los barberos desde la colección de
+    reseñas con un pipeline de agregación. Devuelve la cantidad de barberos
+    actualizados.
+    """
+    pipeline = [
+        {"$match": {"puntuacion": {"$in": list(PUNTUACIONES)}}},
+        {"$group": {"_id": {"barbero_id": "$barbero_id", "puntuacion": "$puntuacion"}, "n": {"$sum": 1}}},
+        {"$group": {
+            "_id": "$_id.barbero_id",
+            "hist": {"$push": {"k": {"$toString": "$_id.puntuacion"}, "v": "$n"}},
+            "suma": {"$sum": {"$multiply": ["$_id.puntuacion", "$n"]}},
+            "cantidad": {"$sum": "$n"},
+        }},
+    ]
+    operaciones = []
+    con_resenas = []
+    for fila in reviews_collection.aggregate(pipeline):
+        if not ObjectId.is_valid(fila["_id"]):
+            continue
+        histograma = {str(p): 0 for p in PUNTUACIONES}
+        histograma.update({h["k"]: h["v"] for h in fila["hist"]})
+        _id = ObjectId(fila["_id"])
+        con_resenas.append(_id)
+        operaciones.append(UpdateOne({"_id": _id}, {"$set": {
+            "rating_sum": fila["suma"],
+            "rating_count": fila["cantidad"],
+            "rating_hist": histograma,
+            "rating_avg": fila["suma"] / fila["cantidad"],
+        }}))
+    # Barberos sin reseñas quedan en cero
+    operaciones.append(UpdateMany(
+        {"_id": {"$nin": con_resenas}},
+        {"$set": {"rating_sum": 0, "rating_count": 0, "rating_avg": None,
+                  "rating_hist": {str(p): 0 for p in PUNTUACIONES}}},
+    ))
+    resultado = barbers_collection.bulk_write(operaciones, ordered=False)
+    barberos_cache.limpiar()
+    versiones.incrementar_coleccion("barberos")
+    return resultado.modified_count
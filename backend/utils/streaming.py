@@ -0,0 +1,83 @@
+# cortate/backend/utils/streaming.py
+
+from flask import Response, current_app, request, stream_with_context
+
+BATCH_SIZE_DEFAULT = 500
+BATCH_SIZE_MAX = 5000
+
+FORMATOS_STREAM = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _serializar(documento):
+    """
+    Serializa un documento de MongoDB con el proveedor JSON de la app.
+    """
+    return current_app.json.dumps(documento)
+
+
+def leer_formato_stream():
+    """
+    Devuelve el formato de streaming pedido en ?stream= (json | ndjson) o None.
+    """
+    formato = request.args.get("stream")
+    if formato in FORMATOS_STREAM:
+        return formato
+    return None
+
+
+def leer_batch_size():
+    """
+    Lee ?batch_size= acotado entre 1 y BATCH_SIZE_MAX.
+    """
+    try:
+        batch_size = int(request.args.get("batch_size", BATCH_SIZE_DEFAULT))
+    except (TypeError, ValueError):
+        batch_size = BATCH_SIZE_DEFAULT
+    return max(1, min(batch_size, BATCH_SIZE_MAX))
+
+
+def _generar_json(cursor, batch_size):
+    # Arreglo JSON por partes: se emite "[" de inmediato y luego un chunk por lote
+    yield "["
+    primero = True
+    lote = []
+    for documento in cursor:
+        lote.append(_serializar(documento))
+        if len(lote) >= batch_size:
+            chunk = ",".join(lote)
+            yield chunk if primero else "," + chunk
+            primero = False
+            lote = []
+    if lote:
+        chunk = ",".join(lote)
+        yield chunk if primero else "," + chunk
+    yield "]"
+
+
+def _generar_ndjson(cursor, batch_size):
+    # Un documento por línea, agrupados en chunks de batch_size líneas
+    lote = []
+    for documento in cursor:
+        lote.append(_serializar(documento))
+        if len(lote) >= batch_size:
+            yield "\n".join(lote) + "\n"
+            lote = []
+    if lote:
+        yield "\n".join(lote) + "\n"
+
+
+def respuesta_stream(cursor, formato, batch_size=BATCH_SIZE_DEFAULT):
+    """
+    Construye una respuesta HTTP que serializa directamente desde el cursor de
+    pymongo, sin cargar la colección completa en memoria.
+    """
+    cursor = cursor.batch_size(batch_size)
+    generador = _generar_ndjson if formato == "ndjson" else _generar_json
+    return Response(
+        stream_with_context(generador(cursor, batch_size)),
+        mimetype=FORMATOS_STREAM[formato],
+    )
+
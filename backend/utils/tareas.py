@@ -0,0 +1,130 @@
+# cortate/backend/utils/tareas.py
+
+import logging
+import os
+import re
+import requests
+from config.database import (
+    bookings_collection, reviews_collection, penalties_collection, puntajes_collection,
+    dashboard_collection, disponibilidad_collection,
+)
+from utils import buckets, disponibilidad, eventos, imagenes, puntaje, versiones
+from utils.ratings import aplicar_resenas, puntuacion_valida, reconstruir_ratings
+from utils.trabajos import tarea
+
+logger = logging.getLogger("cortate.trabajos")
+
+# Documentos por tanda: los efectos (disponibilidad, buckets, ratings,
+# versiones) se aplican en una escritura por tanda
+LOTE_CASCADA = 200
+# Si se define, las notificaciones se envían por POST a esta URL
+NOTIFICACIONES_WEBHOOK_URL = os.getenv("NOTIFICACIONES_WEBHOOK_URL")
+NOTIFICACIONES_TIMEOUT = float(os.getenv("NOTIFICACIONES_TIMEOUT", 5))
+
+
+def _extraer(coleccion, filtro):
+    """
+    Borra los documentos del filtro de a uno y los entrega en tandas. Cada
+    documento lo devuelve sólo el find_one_and_delete que lo borró, así un
+    reintento (o un borrado concurrente desde la API) no descuenta dos veces.
+    """
+    tanda = []
+    while True:
+        documento = coleccion.find_one_and_delete(filtro)
+        if documento is None:
+            break
+        tanda.append(documento)
+        if len(tanda) >= LOTE_CASCADA:
+            yield tanda
+            tanda = []
+    if tanda:
+        yield tanda
+
+
+def _cancelar_reservas(reservas):
+    # Lo mismo que DELETE /api/bookings/delete/<id>, por tanda
+    for reserva in reservas:
+        if reserva.get("slot_activo"):
+            disponibilidad.liberar(reserva["barbero_id"], reserva["fecha"], reserva["hora"])
+    buckets.registrar_lote([(r.get("barbero_id"), r.get("fecha"), {"reservas": -1}) for r in reservas])
+    versiones.incrementar("reservas", *{clave for r in reservas for clave in (
+        f"reservas:barbero:{r.get('barbero_id')}", f"reservas:cliente:{r.get('cliente_id')}")})
+    eventos.emitir("reservas", "delete", reservas)
+
+
+@tarea("eliminar_barbero")
+def eliminar_barbero(barbero_id):
+    """
+    Cascada de un barbero eliminado: sus reservas, reseñas y penalizaciones,
+    y sus datos derivados (disponibilidad y buckets del dashboard). Los
+    ingresos se conservan como historial.
+    """
+    # Los bloques y buckets del barbero se borran enteros más abajo: basta
+    # con invalidar las agendas de sus clientes
+    clientes = bookings_collection.distinct("cliente_id", {"barbero_id": barbero_id})
+    bookings_collection.delete_many({"barbero_id": barbero_id})
+    versiones.incrementar("reservas", f"reservas:barbero:{barbero_id}",
+                          *(f"reservas:cliente:{c}" for c in clientes))
+    # Las reseñas sólo alimentaban el rating del propio barbero
+    reviews_collection.delete_many({"barbero_id": barbero_id})
+    versiones.incrementar("reseñas", f"reseñas:barbero:{barbero_id}")
+    penalties_collection.delete_many({"usuario_id": barbero_id})
+    puntajes_collection.delete_one({"_id": barbero_id})
+    disponibilidad_collection.delete_many({"_id": {"$regex": f"^{re.escape(barbero_id)}:"}})
+    dashboard_collection.delete_many({"barbero_id": barbero_id})
+
+
+@tarea("eliminar_usuario")
+def eliminar_usuario(usuario_id):
+    """
+    Cascada de un usuario eliminado: cancela sus reservas (libera los
+    bloques), quita sus reseñas de los ratings y borra sus penalizaciones.
+    """
+    for reservas in _extraer(bookings_collection, {"cliente_id": usuario_id}):
+        _cancelar_reservas(reservas)
+    for resenas in _extraer(reviews_collection, {"cliente_id": usuario_id}):
+        aplicar_resenas([(r.get("barbero_id"), r["puntuacion"]) for r in resenas
+                         if puntuacion_valida(r.get("puntuacion"))], -1)
+        versiones.incrementar("reseñas", *{f"reseñas:barbero:{r.get('barbero_id')}" for r in resenas})
+        eventos.emitir("reseñas", "delete", resenas)
+    for penalizaciones in _extraer(penalties_collection, {"usuario_id": usuario_id}):
+        buckets.registrar_lote([(usuario_id, puntaje.momento(p.get("generado_en")), {
+            "penalizaciones": -1,
+            "puntos_penalizacion": -puntaje.numero(p.get("puntos")),
+            "monto_penalizaciones": -puntaje.numero(p.get("monto")),
+        }) for p in penalizaciones])
+    puntajes_collection.delete_one({"_id": usuario_id})
+
+
+@tarea("reconstruir_ratings")
+def tarea_reconstruir_ratings():
+    reconstruir_ratings()
+
+
+@tarea("reconstruir_disponibilidad")
+def tarea_reconstruir_disponibilidad():
+    disponibilidad.reconstruir_disponibilidad()
+
+
+@tarea("compactar_penalizaciones", cada_s=puntaje.PENALIZACION_COMPACTAR_CADA_H * 3600)
+def tarea_compactar_penalizaciones():
+    logger.info("Puntajes compactados: %s", puntaje.compactar())
+
+
+@tarea("generar_variantes")
+def tarea_generar_variantes(imagen_id):
+    imagenes.generar_variantes(imagen_id)
+
+
+@tarea("notificar")
+def notificar(evento, datos):
+    """
+    Envía la notificación al webhook configurado (p. ej. el servicio de
+    WhatsApp). Un error HTTP lanza excepción y el trabajo se reintenta.
+    """
+    if not NOTIFICACIONES_WEBHOOK_URL:
+        logger.info("Notificación %s: %s", evento, datos)
+        return
+    respuesta = requests.post(NOTIFICACIONES_WEBHOOK_URL, json={"evento": evento, "datos": datos},
+                              timeout=NOTIFICACIONES_TIMEOUT)
+    respuesta.raise_for_status()
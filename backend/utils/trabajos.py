@@ -0,0 +1,256 @@
+# cortate/backend/utils/trabajos.py
+
+import logging
+import os
+import queue
+import random
+import threading
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from config.database import trabajos_collection
+
+logger = logging.getLogger("cortate.trabajos")
+
+# 0 desactiva los hilos en este proceso (los trabajos quedan en la colección
+# y los toma otro proceso)
+TRABAJOS_HABILITADOS = os.getenv("TRABAJOS_HABILITADOS", "1") == "1"
+TRABAJOS_HILOS = int(os.getenv("TRABAJOS_HILOS", 2))
+TRABAJOS_COLA_MAX = int(os.getenv("TRABAJOS_COLA_MAX", 1000))
+TRABAJOS_INTENTOS = int(os.getenv("TRABAJOS_INTENTOS", 5))
+# Espera antes del reintento n: TRABAJOS_BACKOFF_S * 2^(n-1), con jitter y tope
+TRABAJOS_BACKOFF_S = float(os.getenv("TRABAJOS_BACKOFF_S", 2))
+TRABAJOS_BACKOFF_MAX_S = float(os.getenv("TRABAJOS_BACKOFF_MAX_S", 300))
+# Cada cuánto se buscan en la colección trabajos pendientes (reintentos, los
+# que no cupieron en la cola y los que quedaron de un reinicio)
+TRABAJOS_POLL_S = float(os.getenv("TRABAJOS_POLL_S", 5))
+# Un trabajo 'en_curso' por más de esto se considera abandonado (worker caído)
+TRABAJOS_TIMEOUT_S = float(os.getenv("TRABAJOS_TIMEOUT_S", 600))
+
+PENDIENTE, EN_CURSO, HECHO, FALLIDO = "pendiente", "en_curso", "hecho", "fallido"
+
+_TAREAS = {}
+# Tareas periódicas: tipo -> segundos entre ejecuciones
+_PERIODICAS = {}
+
+
+def tarea(nombre, cada_s=None):
+    """
+    Registra la función como la tarea `nombre`. Debe ser idempotente: un
+    trabajo se puede ejecutar más de una vez si el worker cae a mitad.
+    Con `cada_s` la tarea es periódica: hay un único trabajo por tipo
+    ('periodico:<tipo>') que al terminar se reprograma cada_s más tarde.
+    """
+    def registrar(funcion):
+        _TAREAS[nombre] = funcion
+        if cada_s:
+            _PERIODICAS[nombre] = cada_s
+        return funcion
+    return registrar
+
+
+def _programar_periodicas():
+    # Cada proceso intenta crear el trabajo de cada tarea periódica; el _id
+    # fijo hace que exista uno solo aunque arranquen varios a la vez
+    ahora = datetime.utcnow()
+    for tipo in _PERIODICAS:
+        try:
+            trabajos_collection.update_one(
+                {"_id": f"periodico:{tipo}"},
+                {"$setOnInsert": {"tipo": tipo, "argumentos": {}, "estado": PENDIENTE, "intentos": 0,
+                                  "max_intentos": TRABAJOS_INTENTOS, "creado_en": ahora, "disponible_en": ahora}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            pass
+        except PyMongoError as e:
+            logger.warning("No se pudo programar la tarea periódica %s: %s", tipo, e)
+
+
+def _espera(intentos):
+    base = min(TRABAJOS_BACKOFF_MAX_S, TRABAJOS_BACKOFF_S * 2 ** (intentos - 1))
+    return base * random.uniform(0.5, 1.0)
+
+
+class _Motor:
+    """
+    Cola acotada y pool de hilos por proceso. Como el MongoClient, los hilos
+    no sobreviven a un fork: se crean al primer uso en cada worker.
+    El estado durable vive en la colección 'trabajos'; la cola en memoria
+    sólo lleva ids y se puede perder sin perder trabajos.
+    """
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _iniciar(self):
+        # Registra las tareas; va aquí porque utils.tareas importa este módulo
+        import utils.tareas  # noqa: F401
+        self._cola = queue.Queue(maxsize=TRABAJOS_COLA_MAX)
+        self._en_cola = set()
+        self._detener = threading.Event()
+        self.procesados = self.fallidos = self.reintentos = 0
+        _programar_periodicas()
+        for i in range(TRABAJOS_HILOS):
+            threading.Thread(target=self._trabajador, daemon=True, name=f"trabajo-{i}").start()
+        threading.Thread(target=self._recolector, daemon=True, name="trabajos-recolector").start()
+
+    def asegurar(self):
+        if not TRABAJOS_HABILITADOS:
+            return False
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._iniciar()
+                    self._pid = os.getpid()
+        return True
+
+    def ofrecer(self, trabajo_id):
+        # Si la cola está llena el trabajo queda pendiente para el recolector
+        with self._lock:
+            if trabajo_id in self._en_cola:
+                return
+            try:
+                self._cola.put_nowait(trabajo_id)
+            except queue.Full:
+                return
+            self._en_cola.add(trabajo_id)
+
+    def _trabajador(self):
+        while not self._detener.is_set():
+            trabajo_id = self._cola.get()
+            with self._lock:
+                self._en_cola.discard(trabajo_id)
+            try:
+                self._ejecutar(trabajo_id)
+            except Exception:
+                # Un error de la base al marcar el trabajo no mata el hilo;
+                # el trabajo se retoma por timeout
+                logger.exception("Error administrando el trabajo %s", trabajo_id)
+
+    def _ejecutar(self, trabajo_id):
+        ahora = datetime.utcnow()
+        trabajo = trabajos_collection.find_one_and_update(
+            {"_id": trabajo_id, "estado": PENDIENTE, "disponible_en": {"$lte": ahora}},
+            {"$set": {"estado": EN_CURSO, "tomado_en": ahora, "tomado_por": os.getpid()}, "$inc": {"intentos": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if trabajo is None:
+            # Lo tomó otro hilo o proceso, o todavía no le toca
+            return
+        funcion = _TAREAS.get(trabajo["tipo"])
+        try:
+            if funcion is None:
+                raise LookupError(f"Tarea desconocida: {trabajo['tipo']}")
+            funcion(**trabajo.get("argumentos", {}))
+        except Exception as e:
+            final = funcion is None or trabajo["intentos"] >= trabajo.get("max_intentos", TRABAJOS_INTENTOS)
+            cambios = {"estado": FALLIDO if final else PENDIENTE, "error": f"{type(e).__name__}: {e}"}
+            cada = _PERIODICAS.get(trabajo["tipo"]) if final and isinstance(trabajo_id, str) else None
+            if cada:
+                # Una periódica que agota sus intentos vuelve a su próximo turno
+                cambios.update(estado=PENDIENTE, intentos=0,
+                               disponible_en=datetime.utcnow() + timedelta(seconds=cada))
+                self._contar("fallidos")
+                logger.exception("Trabajo periódico %s falló, se reprograma", trabajo["tipo"])
+            elif final:
+                cambios["finalizado_en"] = datetime.utcnow()
+                self._contar("fallidos")
+                logger.exception("Trabajo %s (%s) falló definitivamente", trabajo_id, trabajo["tipo"])
+            else:
+                cambios["disponible_en"] = datetime.utcnow() + timedelta(seconds=_espera(trabajo["intentos"]))
+                self._contar("reintentos")
+                logger.warning("Trabajo %s (%s) falló, se reintentará: %s", trabajo_id, trabajo["tipo"], e)
+            trabajos_collection.update_one({"_id": trabajo_id, "estado": EN_CURSO}, {"$set": cambios})
+            return
+        cada = _PERIODICAS.get(trabajo["tipo"]) if isinstance(trabajo_id, str) else None
+        if cada:
+            # El trabajo periódico no termina: queda pendiente para su próximo turno
+            ahora = datetime.utcnow()
+            cambios = {"estado": PENDIENTE, "intentos": 0, "ejecutado_en": ahora,
+                       "disponible_en": ahora + timedelta(seconds=cada)}
+        else:
+            cambios = {"estado": HECHO, "finalizado_en": datetime.utcnow()}
+        trabajos_collection.update_one({"_id": trabajo_id, "estado": EN_CURSO}, {"$set": cambios, "$unset": {"error": ""}})
+        self._contar("procesados")
+
+    def _contar(self, contador):
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def _recolectar(self):
+        ahora = datetime.utcnow()
+        abandonados = trabajos_collection.update_many(
+            {"estado": EN_CURSO, "tomado_en": {"$lt": ahora - timedelta(seconds=TRABAJOS_TIMEOUT_S)}},
+            {"$set": {"estado": PENDIENTE, "disponible_en": ahora}},
+        )
+        if abandonados.modified_count:
+            logger.warning("%s trabajos abandonados vuelven a la cola", abandonados.modified_count)
+        libres = TRABAJOS_COLA_MAX - self._cola.qsize()
+        if libres <= 0:
+            return
+        pendientes = trabajos_collection.find(
+            {"estado": PENDIENTE, "disponible_en": {"$lte": ahora}}, {"_id": 1}
+        ).sort("disponible_en", 1).limit(libres)
+        for trabajo in pendientes:
+            self.ofrecer(trabajo["_id"])
+
+    def _recolector(self):
+        while not self._detener.wait(TRABAJOS_POLL_S):
+            try:
+                self._recolectar()
+            except Exception:
+                logger.exception("Error buscando trabajos pendientes")
+
+    def estadisticas(self):
+        if self._pid != os.getpid():
+            return {"activo": False}
+        return {
+            "activo": True,
+            "hilos": TRABAJOS_HILOS,
+            "en_cola": self._cola.qsize(),
+            "procesados": self.procesados,
+            "reintentos": self.reintentos,
+            "fallidos": self.fallidos,
+        }
+
+
+_motor = _Motor()
+
+
+def encolar(tipo, max_intentos=None, **argumentos):
+    """
+    Guarda el trabajo en la colección y lo ofrece a la cola local sin
+    esperar: la request no paga el trabajo ni se bloquea si la cola está
+    llena. Devuelve el id del trabajo.
+    """
+    ahora = datetime.utcnow()
+    trabajo = {
+        "tipo": tipo,
+        "argumentos": argumentos,
+        "estado": PENDIENTE,
+        "intentos": 0,
+        "max_intentos": max_intentos or TRABAJOS_INTENTOS,
+        "creado_en": ahora,
+        "disponible_en": ahora,
+    }
+    trabajos_collection.insert_one(trabajo)
+    if _motor.asegurar():
+        _motor.ofrecer(trabajo["_id"])
+    return trabajo["_id"]
+
+
+def estadisticas():
+    return _motor.estadisticas()
+
+
+def register_trabajos(app):
+    """
+    Arranca los hilos con la primera request de cada proceso, para retomar
+    trabajos pendientes tras un reinicio aunque nadie encole uno nuevo.
+    """
+
+    @app.before_request
+    def iniciar_trabajos():
+        _motor.asegurar()
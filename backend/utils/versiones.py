@@ -0,0 +1,54 @@
+# cortate/backend/utils/versiones.py
+
+from pymongo import UpdateOne
+from config.database import versiones_collection
+from utils.helpers import normalizar_id
+
+# Clave que cambia con las operaciones masivas (reconstrucciones) de una
+# colección; forma parte de todas las versiones de esa colección
+EPOCA = "epoca"
+
+
+def _normalizar(clave):
+    # 'barberos:<ID>' y 'barberos:<id>' (u ObjectId) son la misma versión
+    return ":".join(normalizar_id(parte) for parte in clave.split(":"))
+
+
+def _coleccion(clave):
+    return clave.split(":", 1)[0]
+
+
+def incrementar(*claves):
+    """
+    Incrementa los contadores de versión (p. ej. 'barberos', 'barberos:<id>')
+    y registra la fecha de modificación. Se llama después de cada escritura.
+    """
+    # Omite claves de documentos sin id (p. ej. una reserva sin cliente_id)
+    claves = list(dict.fromkeys(_normalizar(c) for c in claves if c and "None" not in c.split(":")))
+    if not claves:
+        return
+    versiones_collection.bulk_write([
+        UpdateOne({"_id": clave}, {"$inc": {"v": 1}, "$currentDate": {"actualizado_en": True}}, upsert=True)
+        for clave in claves
+    ], ordered=False)
+
+
+def incrementar_coleccion(coleccion):
+    """
+    Invalida todas las versiones de una colección (colección completa y
+    documentos individuales) tras una operación masiva.
+    """
+    incrementar(coleccion, f"{coleccion}:{EPOCA}")
+
+
+def leer(claves):
+    """
+    Devuelve ([(clave, versión), ...], última modificación o None) para las
+    claves pedidas más la época de cada colección, en una sola consulta.
+    """
+    claves = list(dict.fromkeys(_normalizar(c) for c in claves))
+    claves += [f"{c}:{EPOCA}" for c in dict.fromkeys(_coleccion(c) for c in claves)]
+    documentos = {d["_id"]: d for d in versiones_collection.find({"_id": {"$in": claves}})}
+    versiones = [(clave, documentos.get(clave, {}).get("v", 0)) for clave in sorted(claves)]
+    fechas = [d["actualizado_en"] for d in documentos.values() if d.get("actualizado_en")]
+    return versiones, max(fechas) if fechas else None